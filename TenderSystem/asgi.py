@@ -3,6 +3,9 @@ ASGI config for TenderSystem project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+HTTP goes to Django (including the async Server-Sent Events feed at
+/api/tender-events/); WebSocket connections go to the tender event feed.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -13,4 +16,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "TenderSystem.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from services.realtime.asgi import tender_websocket  # noqa: E402  (needs apps loaded)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await tender_websocket(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -45,6 +46,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson-backed JSON, falling back to the stdlib when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': (
+        'services.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'services.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -71,8 +82,124 @@ DEFAULT_FROM_EMAIL = 'Tender Management System <leightonsilver@gmail.com>'
 
 SITE_URL = 'http://localhost:8000'
 
+# audit_logs rows older than RETENTION_DAYS are moved, one calendar month
+# at a time, into compressed JSONL files under ARCHIVE_DIR by
+# `manage.py archive_audit_logs`. CODEC is 'zst' (needs zstandard) or
+# 'gz'; None picks zst when available.
+AUDIT_LOG = {
+    'RETENTION_DAYS': 180,
+    'ARCHIVE_DIR': BASE_DIR / 'archive' / 'audit',
+    'CODEC': None,
+    'BATCH_SIZE': 5000,
+}
+
+# Push feed of tender events (SSE at /api/tender-events/, WebSocket at
+# /ws/tenders/, ASGI only). Without BROKER_URL events stay in-process; set it
+# to a local Redis (e.g. 'redis://localhost:6379/0') when running several
+# ASGI workers.
+REALTIME = {
+    'BROKER_URL': os.environ.get('REALTIME_BROKER_URL'),
+    'CHANNEL': 'tender-events',
+    'HEARTBEAT_SECONDS': 15,
+    'QUEUE_SIZE': 100,
+}
+
+# Text of uploaded documents and CVs is extracted and indexed (for
+# /api/tenders/search_documents/ and /api/tenders/{id}/candidates/) by
+# `manage.py extract_documents`, on WORKERS
+# processes niced by NICE. At most MAX_PENDING files are in flight; larger
+# files are skipped and text beyond MAX_TEXT_CHARS is not indexed. PDFs need
+# pypdf installed.
+DOCUMENT_EXTRACTION = {
+    'WORKERS': 2,
+    'NICE': 10,
+    'MAX_PENDING': 8,
+    'TASKS_PER_CHILD': 200,
+    'MAX_FILE_BYTES': 50 * 1024 * 1024,
+    'MAX_TEXT_CHARS': 500_000,
+}
+
+# Tender transitions are queued in notification_events and fanned out to the
+# assigned managers by `manage.py deliver_notifications`. Events for one
+# tender arriving within COALESCE_SECONDS of each other are merged, and an
+# 'immediate' digest waits for COALESCE_SECONDS of quiet (at most
+# MAX_DELAY_SECONDS) before emailing.
+NOTIFICATIONS = {
+    'COALESCE_SECONDS': 300,
+    'MAX_DELAY_SECONDS': 900,
+    'BATCH_SIZE': 500,
+    'POLL_SECONDS': 5,
+}
+
+# Companies and departments are deleted by `manage.py run_deletion_jobs`,
+# BATCH_SIZE rows (with their cascades) per transaction. A running job that
+# saved no progress for STALE_SECONDS is taken over by another worker.
+DELETION_JOBS = {
+    'BATCH_SIZE': 100,
+    'POLL_SECONDS': 5,
+    'STALE_SECONDS': 600,
+}
+
+# Tender creation and transitions sent with an Idempotency-Key header keep
+# their response for TTL_SECONDS; a claim whose request has not finished
+# after LOCK_SECONDS is assumed abandoned and may be retried.
+IDEMPOTENCY = {
+    'TTL_SECONDS': 24 * 60 * 60,
+    'LOCK_SECONDS': 60,
+}
+
+# POST /api/batch/ runs up to MAX_REQUESTS API calls in-process. With
+# 'parallel', consecutive GETs share a pool of MAX_WORKERS threads, each
+# with its own database connection.
+BATCH_REQUESTS = {
+    'MAX_REQUESTS': 20,
+    'MAX_WORKERS': 4,
+}
+
+# Background jobs (emails for now) are queued in the `jobs` table and run by
+# `manage.py run_jobs` on PROCESSES processes of THREADS threads, each
+# claiming BATCH_SIZE jobs at a time. A failed job is retried up to
+# MAX_ATTEMPTS times, BACKOFF_SECONDS after the first failure and twice as
+# long after each next one (at most MAX_BACKOFF_SECONDS). A job running for
+# LOCK_SECONDS is taken to have lost its worker and queued again; finished
+# jobs are kept for KEEP_SECONDS.
+JOBS = {
+    'PROCESSES': 1,
+    'THREADS': 4,
+    'BATCH_SIZE': 1,
+    'POLL_SECONDS': 1,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 30,
+    'MAX_BACKOFF_SECONDS': 3600,
+    'LOCK_SECONDS': 600,
+    'KEEP_SECONDS': 7 * 86400,
+}
+
+# /api/calendar/ answers ranges of at most MAX_RANGE_DAYS. The iCal feed
+# covers FEED_PAST_DAYS back to FEED_FUTURE_DAYS ahead; rendered feeds of
+# up to FEED_CACHE_SIZE users are kept per process until their tenders
+# change.
+CALENDAR = {
+    'MAX_RANGE_DAYS': 366,
+    'FEED_PAST_DAYS': 30,
+    'FEED_FUTURE_DAYS': 365,
+    'FEED_CACHE_SIZE': 256,
+}
+
+# Responses of at least MIN_BYTES are compressed with Brotli or zstd when
+# those packages are installed, else gzip, at LEVELS. Compressed bodies of
+# responses with an ETag are kept per process, up to MAX_CACHED_BYTES each
+# and CACHE_BYTES in all, so repeat requests skip compression.
+COMPRESSION = {
+    'MIN_BYTES': 1024,
+    'LEVELS': {'br': 5, 'zstd': 3, 'gzip': 6},
+    'MAX_CACHED_BYTES': 4 * 1024 * 1024,
+    'CACHE_BYTES': 32 * 1024 * 1024,
+}
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'services.compression.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -81,8 +208,17 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "services.profiling.middleware.QueryInspectorMiddleware",
 ]
 
+# Per-request SQL inspection for development and CI: groups repeated query
+# shapes, logs N+1 suspects and checks services/profiling/budgets.py
+QUERY_INSPECTOR = {
+    'ENABLED': DEBUG,
+    'N_PLUS_ONE_THRESHOLD': 3,
+    'EXPOSE_HEADER': True,
+}
+
 ROOT_URLCONF = "TenderSystem.urls"
 
 TEMPLATES = [
@@ -122,6 +258,19 @@ DATABASES = {
     }
 }
 
+# Local runs (benchmarks, tests) can use SQLite instead of MySQL:
+#   TENDER_DB_ENGINE=sqlite TENDER_DB_NAME=bench.sqlite3 python manage.py ...
+# Tests run in memory unless TENDER_TEST_DB_NAME names a file, which the
+# tests that need real concurrent connections require.
+if os.environ.get('TENDER_DB_ENGINE') == 'sqlite':
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get('TENDER_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            "TEST": {"NAME": os.environ.get('TENDER_TEST_DB_NAME')},
+        }
+    }
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React/Vue default port
     "http://127.0.0.1:3000",
@@ -133,6 +282,7 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
@@ -4,14 +4,22 @@ from services.auth.views import (
     CustomTokenObtainPairView,
     register,
     verify_email,
+    resend_verification,
     request_password_reset,
+    reset_password,
     change_password
 )
 from rest_framework_simplejwt.views import TokenRefreshView
-from services.company.views import CompanyViewSet
-from services.department.views import DepartmentViewSet
-from services.tender.views import TenderViewSet
+from services.company.views import CompanyViewSet, async_company_list, async_company_detail
+from services.department.views import DepartmentViewSet, async_department_list, async_department_detail
+from services.tender.views import TenderViewSet, async_tender_list, async_tender_detail
 from services.tender_category.views import TenderCategoryViewSet
+from services.realtime.views import tender_events
+from services.inbox.views import inbox
+from services.batch.views import batch
+from services.calendar.views import calendar, calendar_feed, calendar_feed_url
+from services.deletion.views import deletion_job
+from services.notifications.views import mark_notifications_read, notification_preferences, notifications
 
 tender_router = DefaultRouter()
 tender_router.register(r'companies', CompanyViewSet, basename='company')
@@ -26,8 +34,28 @@ urlpatterns = [
     path('api/auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/verify-email/<str:token>/', verify_email, name='verify-email'),
+    path('api/auth/resend-verification/', resend_verification, name='resend-verification'),
     path('api/auth/request-password-reset/', request_password_reset, name='request-password-reset'),
+    path('api/auth/reset-password/<str:token>/', reset_password, name='reset-password'),
     path('api/auth/change-password/', change_password, name='change-password'),
+    path('api/tender-events/', tender_events, name='tender-events'),
+    path('api/inbox/', inbox, name='inbox'),
+    path('api/notifications/', notifications, name='notifications'),
+    path('api/notifications/read/', mark_notifications_read, name='notifications-read'),
+    path('api/notifications/preferences/', notification_preferences, name='notification-preferences'),
+    path('api/deletion-jobs/<int:pk>/', deletion_job, name='deletion-job'),
+    path('api/batch/', batch, name='batch'),
+    path('api/calendar/', calendar, name='calendar'),
+    path('api/calendar/feed-url/', calendar_feed_url, name='calendar-feed-url'),
+    path('api/calendar/feed/<str:token>/', calendar_feed, name='calendar-feed'),
+
+    # Async read endpoints, served without a worker thread under ASGI
+    path('api/async/companies/', async_company_list, name='async-company-list'),
+    path('api/async/companies/<int:pk>/', async_company_detail, name='async-company-detail'),
+    path('api/async/departments/', async_department_list, name='async-department-list'),
+    path('api/async/departments/<int:pk>/', async_department_detail, name='async-department-detail'),
+    path('api/async/tenders/', async_tender_list, name='async-tender-list'),
+    path('api/async/tenders/<int:pk>/', async_tender_detail, name='async-tender-detail'),
     
     path('api/', include(tender_router.urls)),
 ]
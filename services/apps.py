@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ServicesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "services"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .auth import utils  # noqa: F401  registers the email jobs
@@ -0,0 +1,269 @@
+import base64
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from ..models import AuditArchive, AuditArchiveTarget, AuditLog
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+ROW_FIELDS = ('log_id', 'user_id', 'action', 'target_model', 'target_id', 'details', 'timestamp')
+
+
+def audit_setting(name, default):
+    return getattr(settings, 'AUDIT_LOG', {}).get(name, default)
+
+
+def archive_dir():
+    return Path(audit_setting('ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive' / 'audit'))
+
+
+def default_codec():
+    return audit_setting('CODEC', None) or ('zst' if zstandard is not None else 'gz')
+
+
+def open_archive(path, codec, mode='r'):
+    """Text stream over an archive file, compressed with `codec` ('gz' or 'zst')"""
+    if codec == 'gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if codec == 'zst':
+        if zstandard is None:
+            raise RuntimeError('zstandard is not installed, cannot use zst audit archives')
+        raw = open(path, mode + 'b')
+        if mode == 'w':
+            stream = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    raise ValueError(f'Unknown audit archive codec {codec!r}')
+
+
+def month_bounds(month):
+    """Aware [start, end) datetimes for the month starting on date `month`"""
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    following = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start, timezone.make_aware(datetime(following.year, following.month, 1))
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def archivable_months(retention_days=None):
+    """Months whose every row is older than the retention window, oldest first"""
+    retention_days = audit_setting('RETENTION_DAYS', 180) if retention_days is None else retention_days
+    cutoff, _ = month_bounds(timezone.localdate(timezone.now() - timedelta(days=retention_days)))
+    return list(AuditLog.objects.filter(timestamp__lt=cutoff).dates('timestamp', 'month'))
+
+
+def archive_audit_logs(retention_days=None, batch_size=None, codec=None, log=None):
+    """Archive every month older than the retention window; returns the new manifest entries"""
+    log = log or (lambda message: None)
+    for archive in AuditArchive.objects.filter(targets_indexed=False).order_by('month', 'part'):
+        index_archive_targets(archive)
+        log(f'{archive}: indexed targets')
+    archives = []
+    for month in archivable_months(retention_days):
+        archive = archive_month(month, batch_size, codec)
+        if archive is not None:
+            log(f'{archive}: {archive.path}')
+            archives.append(archive)
+    return archives
+
+
+def archive_month(month, batch_size=None, codec=None):
+    """
+    Stream one month of audit_logs into a compressed JSONL file in log_id
+    order, record it in the manifest, then delete the rows in batches.
+    Safe to re-run after a crash: rows already covered by a manifest entry
+    are only deleted, anything newer goes into the next part.
+    """
+    batch_size = batch_size or audit_setting('BATCH_SIZE', 5000)
+    codec = codec or default_codec()
+    start, end = month_bounds(month)
+    rows = AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+
+    done = AuditArchive.objects.filter(month=month).aggregate(last=Max('last_log_id'), parts=Max('part'))
+    if done['last'] is not None:
+        _delete_archived(rows, done['last'], batch_size)
+        rows = rows.filter(log_id__gt=done['last'])
+    if not rows.exists():
+        return None
+
+    part = (done['parts'] or 0) + 1
+    relative = f"{month:%Y}/audit-{month:%Y-%m}-part{part}.jsonl.{codec}"
+    path = archive_dir() / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.partial')
+
+    count, first_id, last_id = 0, None, done['last'] or 0
+    targets = set()
+    with open_archive(partial, codec, 'w') as stream:
+        while True:
+            batch = list(rows.filter(log_id__gt=last_id).order_by('log_id').values_list(*ROW_FIELDS)[:batch_size])
+            if not batch:
+                break
+            for row in batch:
+                record = dict(zip(ROW_FIELDS, row))
+                record['timestamp'] = record['timestamp'].isoformat()
+                stream.write(json.dumps(record, separators=(',', ':')) + '\n')
+                targets.add((record['target_model'], record['target_id']))
+            count += len(batch)
+            first_id = batch[0][0] if first_id is None else first_id
+            last_id = batch[-1][0]
+    with open(partial, 'rb') as handle:
+        os.fsync(handle.fileno())
+    os.replace(partial, path)
+
+    with transaction.atomic():
+        archive = AuditArchive.objects.create(
+            month=month, part=part, path=relative, codec=codec, row_count=count,
+            first_log_id=first_id, last_log_id=last_id, sha256=_file_sha256(path), targets_indexed=True
+        )
+        _create_targets(archive, targets)
+    _delete_archived(rows, last_id, batch_size)
+    return archive
+
+
+def _create_targets(archive, targets):
+    AuditArchiveTarget.objects.bulk_create(
+        [AuditArchiveTarget(archive=archive, target_model=model, target_id=pk) for model, pk in targets],
+        batch_size=1000
+    )
+
+
+def index_archive_targets(archive):
+    """Record the targets of an archive written before archives were indexed"""
+    targets = {(record['target_model'], record['target_id']) for record in read_archive(archive)}
+    with transaction.atomic():
+        _create_targets(archive, targets)
+        AuditArchive.objects.filter(pk=archive.pk).update(targets_indexed=True)
+
+
+def _delete_archived(rows, last_log_id, batch_size):
+    """Delete archived rows in id windows so no single statement locks the whole month"""
+    while True:
+        ids = list(rows.filter(log_id__lte=last_log_id).order_by('log_id').values_list('log_id', flat=True)[:batch_size])
+        if not ids:
+            return
+        AuditLog.objects.filter(log_id__in=ids).delete()
+
+
+def read_archive(archive):
+    """Yield the rows of one archive file as dicts with an aware timestamp"""
+    path = archive_dir() / archive.path
+    with open_archive(path, archive.codec) as stream:
+        for line in stream:
+            record = json.loads(line)
+            record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+            yield record
+
+
+def encode_cursor(entry):
+    raw = f"{entry['timestamp'].isoformat()}|{entry['log_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(timestamp, log_id) from a cursor; ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, log_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def before_q(timestamp, log_id, prefix=''):
+    """
+    Rows strictly before (timestamp, log_id) in newest-first order. log_id
+    may be +/-math.inf to include or exclude every row at `timestamp`.
+    """
+    earlier = Q(**{f'{prefix}timestamp__lt': timestamp})
+    if log_id == math.inf:
+        return earlier | Q(**{f'{prefix}timestamp': timestamp})
+    if log_id == -math.inf:
+        return earlier
+    return earlier | Q(**{f'{prefix}timestamp': timestamp, f'{prefix}log_id__lt': log_id})
+
+
+def iter_audit_entries(filters=None, position=None, chunk_size=200):
+    """
+    Lazily yield audit entries newest first, keyset-paged on (timestamp,
+    log_id) through the hot table and then the archives. `position`
+    excludes everything at or after it.
+    """
+    filters = filters or {}
+    # Rows of archived months may linger in the hot table until the
+    # archive job finishes deleting them; read those months from the files
+    latest = AuditArchive.objects.aggregate(month=Max('month'))['month']
+    boundary = month_bounds(latest)[1] if latest else None
+
+    hot = AuditLog.objects.filter(**filters).order_by('-timestamp', '-log_id')
+    if boundary is not None:
+        hot = hot.filter(timestamp__gte=boundary)
+    cursor = position
+    while True:
+        page = hot if cursor is None else hot.filter(before_q(*cursor))
+        rows = [dict(zip(ROW_FIELDS, row)) for row in page.values_list(*ROW_FIELDS)[:chunk_size]]
+        yield from rows
+        if len(rows) < chunk_size:
+            break
+        cursor = (rows[-1]['timestamp'], rows[-1]['log_id'])
+    if boundary is None:
+        return
+
+    archives = AuditArchive.objects.order_by('-month', '-part')
+    if 'target_model' in filters and 'target_id' in filters:
+        # Only open the files that hold rows for this target
+        archives = archives.filter(Q(targets_indexed=False) | Q(
+            targets__target_model=filters['target_model'], targets__target_id=filters['target_id']
+        ))
+    manifest = list(archives)
+    for month in sorted({archive.month for archive in manifest}, reverse=True):
+        if position is not None and month_bounds(month)[0] > position[0]:
+            continue
+        matching = [
+            record
+            for archive in manifest if archive.month == month
+            for record in read_archive(archive)
+            if all(record[name] == value for name, value in filters.items())
+            and (position is None or (record['timestamp'], record['log_id']) < position)
+        ]
+        matching.sort(key=lambda record: (record['timestamp'], record['log_id']), reverse=True)
+        yield from matching
+
+
+def audit_entries(target_model=None, target_id=None, user_id=None, cursor=None, limit=50):
+    """
+    Newest-first page of audit entries across the hot table and the
+    archives. Returns (entries, next_cursor); next_cursor is None on the
+    last page.
+    """
+    filters = {
+        name: value for name, value in
+        (('target_model', target_model), ('target_id', target_id), ('user_id', user_id))
+        if value is not None
+    }
+    position = decode_cursor(cursor) if cursor else None
+    entries = list(islice(iter_audit_entries(filters, position, chunk_size=limit + 1), limit + 1))
+    next_cursor = encode_cursor(entries[limit - 1]) if len(entries) > limit else None
+    return entries[:limit], next_cursor
@@ -0,0 +1,108 @@
+from django.db.models import Q
+
+ALL = 'all'
+OWN = 'own'  # only objects the user created
+
+# Which rows each role sees: resource -> role -> ALL or {lookup: user
+# attribute}. '*' covers every role not listed. Lookups name attributes of
+# the requesting user, so a rule compiles once per role and binds to a user
+# without a query.
+VISIBILITY = {
+    'tender': {
+        'admin': ALL,
+        'manager': {'required_department_id': 'department_id'},
+        '*': {'required_department_id': 'department_id', 'created_by_id': 'user_id'},
+    },
+    'company': {'admin': ALL, '*': {'company_id': 'company_id'}},
+    'department': {'admin': ALL, '*': {'department_id': 'department_id'}},
+    'category': {'*': ALL},
+}
+
+# Who may do what: (resource, action) -> role -> ALL or OWN. Roles matching
+# neither their own entry nor '*' are denied.
+PERMISSIONS = {
+    ('tender', 'create'): {'manager': ALL},
+    ('tender', 'update'): {'manager': ALL, '*': OWN},
+    ('tender', 'destroy'): {'admin': ALL, '*': OWN},
+    ('tender', 'approve'): {'manager': ALL},
+    ('tender', 'award'): {'manager': ALL},
+    ('tender', 'close'): {'manager': ALL},
+    ('tender', 'candidates'): {'admin': ALL, 'manager': ALL},
+    ('tender', 'ranking'): {'admin': ALL, 'manager': ALL},
+    ('tender', 'define_criteria'): {'manager': ALL},
+    ('tender', 'score'): {'manager': ALL},
+    ('category', 'create'): {'admin': ALL, 'manager': ALL},
+    ('category', 'update'): {'admin': ALL, 'manager': ALL},
+    ('category', 'destroy'): {'admin': ALL},
+    ('company', 'create'): {'admin': ALL},
+    ('company', 'update'): {'admin': ALL},
+    ('company', 'destroy'): {'admin': ALL},
+    ('department', 'create'): {'admin': ALL},
+    ('department', 'update'): {'admin': ALL},
+    ('department', 'destroy'): {'admin': ALL},
+}
+
+ACTION_BITS = {key: 1 << position for position, key in enumerate(PERMISSIONS)}
+
+
+class RolePolicy:
+    """
+    VISIBILITY and PERMISSIONS compiled for one role: a tuple of (lookup,
+    user attribute) pairs per resource, and two bitmaps over ACTION_BITS,
+    one for actions on any object and one for actions on the user's own.
+    """
+
+    def __init__(self, role):
+        self.role = role
+        self.visibility = {}
+        for resource, rules in VISIBILITY.items():
+            rule = rules.get(role, rules.get('*'))
+            self.visibility[resource] = None if rule == ALL else tuple(rule.items())
+        self.granted = self.owned = 0
+        for key, rules in PERMISSIONS.items():
+            rule = rules.get(role, rules.get('*'))
+            if rule == ALL:
+                self.granted |= ACTION_BITS[key]
+            elif rule == OWN:
+                self.owned |= ACTION_BITS[key]
+
+    def sees_all(self, resource):
+        return self.visibility[resource] is None
+
+    def filter(self, resource, user):
+        """Q object restricting `resource` rows to those `user` may see"""
+        lookups = self.visibility[resource]
+        if lookups is None:
+            return Q()
+        return Q(**{lookup: getattr(user, attribute) for lookup, attribute in lookups})
+
+    def can_see(self, resource, user, row):
+        """Same as filter(), for one row given as {lookup: value}"""
+        lookups = self.visibility[resource] or ()
+        return all(row[lookup] == getattr(user, attribute) for lookup, attribute in lookups)
+
+    def allows(self, user, resource, action, owner_id=None):
+        bit = ACTION_BITS[resource, action]
+        if self.granted & bit:
+            return True
+        return bool(self.owned & bit) and owner_id is not None and owner_id == user.pk
+
+
+_policies = {}
+
+
+def policy_for(user):
+    """The compiled policy of `user`'s role, built on first use"""
+    policy = _policies.get(user.role)
+    if policy is None:
+        policy = _policies[user.role] = RolePolicy(user.role)
+    return policy
+
+
+def visible(user, resource, queryset):
+    return queryset.filter(policy_for(user).filter(resource, user))
+
+
+def allows(user, resource, action, owner_id=None):
+    """Whether `user` may perform `action`; `owner_id` is the object's creator, for OWN rules"""
+    return policy_for(user).allows(user, resource, action, owner_id)
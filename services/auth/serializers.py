@@ -2,6 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from ..models import Company, Department
+from ..registry.reference_data import RegistryRelatedField
 
 User = get_user_model()
 
@@ -12,8 +14,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         # Add custom claims
         token['email'] = user.email
         token['role'] = user.role
-        token['company_id'] = user.company.company_id if user.company else None
-        token['department_id'] = user.department.department_id if user.department else None
+        token['company_id'] = user.company_id
+        token['department_id'] = user.department_id
         token['full_name'] = f"{user.first_name} {user.last_name}"
         return token
     
@@ -24,6 +26,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         validators=[validate_password]
     )
     password2 = serializers.CharField(write_only=True, required=True)
+    department = RegistryRelatedField(Department)
+    company = RegistryRelatedField(Company)
 
     class Meta:
         model = User
@@ -0,0 +1,62 @@
+import hashlib
+import uuid
+from datetime import timedelta
+
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import UsedToken
+
+# Lifetime of each kind of token, as promised by the email that carries it;
+# calendar feed URLs live until the password changes
+TOKEN_MAX_AGE = {
+    'verify_email': timedelta(hours=24),
+    'reset_password': timedelta(hours=1),
+    'calendar_feed': None,
+}
+
+# Tokens carrying a password fingerprint, void once the password changes
+PASSWORD_BOUND = ('reset_password', 'calendar_feed')
+
+
+def _salt(purpose):
+    return f'services.auth.tokens.{purpose}'
+
+
+def password_fingerprint(user):
+    # Part of reset tokens: changing the password voids the ones issued before
+    return hashlib.sha256(user.password.encode()).hexdigest()[:16]
+
+
+def make_token(user, purpose):
+    """Signed, timestamped token naming `user`; nothing is stored until it is used"""
+    payload = {'user': user.pk, 'jti': uuid.uuid4().hex}
+    if purpose in PASSWORD_BOUND:
+        payload['password'] = password_fingerprint(user)
+    return signing.dumps(payload, salt=_salt(purpose))
+
+
+def read_token(token, purpose):
+    """Payload of a genuine, unexpired token, checked without a query; raises ValueError otherwise"""
+    try:
+        return signing.loads(token, salt=_salt(purpose), max_age=TOKEN_MAX_AGE[purpose])
+    except signing.BadSignature:
+        raise ValueError('Invalid or expired token')
+
+
+def consume_token(payload, purpose):
+    """Record a token as used, by primary key; raises ValueError if it already was"""
+    try:
+        with transaction.atomic():
+            UsedToken.objects.create(
+                jti=payload['jti'], purpose=purpose, expires_at=timezone.now() + TOKEN_MAX_AGE[purpose]
+            )
+    except IntegrityError:
+        raise ValueError('Token already used')
+
+
+def prune_used_tokens(now=None):
+    """Forget used tokens that have expired anyway; returns how many"""
+    deleted, _ = UsedToken.objects.filter(expires_at__lt=now or timezone.now()).delete()
+    return deleted
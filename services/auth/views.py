@@ -3,9 +3,14 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from .serializers import RegisterSerializer, CustomTokenObtainPairSerializer
-from .utils import generate_verification_token, send_verification_email, send_password_reset_email
+from ..deletion.jobs import pending_deletion
+from ..deletion.views import deletion_conflict
+from ..jobs.queue import enqueue
+from .tokens import consume_token, password_fingerprint, read_token
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 User = get_user_model()
@@ -18,12 +23,13 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 def register(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
-        verification_token = generate_verification_token()
-        user = serializer.save(
-            email_verification_token=verification_token,
-            is_active=False
+        job = pending_deletion(
+            [serializer.validated_data['company'].pk], [serializer.validated_data['department'].pk]
         )
-        send_verification_email(user, verification_token)
+        if job is not None:
+            return deletion_conflict(job)
+        user = serializer.save(is_active=False)
+        enqueue('auth.send_verification_email', {'user_id': user.pk})
         
         return Response({
             "message": "Registration successful. Please check your email to verify your account.",
@@ -38,21 +44,47 @@ def register(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def verify_email(request, token):
+    # The signature and expiry are checked in memory; the user is then one
+    # primary-key lookup and the ledger one INSERT
     try:
-        user = User.objects.get(email_verification_token=token, is_active=False)
-        user.is_active = True
-        user.email_verification_token = None
-        user.save()
-        return Response({
-            "message": "Email verified successfully. You can now login.",
-            "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
-            "email": user.email
-        })
-    except User.DoesNotExist:
+        payload = read_token(token, 'verify_email')
+        user = User.objects.filter(pk=payload['user'], is_active=False).first()
+        if user is None:
+            raise ValueError('Unknown or already verified user')
+        consume_token(payload, 'verify_email')
+    except ValueError:
         return Response({
             "message": "Invalid or expired verification token.",
             "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
         }, status=status.HTTP_400_BAD_REQUEST)
+    user.is_active = True
+    user.save(update_fields=['is_active', 'updated_at'])
+    return Response({
+        "message": "Email verified successfully. You can now login.",
+        "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
+        "email": user.email
+    })
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def resend_verification(request):
+    # For links that expired, or were issued before tokens were signed
+    user = User.objects.filter(email=request.data.get('email')).first()
+    if user is None:
+        return Response({
+            "message": "User with this email does not exist.",
+            "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+        }, status=status.HTTP_404_NOT_FOUND)
+    if user.is_active:
+        return Response({
+            "message": "Email is already verified.",
+            "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    enqueue('auth.send_verification_email', {'user_id': user.pk})
+    return Response({
+        "message": "A new verification link has been sent to your email.",
+        "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+    })
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -60,10 +92,7 @@ def request_password_reset(request):
     try:
         email = request.data.get('email')
         user = User.objects.get(email=email)
-        token = generate_verification_token()
-        user.password_reset_token = token
-        user.save()
-        send_password_reset_email(user, token)
+        enqueue('auth.send_password_reset_email', {'user_id': user.pk})
         return Response({
             "message": "Password reset instructions have been sent to your email.",
             "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
@@ -74,6 +103,46 @@ def request_password_reset(request):
             "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
         }, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def reset_password(request, token):
+    try:
+        payload = read_token(token, 'reset_password')
+        user = User.objects.filter(pk=payload['user']).first()
+        if user is None or payload.get('password') != password_fingerprint(user):
+            raise ValueError('Token issued before the last password change')
+    except ValueError:
+        return Response({
+            "message": "Invalid or expired password reset token.",
+            "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    new_password = request.data.get('new_password')
+    try:
+        if not new_password:
+            raise ValidationError('This field is required.')
+        validate_password(new_password, user)
+    except ValidationError as e:
+        return Response({
+            "message": "Invalid new password.",
+            "errors": {"new_password": e.messages},
+            "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        consume_token(payload, 'reset_password')
+    except ValueError:
+        return Response({
+            "message": "Invalid or expired password reset token.",
+            "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    user.set_password(new_password)
+    user.save(update_fields=['password', 'updated_at'])
+    return Response({
+        "message": "Password has been reset. You can now login.",
+        "timestamp": timezone.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+    })
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
@@ -0,0 +1,154 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+READ_METHODS = ('GET',)
+
+# Headers a sub-request may set, and response headers passed back
+REQUEST_HEADERS = ('If-None-Match', 'If-Modified-Since', 'Idempotency-Key', 'Accept')
+RESPONSE_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Idempotent-Replayed', 'Retry-After')
+
+# Inherited from the batch request only where they describe the client
+INHERITED_META = ('SERVER_NAME', 'SERVER_PORT', 'SERVER_PROTOCOL', 'REMOTE_ADDR', 'HTTP_HOST', 'HTTP_USER_AGENT',
+                  'HTTP_X_FORWARDED_FOR', 'HTTP_X_FORWARDED_PROTO', 'wsgi.url_scheme')
+
+_executor = None
+
+
+def batch_setting(name, default):
+    return getattr(settings, 'BATCH_REQUESTS', {}).get(name, default)
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=batch_setting('MAX_WORKERS', 4), thread_name_prefix='batch')
+    return _executor
+
+
+def item_error(item_id, status_code, message):
+    return {'id': item_id, 'status': status_code, 'headers': {}, 'body': {'message': message}}
+
+
+def build_request(request, method, path, body, headers):
+    """WSGIRequest for one sub-request, authenticated as the batch's user without a lookup"""
+    url = urlsplit(path)
+    payload = b'' if body is None else json.dumps(body).encode()
+    environ = {key: value for key, value in request.META.items() if key in INHERITED_META}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': io.BytesIO(payload),
+    })
+    environ.setdefault('wsgi.url_scheme', request.scheme)
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = str(value)
+    sub_request = WSGIRequest(environ)
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def run_item(request, index, item):
+    """Dispatch one sub-request in-process and return its entry of the combined response"""
+    item_id = item.get('id', index)
+    method = str(item.get('method', 'GET')).upper()
+    path = item.get('path')
+    headers = item.get('headers') or {}
+    if method not in METHODS or not isinstance(path, str) or not path.startswith('/api/'):
+        return item_error(item_id, status.HTTP_400_BAD_REQUEST, 'Each request needs a method and an /api/ path')
+    if not isinstance(headers, dict) or set(headers) - set(REQUEST_HEADERS):
+        return item_error(item_id, status.HTTP_400_BAD_REQUEST,
+                          f"Sub-request headers are limited to {', '.join(REQUEST_HEADERS)}")
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return item_error(item_id, status.HTTP_404_NOT_FOUND, 'Not found')
+    # Only DRF views honour the shared authentication; batches do not nest
+    if getattr(match.func, 'cls', None) is None or match.url_name == 'batch':
+        return item_error(item_id, status.HTTP_400_BAD_REQUEST, f'{path} cannot be used in a batch')
+
+    sub_request = build_request(request, method, path, item.get('body'), headers)
+    sub_request.resolver_match = match
+    response = match.func(sub_request, *match.args, **match.kwargs)
+    if response.streaming:
+        return item_error(item_id, status.HTTP_400_BAD_REQUEST, f'{path} streams its response; request it directly')
+    return {
+        'id': item_id,
+        'status': response.status_code,
+        'headers': {name: response[name] for name in RESPONSE_HEADERS if name in response},
+        'body': getattr(response, 'data', None),
+    }
+
+
+def run_in_thread(request, index, item):
+    # Pool threads keep their own connection, recycled like a request's
+    close_old_connections()
+    try:
+        return run_item(request, index, item)
+    finally:
+        close_old_connections()
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch(request):
+    """
+    Run several API calls in one round-trip: {'requests': [{'method',
+    'path', 'body', 'headers', 'id'}], 'parallel': bool}. Sub-requests go
+    straight to their views as the batch's user, in order; with parallel,
+    consecutive GETs run concurrently while writes stay sequential.
+    """
+    data = request.data if isinstance(request.data, dict) else {}
+    items = data.get('requests')
+    max_requests = batch_setting('MAX_REQUESTS', 20)
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return Response({
+            'message': 'requests must be a non-empty list of {method, path, body}',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > max_requests:
+        return Response({
+            'message': f'At most {max_requests} requests per batch',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    results = [None] * len(items)
+    reads = []
+
+    def flush_reads():
+        if len(reads) == 1:
+            results[reads[0]] = run_item(request, reads[0], items[reads[0]])
+        else:
+            futures = {index: _pool().submit(run_in_thread, request, index, items[index]) for index in reads}
+            for index, future in futures.items():
+                results[index] = future.result()
+        reads.clear()
+
+    parallel = data.get('parallel') is True
+    for index, item in enumerate(items):
+        if parallel and str(item.get('method', 'GET')).upper() in READ_METHODS:
+            reads.append(index)
+            continue
+        flush_reads()
+        results[index] = run_item(request, index, item)
+    flush_reads()
+    return Response({
+        'responses': results,
+        'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
@@ -0,0 +1,261 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Tender, User
+from .generator import BENCH_EMAIL_DOMAIN
+from .runner import percentile
+
+# (sync DRF path, async path) for each endpoint; {pk} is a visible tender
+ENDPOINTS = {
+    'detail': ('/api/tenders/{pk}/', '/api/async/tenders/{pk}/'),
+    'list': ('/api/tenders/', '/api/async/tenders/'),
+    'companies': ('/api/companies/', '/api/async/companies/'),
+}
+
+# deployment -> (server model, which path it serves)
+DEPLOYMENTS = {
+    'wsgi': ('wsgi', 0),
+    'asgi-sync': ('asgi', 0),
+    'asgi-async': ('asgi', 1),
+}
+
+
+class InFlight:
+    """Counts concurrent requests and the threads alive while they run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = self.peak = 0
+        self.peak_threads = threading.active_count()
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.current -= 1
+
+
+class DatabaseLatency:
+    """
+    Adds a fixed delay to every query, standing in for the network round
+    trip to MySQL that a local SQLite file does not have.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        if self.seconds:
+            connection_created.connect(self.install)
+            self.install(connection=connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+        if self in connection.execute_wrappers:
+            connection.execute_wrappers.remove(self)
+
+
+def wsgi_request(handler, path, token):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Bearer {token}', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    status = []
+    response = handler(environ, lambda code, headers, exc_info=None: status.append(int(code[:3])))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return status[0]
+
+
+async def asgi_request(handler, path, token):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'root_path': '', 'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+    }
+    finished = asyncio.Event()
+    body_sent = False
+    status = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Django listens for a client disconnect while the view runs
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    try:
+        await handler(scope, receive, send)
+    finally:
+        finished.set()
+    return status[0]
+
+
+def run_wsgi(paths, token, concurrency, tracker):
+    handler = WSGIHandler()
+    latencies, errors = [], 0
+
+    def one(path):
+        with tracker:
+            begin = time.perf_counter()
+            code = wsgi_request(handler, path, token)
+            return time.perf_counter() - begin, code
+
+    # A threaded WSGI server: one worker thread per in-flight request
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, code in pool.map(one, paths):
+            latencies.append(elapsed)
+            errors += code >= 400
+    return latencies, errors
+
+
+def run_asgi(paths, token, concurrency, tracker):
+    handler = ASGIHandler()
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(path):
+            async with semaphore:
+                with tracker:
+                    begin = time.perf_counter()
+                    code = await asgi_request(handler, path, token)
+                    return time.perf_counter() - begin, code
+
+        return await asyncio.gather(*(one(path) for path in paths))
+
+    results = asyncio.run(main())
+    return [elapsed for elapsed, code in results], sum(code >= 400 for elapsed, code in results)
+
+
+class ConcurrencyBenchmark:
+    """
+    Serves the same read endpoint as a threaded WSGI deployment, as a sync
+    view under ASGI and as an async view under ASGI, with `concurrency`
+    requests in flight. Reports throughput, latency, the threads alive and
+    the Python heap held per in-flight request (tracemalloc, in a second
+    pass so tracing does not distort the timings).
+    """
+
+    def __init__(self, endpoint='detail', levels=(1, 10, 50), requests=200, db_latency_ms=0.0,
+                 deployments=None, log=None):
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {endpoint}, choose from: {', '.join(ENDPOINTS)}")
+        self.endpoint = endpoint
+        self.levels = levels
+        self.requests = requests
+        self.db_latency = db_latency_ms / 1000
+        self.deployments = deployments or list(DEPLOYMENTS)
+        self.log = log or (lambda message: None)
+
+    def setup(self):
+        manager = (
+            User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}', role='manager')
+            .order_by('user_id').first()
+        )
+        if manager is None:
+            raise RuntimeError('No benchmark data found, run `manage.py bench_seed` first')
+        self.token = str(AccessToken.for_user(manager))
+        self.tender_ids = list(
+            Tender.objects.filter(required_department_id=manager.department_id)
+            .order_by('tender_id').values_list('tender_id', flat=True)[:200]
+        ) or [0]
+
+    def paths(self, deployment, count):
+        template = ENDPOINTS[self.endpoint][DEPLOYMENTS[deployment][1]]
+        return [template.format(pk=self.tender_ids[i % len(self.tender_ids)]) for i in range(count)]
+
+    def run(self):
+        self.setup()
+        # The connection used for setup would otherwise be shared state
+        connection.close()
+        results = {'endpoint': self.endpoint, 'db_latency_ms': self.db_latency * 1000, 'runs': []}
+        quiet = override_settings(DEBUG=False, QUERY_INSPECTOR={'ENABLED': False})
+        with quiet, DatabaseLatency(self.db_latency):
+            for concurrency in self.levels:
+                for deployment in self.deployments:
+                    result = self.measure(deployment, concurrency)
+                    results['runs'].append(result)
+                    self.log(format_concurrency_result(result))
+        return results
+
+    def measure(self, deployment, concurrency):
+        server = DEPLOYMENTS[deployment][0]
+        run = run_wsgi if server == 'wsgi' else run_asgi
+        run(self.paths(deployment, concurrency), self.token, concurrency, InFlight())  # warm up
+
+        tracker = InFlight()
+        started = time.perf_counter()
+        latencies, errors = run(self.paths(deployment, self.requests), self.token, concurrency, tracker)
+        elapsed = time.perf_counter() - started
+
+        memory_tracker = InFlight()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            run(self.paths(deployment, concurrency * 2), self.token, concurrency, memory_tracker)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'deployment': deployment,
+            'concurrency': concurrency,
+            'requests': len(latencies),
+            'errors': errors,
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'peak_in_flight': tracker.peak,
+            'peak_threads': tracker.peak_threads,
+            'heap_kib_per_request': round((peak - baseline) / 1024 / max(memory_tracker.peak, 1), 1),
+        }
+
+
+def format_concurrency_result(result):
+    return (
+        f"{result['deployment']:<10} c={result['concurrency']:<4} n={result['requests']:<5} "
+        f"err={result['errors']:<3} rps={result['throughput_rps']:>8.1f} "
+        f"p50={result['p50_ms']:>8.2f}ms p99={result['p99_ms']:>8.2f}ms "
+        f"threads={result['peak_threads']:<4} heap/req={result['heap_kib_per_request']:>7.1f}KiB"
+    )
@@ -0,0 +1,105 @@
+import random
+import time
+from datetime import timedelta
+from io import BytesIO
+
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ..parsers import FastJSONParser
+from ..renderers import FastJSONRenderer, orjson
+from .generator import WORDS
+
+
+def _timestamp(value):
+    return timezone.localtime(value).isoformat()
+
+
+def tender_payload(count=10_000, seed=42):
+    """
+    A list shaped exactly like TenderSerializer output, built without the
+    database so the encoder can be measured on its own.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    payload = []
+    for tender_id in range(1, count + 1):
+        created = now - timedelta(days=rng.randint(0, 700), seconds=rng.randint(0, 86_400))
+        deadline = created + timedelta(days=30)
+        name = ' '.join(rng.sample(WORDS, 3)).title()
+        payload.append({
+            'tender_id': tender_id,
+            'tender_name': name,
+            'description': f'{name} for the {rng.choice(WORDS)} programme – phase {rng.randint(1, 4)}',
+            'reference_number': f'BTD-{created:%Y%m%d}-{tender_id:06X}',
+            'budget': f'{rng.randint(1_000, 50_000_000)}.{rng.randint(0, 99):02d}',
+            'deadline': _timestamp(deadline),
+            'status': rng.choice(['draft', 'in_review', 'approved', 'submitted', 'awarded', 'closed']),
+            'company': rng.randint(1, 50),
+            'category': rng.randint(1, 15),
+            'required_department': rng.randint(1, 30),
+            'timeline': {
+                'timeline_id': tender_id, 'tender': tender_id,
+                'submission_start': _timestamp(created), 'submission_end': _timestamp(deadline),
+                'evaluation_start': _timestamp(deadline + timedelta(days=1)),
+                'evaluation_end': _timestamp(deadline + timedelta(days=14)),
+                'award_date': _timestamp(deadline + timedelta(days=21)),
+                'project_start_date': _timestamp(deadline + timedelta(days=30)),
+                'project_end_date': None,
+                'created_at': _timestamp(created), 'updated_at': _timestamp(created),
+            },
+            'documents': [
+                {
+                    'document_id': tender_id * 4 + i, 'document_type': 'spec',
+                    'file': f'http://localhost:8000/media/uploads/documents/spec/tender-{tender_id}-{i}.pdf',
+                    'description': None, 'created_at': _timestamp(created),
+                }
+                for i in range(rng.randint(1, 3))
+            ],
+            'approvals': [
+                {
+                    'approval_id': tender_id, 'status': 'approved', 'comments': 'Meets requirements',
+                    'created_at': _timestamp(deadline), 'approver': rng.randint(1, 500),
+                }
+            ],
+            'created_by': rng.randint(1, 500),
+            'created_at': _timestamp(created),
+            'updated_at': _timestamp(created),
+        })
+    return payload
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmark_encoding(count=10_000, repeat=5):
+    """Best-of-`repeat` encode and decode timings, stdlib vs FastJSON"""
+    payload = tender_payload(count)
+    results = {'tenders': count, 'orjson': orjson is not None, 'codecs': {}}
+    for label, renderer, parser in [
+        ('stdlib', JSONRenderer(), JSONParser()),
+        ('fast', FastJSONRenderer(), FastJSONParser()),
+    ]:
+        encode_time, body = _best_of(repeat, lambda: renderer.render(payload))
+        decode_time, _ = _best_of(repeat, lambda: parser.parse(BytesIO(body)))
+        results['codecs'][label] = {
+            'bytes': len(body),
+            'encode_ms': round(encode_time * 1000, 2),
+            'decode_ms': round(decode_time * 1000, 2),
+            'encode_mb_s': round(len(body) / encode_time / 1e6, 1),
+            'decode_mb_s': round(len(body) / decode_time / 1e6, 1),
+            'tenders_per_s': round(count / encode_time),
+        }
+    stdlib, fast = results['codecs']['stdlib'], results['codecs']['fast']
+    results['identical'] = JSONRenderer().render(payload) == FastJSONRenderer().render(payload)
+    results['encode_speedup'] = round(stdlib['encode_ms'] / fast['encode_ms'], 1)
+    results['decode_speedup'] = round(stdlib['decode_ms'] / fast['decode_ms'], 1)
+    return results
@@ -0,0 +1,223 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import (
+    Company, Department, User, TenderCategory, Tender, TenderTimeline,
+    Document, Approval, AuditLog
+)
+
+BENCH_PASSWORD = 'bench-Passw0rd!'
+BENCH_EMAIL_DOMAIN = 'bench.invalid'
+BENCH_COMPANY_PREFIX = 'Bench Co'
+BENCH_CATEGORY_PREFIX = 'Bench'
+
+# Average number of rows written per tender: the tender, its timeline,
+# documents, approvals, audit entries and manager assignments
+ROWS_PER_TENDER = 9
+
+WORDS = [
+    'road', 'bridge', 'school', 'clinic', 'water', 'solar', 'fleet', 'network',
+    'supply', 'maintenance', 'construction', 'consulting', 'audit', 'security',
+    'catering', 'cleaning', 'software', 'hardware', 'training', 'transport',
+    'drainage', 'lighting', 'borehole', 'furniture', 'printing', 'fuel',
+]
+STATUSES = ['draft', 'in_review', 'approved', 'submitted', 'awarded', 'closed']
+STATUS_WEIGHTS = [30, 20, 15, 15, 10, 10]
+DOCUMENT_TYPES = ['notice', 'spec', 'bid', 'contract', 'other']
+
+
+def plan_dataset(scale):
+    """Work out how many rows of each model make up roughly `scale` rows"""
+    tenders = max(scale // ROWS_PER_TENDER, 10)
+    return {
+        'tenders': tenders,
+        'companies': max(tenders // 2000, 5),
+        'departments': max(tenders // 200, 10),
+        'categories': 15,
+        'users': max(tenders // 20, 20),
+    }
+
+
+def _next_id(model):
+    pk = model._meta.pk.name
+    return (model.objects.aggregate(top=Max(pk))['top'] or 0) + 1
+
+
+def _bulk(model, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        model.objects.bulk_create(rows[start:start + batch_size])
+
+
+class DatasetGenerator:
+    """
+    Writes a deterministic synthetic dataset with bulk inserts and explicit
+    primary keys, so it works the same way on SQLite and MySQL. Every row
+    is tagged (bench email domain, company/category prefix) so it can be
+    removed again with `flush`.
+    """
+
+    def __init__(self, scale=10_000, seed=42, batch_size=2000, log=None):
+        self.plan = plan_dataset(scale)
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    def generate(self):
+        with transaction.atomic():
+            companies = self._companies()
+            departments = self._departments()
+            categories = self._categories()
+            users, managers = self._users(companies, departments)
+        self._tenders(companies, departments, categories, users, managers)
+        return self.plan
+
+    def _companies(self):
+        first = _next_id(Company)
+        rows = [
+            Company(
+                company_id=first + i, company_name=f'{BENCH_COMPANY_PREFIX} {first + i}',
+                description='Synthetic benchmark company', address=f'{i} Bench Street',
+                phone_number='0000000000', email=f'company{first + i}@{BENCH_EMAIL_DOMAIN}'
+            )
+            for i in range(self.plan['companies'])
+        ]
+        _bulk(Company, rows, self.batch_size)
+        self.log(f'companies: {len(rows)}')
+        return [row.company_id for row in rows]
+
+    def _departments(self):
+        first = _next_id(Department)
+        rows = [
+            Department(
+                department_id=first + i, department_name=f'Bench Dept {first + i}',
+                description='Synthetic benchmark department'
+            )
+            for i in range(self.plan['departments'])
+        ]
+        _bulk(Department, rows, self.batch_size)
+        self.log(f'departments: {len(rows)}')
+        return [row.department_id for row in rows]
+
+    def _categories(self):
+        first = _next_id(TenderCategory)
+        rows = [
+            TenderCategory(
+                category_id=first + i, name=f'{BENCH_CATEGORY_PREFIX} {first + i}',
+                description='Synthetic benchmark category'
+            )
+            for i in range(self.plan['categories'])
+        ]
+        _bulk(TenderCategory, rows, self.batch_size)
+        self.log(f'categories: {len(rows)}')
+        return [row.category_id for row in rows]
+
+    def _users(self, companies, departments):
+        # Hashing is deliberately slow, so every bench user shares one hash
+        password = make_password(BENCH_PASSWORD)
+        first = _next_id(User)
+        rows, managers = [], {}
+        for i in range(self.plan['users']):
+            user_id = first + i
+            department_id = departments[i % len(departments)]
+            # The first user of each department is its manager
+            role = 'manager' if i < len(departments) else self.random.choice(['staff', 'evaluator'])
+            if role == 'manager':
+                managers.setdefault(department_id, []).append(user_id)
+            rows.append(User(
+                user_id=user_id, first_name='Bench', last_name=f'User{user_id}',
+                email=f'user{user_id}@{BENCH_EMAIL_DOMAIN}', password=password, role=role,
+                phone_number='0000000000', address='Bench Street',
+                department_id=department_id, company_id=self.random.choice(companies),
+                is_active=True
+            ))
+        _bulk(User, rows, self.batch_size)
+        self.log(f'users: {len(rows)}')
+        return [(row.user_id, row.department_id) for row in rows], managers
+
+    def _tenders(self, companies, departments, categories, users, managers):
+        tender_id = _next_id(Tender)
+        timeline_id = _next_id(TenderTimeline)
+        document_id = _next_id(Document)
+        approval_id = _next_id(Approval)
+        log_id = _next_id(AuditLog)
+        through = Tender.assigned_to.through
+        total = self.plan['tenders']
+
+        for start in range(0, total, self.batch_size):
+            tenders, timelines, documents, approvals, logs, assignments = [], [], [], [], [], []
+            for _ in range(min(self.batch_size, total - start)):
+                creator_id, department_id = self.random.choice(users)
+                status = self.random.choices(STATUSES, STATUS_WEIGHTS)[0]
+                created = self.now - timedelta(days=self.random.randint(0, 730))
+                deadline = created + timedelta(days=self.random.randint(14, 90))
+                name = ' '.join(self.random.sample(WORDS, 3)).title()
+                tenders.append(Tender(
+                    tender_id=tender_id, tender_name=name,
+                    description=f'{name} for {self.random.choice(WORDS)} programme',
+                    reference_number=f'BTD-BENCH-{tender_id:09d}',
+                    budget=f'{self.random.randint(1_000, 50_000_000)}.{self.random.randint(0, 99):02d}',
+                    deadline=deadline, status=status, created_by_id=creator_id,
+                    company_id=self.random.choice(companies),
+                    category_id=self.random.choice(categories),
+                    required_department_id=department_id,
+                ))
+                timelines.append(TenderTimeline(
+                    timeline_id=timeline_id, tender_id=tender_id, submission_start=created,
+                    submission_end=deadline, evaluation_start=deadline + timedelta(days=1),
+                    evaluation_end=deadline + timedelta(days=14), award_date=deadline + timedelta(days=21),
+                    project_start_date=deadline + timedelta(days=30),
+                    project_end_date=deadline + timedelta(days=90),
+                ))
+                timeline_id += 1
+                for _ in range(self.random.randint(1, 3)):
+                    document_type = self.random.choice(DOCUMENT_TYPES)
+                    documents.append(Document(
+                        document_id=document_id, tender_id=tender_id, uploader_id=creator_id,
+                        document_type=document_type,
+                        file=f'uploads/documents/{document_type}/bench-{document_id}.pdf',
+                    ))
+                    document_id += 1
+                if status != 'draft':
+                    approvals.append(Approval(
+                        approval_id=approval_id, tender_id=tender_id,
+                        approver_id=managers[department_id][0], status='approved', comments='Looks good'
+                    ))
+                    approval_id += 1
+                for action in ['create', 'update', 'submit'][:self.random.randint(1, 3)]:
+                    logs.append(AuditLog(
+                        log_id=log_id, user_id=creator_id, action=action, target_model='Tender',
+                        target_id=tender_id, details=f'Tender BTD-BENCH-{tender_id:09d} {action}'
+                    ))
+                    log_id += 1
+                for manager_id in managers.get(department_id, []):
+                    assignments.append(through(tender_id=tender_id, user_id=manager_id))
+                tender_id += 1
+
+            with transaction.atomic():
+                Tender.objects.bulk_create(tenders)
+                TenderTimeline.objects.bulk_create(timelines)
+                Document.objects.bulk_create(documents)
+                Approval.objects.bulk_create(approvals)
+                AuditLog.objects.bulk_create(logs)
+                through.objects.bulk_create(assignments)
+            self.log(f'tenders: {start + len(tenders)}/{total}')
+
+
+def flush_dataset(log=None):
+    """Delete every row created by DatasetGenerator"""
+    log = log or (lambda message: None)
+    with transaction.atomic():
+        bench_users = User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}')
+        AuditLog.objects.filter(user__in=bench_users).delete()
+        Tender.objects.filter(created_by__in=bench_users).delete()
+        bench_users.delete()
+        Company.objects.filter(company_name__startswith=BENCH_COMPANY_PREFIX).delete()
+        Department.objects.filter(department_name__startswith='Bench Dept').delete()
+        TenderCategory.objects.filter(name__startswith=BENCH_CATEGORY_PREFIX).delete()
+    log('benchmark dataset removed')
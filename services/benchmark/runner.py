@@ -0,0 +1,128 @@
+import json
+import statistics
+import tempfile
+import time
+
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from ..profiling.query_inspector import inspect_queries
+from .scenarios import SCENARIOS
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    index = max(int(round(pct / 100 * len(samples))) - 1, 0)
+    return samples[min(index, len(samples) - 1)]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    latencies = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': to_ms(statistics.fmean(latencies)) if latencies else 0.0,
+        'p50_ms': to_ms(percentile(latencies, 50)),
+        'p90_ms': to_ms(percentile(latencies, 90)),
+        'p95_ms': to_ms(percentile(latencies, 95)),
+        'p99_ms': to_ms(percentile(latencies, 99)),
+        'max_ms': to_ms(latencies[-1]) if latencies else 0.0,
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else 0.0,
+        'max_queries': max(queries) if queries else 0,
+    }
+
+
+class BenchmarkRunner:
+    """
+    Runs scenarios in-process through the full middleware/DRF stack against
+    the configured database. Everything happens inside one transaction that
+    is rolled back afterwards and uploads go to a temporary MEDIA_ROOT, so
+    the seeded dataset is left untouched between runs.
+    """
+
+    def __init__(self, scenarios=None, iterations=100, warmup=10, seed=42, log=None):
+        self.names = scenarios or list(SCENARIOS)
+        unknown = set(self.names) - set(SCENARIOS)
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        self.iterations = iterations
+        self.warmup = warmup
+        self.seed = seed
+        self.log = log or (lambda message: None)
+
+    def run(self):
+        results = {
+            'database': connection.vendor,
+            'iterations': self.iterations,
+            'scenarios': {},
+        }
+        # DEBUG query logging and the per-request inspector would distort timings
+        profile_settings = override_settings(DEBUG=False, QUERY_INSPECTOR={'ENABLED': False})
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), profile_settings:
+            with transaction.atomic():
+                for name in self.names:
+                    results['scenarios'][name] = self.run_scenario(SCENARIOS[name](seed=self.seed))
+                    self.log(format_result(name, results['scenarios'][name]))
+                transaction.set_rollback(True)
+        return results
+
+    def run_scenario(self, scenario):
+        scenario.setup()
+        client = APIClient(HTTP_HOST='localhost')
+        for iteration in range(self.warmup):
+            scenario.request(client, iteration)
+
+        latencies, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for iteration in range(self.warmup, self.warmup + self.iterations):
+            with inspect_queries(capture_locations=False) as inspector:
+                begin = time.perf_counter()
+                response = scenario.request(client, iteration)
+                latencies.append(time.perf_counter() - begin)
+            queries.append(inspector.total)
+            if response.status_code >= 400:
+                errors += 1
+        return summarize(latencies, queries, errors, time.perf_counter() - started)
+
+
+def format_result(name, result):
+    return (
+        f"{name:<12} n={result['requests']:<5} err={result['errors']:<4} "
+        f"p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms "
+        f"p99={result['p99_ms']:>8.2f}ms rps={result['throughput_rps']:>8.1f} "
+        f"q/req={result['queries_per_request']}"
+    )
+
+
+def save_baseline(results, path):
+    with open(path, 'w') as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Compare p95 latency and queries per request against a saved baseline.
+    Returns a list of (scenario, metric, old, new) regressions where latency
+    grew by more than `tolerance` or the query count grew at all.
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append((name, 'p95_ms', previous['p95_ms'], current['p95_ms']))
+        if current['queries_per_request'] > previous['queries_per_request']:
+            regressions.append((name, 'queries_per_request', previous['queries_per_request'],
+                                current['queries_per_request']))
+    return regressions
@@ -0,0 +1,109 @@
+import random
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Tender, User
+from .generator import BENCH_EMAIL_DOMAIN, BENCH_PASSWORD, WORDS
+
+
+class Scenario:
+    """
+    One scripted API interaction. `setup` runs once, untimed, and `request`
+    issues exactly one HTTP request per call.
+    """
+    name = None
+
+    def __init__(self, seed=42):
+        self.random = random.Random(seed)
+
+    def setup(self):
+        manager = (
+            User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}', role='manager')
+            .order_by('user_id').first()
+        )
+        if manager is None:
+            raise RuntimeError('No benchmark data found, run `manage.py bench_seed` first')
+        self.manager = manager
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(manager)}'}
+
+    def request(self, client, iteration):
+        raise NotImplementedError
+
+
+class ListTendersScenario(Scenario):
+    name = 'list'
+
+    def request(self, client, iteration):
+        return client.get('/api/tenders/', **self.auth)
+
+
+class SearchTendersScenario(Scenario):
+    name = 'search'
+
+    def request(self, client, iteration):
+        term = self.random.choice(WORDS)
+        return client.get('/api/tenders/', {'search': term}, **self.auth)
+
+
+class TransitionScenario(Scenario):
+    """Alternates submit_for_review and approve over the manager's draft tenders"""
+    name = 'transitions'
+
+    def setup(self):
+        super().setup()
+        self.drafts = list(
+            Tender.objects.filter(required_department=self.manager.department, status='draft')
+            .values_list('tender_id', flat=True)[:1000]
+        )
+        if not self.drafts:
+            raise RuntimeError('No draft tenders available for the transitions scenario')
+
+    def request(self, client, iteration):
+        tender_id = self.drafts[(iteration // 2) % len(self.drafts)]
+        action = 'submit_for_review' if iteration % 2 == 0 else 'approve'
+        return client.post(f'/api/tenders/{tender_id}/{action}/', **self.auth)
+
+
+class LoginScenario(Scenario):
+    name = 'login'
+
+    def setup(self):
+        super().setup()
+        self.emails = list(
+            User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}')
+            .values_list('email', flat=True)[:500]
+        )
+
+    def request(self, client, iteration):
+        email = self.emails[iteration % len(self.emails)]
+        return client.post('/api/auth/login/', {'email': email, 'password': BENCH_PASSWORD})
+
+
+class UploadScenario(Scenario):
+    name = 'upload'
+
+    def setup(self):
+        super().setup()
+        self.tender_ids = list(
+            Tender.objects.filter(required_department=self.manager.department)
+            .values_list('tender_id', flat=True)[:100]
+        )
+        self.payload = b'%PDF-1.4 benchmark payload\n' * 2048
+
+    def request(self, client, iteration):
+        tender_id = self.tender_ids[iteration % len(self.tender_ids)]
+        upload = SimpleUploadedFile(f'bench-{iteration}.pdf', self.payload, content_type='application/pdf')
+        return client.post(
+            f'/api/tenders/{tender_id}/upload_document/',
+            {'document_type': 'bid', 'file': upload}, format='multipart', **self.auth
+        )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        ListTendersScenario, SearchTendersScenario, TransitionScenario,
+        LoginScenario, UploadScenario,
+    ]
+}
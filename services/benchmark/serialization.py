@@ -0,0 +1,51 @@
+import time
+
+from django.db.models import Prefetch
+from rest_framework.test import APIRequestFactory
+
+from ..models import Tender, Document, Approval
+from ..renderers import FastJSONRenderer
+from ..tender.projections import TenderProjection
+from ..tender.serializers import TenderSerializer
+
+
+def _timed(repeat, func):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmark_serialization(page_sizes=(100, 1000, 10_000), repeat=3):
+    """
+    Time serializer vs projection on the newest `page_size` tenders,
+    including the queries each path issues, and check the rendered bytes
+    match.
+    """
+    request = APIRequestFactory().get('/api/tenders/', HTTP_HOST='localhost')
+    renderer = FastJSONRenderer()
+    results = []
+    for page_size in page_sizes:
+        ids = list(Tender.objects.order_by('-created_at').values_list('tender_id', flat=True)[:page_size])
+        queryset = Tender.objects.filter(tender_id__in=ids).order_by('-created_at')
+        prefetched = queryset.select_related('timeline').prefetch_related(
+            Prefetch('documents', queryset=Document.objects.order_by('document_id')),
+            Prefetch('approvals', queryset=Approval.objects.order_by('approval_id')),
+        )
+        serializer_time, expected = _timed(repeat, lambda: renderer.render(
+            TenderSerializer(prefetched, many=True, context={'request': request}).data
+        ))
+        projection_time, actual = _timed(repeat, lambda: renderer.render(
+            TenderProjection(request).serialize(queryset)
+        ))
+        results.append({
+            'page_size': len(ids),
+            'serializer_ms': round(serializer_time * 1000, 1),
+            'projection_ms': round(projection_time * 1000, 1),
+            'speedup': round(serializer_time / projection_time, 1),
+            'identical': expected == actual,
+        })
+    return results
@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import CharField, F, Value
+from django.utils import timezone
+
+from ..auth.policy import visible
+from ..models import Tender, TenderTimeline
+
+LABELS = {
+    'submission_start': 'Submissions open',
+    'submission_end': 'Submission deadline',
+    'evaluation_start': 'Evaluation starts',
+    'evaluation_end': 'Evaluation ends',
+    'award_date': 'Award',
+    'project_start_date': 'Project starts',
+    'project_end_date': 'Project ends',
+}
+
+EVENT_FIELDS = ('tender_id', 'reference_number', 'tender_name', 'status', 'milestone', 'at')
+
+
+def calendar_setting(name, default):
+    return getattr(settings, 'CALENDAR', {}).get(name, default)
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def milestone_events(user, start, end):
+    """
+    Every milestone in [start, end) of the tenders `user` can see, earliest
+    first, as dicts of EVENT_FIELDS. Each milestone column is a separate
+    range query on its own index, combined with UNION ALL, so the cost
+    follows the events in range rather than the number of timelines.
+    """
+    timelines = TenderTimeline.objects.filter(tender__in=visible(user, 'tender', Tender.objects.values('pk')))
+    branches = [
+        timelines.filter(**{f'{column}__gte': start, f'{column}__lt': end}).annotate(
+            milestone=Value(column, output_field=CharField()), at=F(column)
+        ).values_list(
+            'tender_id', 'tender__reference_number', 'tender__tender_name', 'tender__status', 'milestone', 'at'
+        )
+        for column in TenderTimeline.MILESTONES
+    ]
+    events = branches[0].union(*branches[1:], all=True).order_by('at', 'tender_id', 'milestone')
+    for row in events.iterator():
+        yield dict(zip(EVENT_FIELDS, row))
+
+
+def escape_text(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """RFC 5545 content line: at most 75 octets, continued on lines starting with a space"""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return encoded + b'\r\n'
+    parts, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > (75 if not parts else 74):
+            parts.append(''.join(current))
+            current, size = [], 0
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts).encode() + b'\r\n'
+
+
+def ical_time(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def ical_event(event, stamp):
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:tender-{event['tender_id']}-{event['milestone']}@{settings.SITE_URL.split('://')[-1]}",
+        f'DTSTAMP:{stamp}',
+        f"DTSTART:{ical_time(event['at'])}",
+        'SUMMARY:' + escape_text(f"{event['reference_number']} {event['tender_name']}: {LABELS[event['milestone']]}"),
+        'DESCRIPTION:' + escape_text(f"Tender status: {event['status']}"),
+        f"URL:{settings.SITE_URL}/api/tenders/{event['tender_id']}/",
+        'END:VEVENT',
+    ]
+    return b''.join(fold(line) for line in lines)
+
+
+def ical_chunks(events):
+    """An iCalendar document, one chunk per event, so it can be streamed"""
+    stamp = ical_time(timezone.now())
+    yield b''.join(fold(line) for line in [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//TenderSystem//Tender calendar//EN', 'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH', 'X-WR-CALNAME:Tenders',
+    ])
+    for event in events:
+        yield ical_event(event, stamp)
+    yield fold('END:VCALENDAR')
+
+
+def feed_window(today=None):
+    """[start, end) of the iCal feed: FEED_PAST_DAYS back to FEED_FUTURE_DAYS ahead of today"""
+    today = today or timezone.localdate()
+    return (
+        day_start(today - timedelta(days=calendar_setting('FEED_PAST_DAYS', 30))),
+        day_start(today + timedelta(days=calendar_setting('FEED_FUTURE_DAYS', 365))),
+    )
+
+
+class FeedCache:
+    """
+    Per-process LRU of rendered iCal feeds, one per user. An entry is
+    reused while its key (the version of the user's tender scope, the
+    user's role and the feed window) is unchanged; a miss streams the
+    feed to the client and keeps the body once it has been sent in full.
+    """
+
+    def __init__(self, size=None):
+        self.size = size or calendar_setting('FEED_CACHE_SIZE', 256)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, user_id, key):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != key:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id, key, body):
+        with self._lock:
+            self._entries[user_id] = (key, body)
+            self._entries.move_to_end(user_id)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def stream(self, user, key, window):
+        chunks = []
+        for chunk in ical_chunks(milestone_events(user, *window)):
+            chunks.append(chunk)
+            yield chunk
+        self.put(user.pk, key, b''.join(chunks))
+
+
+feeds = FeedCache()
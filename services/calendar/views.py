@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..auth.tokens import make_token, password_fingerprint, read_token
+from ..models import User
+from ..tender.versioning import conditional_response, etag_variant, get_version, set_validators, tender_version_scope
+from .events import LABELS, calendar_setting, day_start, feed_window, feeds, milestone_events
+
+ICAL_CONTENT_TYPE = 'text/calendar; charset=utf-8'
+
+
+def query_date(params, name, default):
+    """Date in query parameter `name`, or `default` when absent; raises ValueError when malformed"""
+    value = params.get(name)
+    if not value:
+        return default
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f'{name} is not a date')
+    return day
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def calendar(request):
+    """
+    Milestones of the visible tenders between ?start= and ?end= (dates,
+    end exclusive), earliest first. Defaults to the next seven days.
+    """
+    try:
+        start = query_date(request.query_params, 'start', timezone.localdate())
+        end = query_date(request.query_params, 'end', start + timedelta(days=7))
+    except ValueError:
+        start = end = None
+    max_days = calendar_setting('MAX_RANGE_DAYS', 366)
+    if start is None or not 0 < (end - start).days <= max_days:
+        return Response({
+            'message': f'start and end must be dates (YYYY-MM-DD), end after start and at most {max_days} days apart',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # The default range moves with the date, which the URL does not show
+    version_scope = tender_version_scope(request.user)
+    not_modified, validators = conditional_response(
+        request, version_scope, get_version(*version_scope),
+        f'{etag_variant(request, request.accepted_media_type)}-{start:%Y%m%d}-{end:%Y%m%d}'
+    )
+    if not_modified is not None:
+        return not_modified
+    events = [
+        {**event, 'label': LABELS[event['milestone']]}
+        for event in milestone_events(request.user, day_start(start), day_start(end))
+    ]
+    return set_validators(Response({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'events': events,
+    }), validators)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def calendar_feed_url(request):
+    """Private iCal subscription URL of the current user; changing the password revokes it"""
+    token = make_token(request.user, 'calendar_feed')
+    return Response({
+        'message': 'Subscribe to this URL in your calendar application. Keep it private.',
+        'url': settings.SITE_URL + reverse('calendar-feed', args=[token]),
+        'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+
+@require_GET
+def calendar_feed(request, token):
+    """
+    iCal feed of the milestones visible to the token's user, from
+    FEED_PAST_DAYS ago to FEED_FUTURE_DAYS ahead. Calendar applications
+    cannot send a JWT, so the signed token in the URL authenticates.
+    """
+    try:
+        payload = read_token(token, 'calendar_feed')
+        user = User.objects.filter(pk=payload['user'], is_active=True).first()
+        if user is None or payload.get('password') != password_fingerprint(user):
+            raise ValueError('Token issued before the last password change')
+    except ValueError:
+        return JsonResponse({
+            'message': 'Invalid or revoked calendar feed URL.',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    request.user = user
+    window = feed_window()
+    version_scope = tender_version_scope(user)
+    version_row = get_version(*version_scope)
+    not_modified, validators = conditional_response(
+        request, version_scope, version_row, f'{etag_variant(request)}-{window[0]:%Y%m%d}'
+    )
+    if not_modified is not None:
+        return not_modified
+
+    key = (version_scope, version_row[0], user.role, window)
+    body = feeds.get(user.pk, key)
+    if body is None:
+        response = StreamingHttpResponse(feeds.stream(user, key, window), content_type=ICAL_CONTENT_TYPE)
+    else:
+        response = HttpResponse(body, content_type=ICAL_CONTENT_TYPE)
+    response['Content-Disposition'] = 'inline; filename="tenders.ics"'
+    return set_validators(response, validators)
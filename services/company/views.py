@@ -1,16 +1,36 @@
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.views.decorators.http import require_GET
+from ..auth.policy import allows, visible
+from ..auth.utils import async_jwt_required
+from ..deletion.jobs import job_status, pending_deletion, request_deletion
+from ..deletion.views import deletion_conflict
 from ..models import Company
+from ..registry.reference_data import ReferenceDataConditionalGetMixin
+from ..renderers import json_response
 from .serializers import CompanySerializer
 from django.utils import timezone
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(ReferenceDataConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     permission_classes = [IsAuthenticated]
+    visibility_resource = 'company'
+
+    def get_queryset(self):
+        return visible(self.request.user, 'company', Company.objects.all())
+
+    def forbidden(self, request, verb):
+        return Response({
+            'message': f'Not authorized to {verb} companies',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'user': request.user.email
+        }, status=status.HTTP_403_FORBIDDEN)
 
     def create(self, request, *args, **kwargs):
+        if not allows(request.user, 'company', 'create'):
+            return self.forbidden(request, 'create')
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -22,8 +42,13 @@ class CompanyViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
+        if not allows(request.user, 'company', 'update'):
+            return self.forbidden(request, 'update')
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
+        job = pending_deletion(company_ids=[instance.pk])
+        if job is not None:
+            return deletion_conflict(job)
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
@@ -35,11 +60,36 @@ class CompanyViewSet(viewsets.ModelViewSet):
         })
 
     def destroy(self, request, *args, **kwargs):
+        if not allows(request.user, 'company', 'destroy'):
+            return self.forbidden(request, 'delete')
+        # Users and tenders cascade from it, so run_deletion_jobs removes it
+        # in batches instead of one long transaction
         instance = self.get_object()
-        company_name = instance.company_name
-        self.perform_destroy(instance)
+        job, _ = request_deletion(instance, request.user)
         return Response({
-            'message': f'Company {company_name} deleted successfully',
+            'message': f'Company {job.target_name} is being deleted',
+            'job': job_status(job),
             'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
             'deleted_by': request.user.email
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+@require_GET
+@async_jwt_required
+async def async_company_list(request):
+    """List companies (async)"""
+    companies = [company async for company in visible(request.user, 'company', Company.objects.all())]
+    return json_response(CompanySerializer(companies, many=True).data)
+
+@require_GET
+@async_jwt_required
+async def async_company_detail(request, pk):
+    """Retrieve one company (async)"""
+    try:
+        company = await visible(request.user, 'company', Company.objects.all()).aget(pk=pk)
+    except Company.DoesNotExist:
+        return json_response({
+            'message': 'Company not found',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_404_NOT_FOUND)
+    return json_response(CompanySerializer(company).data)
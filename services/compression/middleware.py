@@ -0,0 +1,244 @@
+import threading
+import zlib
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+
+def compression_setting(name, default):
+    return getattr(settings, 'COMPRESSION', {}).get(name, default)
+
+
+class BrotliEncoder:
+    """brotli.Compressor behind the compress()/flush() interface of zlib"""
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+# Content-Encoding -> factory of an incremental encoder for a compression level
+ENCODERS = {'gzip': lambda level: zlib.compressobj(level, zlib.DEFLATED, 31)}
+if brotli is not None:
+    ENCODERS['br'] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS['zstd'] = lambda level: zstandard.ZstdCompressor(level=level).compressobj()
+
+# Best first; the first one the client accepts is used
+PREFERENCE = ('br', 'zstd', 'gzip')
+DEFAULT_LEVELS = {'br': 5, 'zstd': 3, 'gzip': 6}
+
+# Streams that must reach the client as they are written
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding.strip():
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    for coding in PREFERENCE:
+        if coding in ENCODERS and accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+
+def compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type in UNCOMPRESSED_TYPES:
+        return False
+    return content_type.startswith('text/') or content_type.endswith(('json', 'xml', 'javascript'))
+
+
+class CompressedCache:
+    """
+    Per-process LRU of compressed bodies, bounded by their total size. A
+    body is stored under the request path, the response's ETag and the
+    encoding: the ETag names the version of the data and who asked, so a
+    hit never needs revalidating.
+    """
+
+    def __init__(self, max_bytes=None, max_entry_bytes=None):
+        self.max_bytes = max_bytes or compression_setting('CACHE_BYTES', 32 * 1024 * 1024)
+        self.max_entry_bytes = max_entry_bytes or compression_setting('MAX_CACHED_BYTES', 4 * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.size = 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            self.size -= len(previous) if previous is not None else 0
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+compressed_bodies = CompressedCache()
+
+
+class CompressedStream:
+    """Incremental compression of a streamed body, storing the result once complete if it stays small enough"""
+
+    def __init__(self, encoder, store=None):
+        self.encoder = encoder
+        self.store = store
+        self.parts = [] if store is not None else None
+        self.size = 0
+
+    def keep(self, data):
+        if self.parts is None or not data:
+            return
+        self.size += len(data)
+        if self.size > compressed_bodies.max_entry_bytes:
+            self.parts = None
+        else:
+            self.parts.append(data)
+
+    def feed(self, chunk):
+        data = self.encoder.compress(chunk)
+        self.keep(data)
+        return data
+
+    def finish(self):
+        data = self.encoder.flush()
+        self.keep(data)
+        if self.parts is not None:
+            self.store(b''.join(self.parts))
+        return data
+
+    def stream(self, content):
+        for chunk in content:
+            data = self.feed(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+    async def astream(self, content):
+        async for chunk in content:
+            data = self.feed(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts: Brotli
+    or zstd when those packages are installed, else gzip. Streaming
+    responses are compressed as they stream, bodies under MIN_BYTES and
+    non-text types are left alone. Responses carrying an ETag (tender,
+    calendar and reference-data reads, exports) keep their compressed
+    body in a per-process cache, so repeat requests cost no compression.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = compression_setting('MIN_BYTES', 1024)
+        self.levels = {**DEFAULT_LEVELS, **compression_setting('LEVELS', {})}
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not compressible(response):
+            return response
+        if not response.streaming and len(response.content) < self.min_bytes:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        etag = response.get('ETag')
+        key = (request.get_full_path(), etag, coding) if etag and response.status_code == 200 else None
+        cached = compressed_bodies.get(key) if key else None
+        if cached is not None:
+            if response.streaming:
+                # The view's generator never runs, nor do its queries
+                response.streaming_content = [cached]
+            else:
+                response.content = cached
+        elif response.streaming:
+            stream = CompressedStream(
+                ENCODERS[coding](self.levels[coding]), (lambda body: compressed_bodies.put(key, body)) if key else None
+            )
+            if response.is_async:
+                response.streaming_content = stream.astream(response.streaming_content)
+            else:
+                response.streaming_content = stream.stream(response.streaming_content)
+        else:
+            encoder = ENCODERS[coding](self.levels[coding])
+            body = encoder.compress(response.content) + encoder.flush()
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            if key:
+                compressed_bodies.put(key, body)
+
+        if response.streaming:
+            del response.headers['Content-Length']
+        else:
+            response.headers['Content-Length'] = str(len(response.content))
+        if etag and etag.startswith('"'):
+            # Same data, different bytes: If-None-Match still matches, weakly
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
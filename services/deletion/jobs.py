@@ -0,0 +1,189 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import (
+    CV, Approval, BidScore, Company, DeletionJob, Department, Document, InboxItem, Notification, Tender, User
+)
+
+logger = logging.getLogger('services.deletion')
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+# Models whose rows own uploaded files: deleting model rows with these
+# lookups orphans the files of the listed file-bearing models
+FILE_OWNERS = {
+    Tender: [(Document, 'tender_id__in')],
+    Document: [(Document, 'pk__in')],
+    CV: [(CV, 'pk__in')],
+    User: [(Document, 'uploader_id__in'), (CV, 'user_id__in')],
+}
+
+
+def deletion_setting(name, default):
+    return getattr(settings, 'DELETION_JOBS', {}).get(name, default)
+
+
+def request_deletion(instance, user):
+    """Queue the removal of a company or department; returns (job, created)"""
+    if isinstance(instance, Company):
+        target, name = 'company', instance.company_name
+    else:
+        target, name = 'department', instance.department_name
+    job = DeletionJob.objects.filter(target=target, target_id=instance.pk, status__in=ACTIVE_STATUSES).first()
+    if job is not None:
+        return job, False
+    return DeletionJob.objects.create(target=target, target_id=instance.pk, target_name=name, requested_by=user), True
+
+
+def pending_deletion(company_ids=(), department_ids=()):
+    """
+    The active deletion job of any of these companies or departments, or
+    None. Writes under a target being deleted would be removed with it, or
+    fail on its foreign key once it is gone.
+    """
+    company_ids = [pk for pk in company_ids if pk is not None]
+    department_ids = [pk for pk in department_ids if pk is not None]
+    if not company_ids and not department_ids:
+        return None
+    return DeletionJob.objects.filter(
+        Q(target='company', target_id__in=company_ids) | Q(target='department', target_id__in=department_ids),
+        status__in=ACTIVE_STATUSES,
+    ).first()
+
+
+def job_status(job):
+    return {
+        'job_id': job.job_id,
+        'target': job.target,
+        'target_id': job.target_id,
+        'target_name': job.target_name,
+        'status': job.status,
+        'step': job.step,
+        'deleted': job.progress,
+        'error': job.error,
+        'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else None,
+    }
+
+
+def deletion_steps(job):
+    """
+    Ordered (step, queryset) pairs that empty the target bottom-up. Tenders
+    go first since each drags in its timeline, documents, approvals,
+    criteria, scores, inbox items and notifications; then what the
+    target's users own on other tenders, then the users, so the final
+    DELETE of the target row cascades to nothing.
+    """
+    key = 'company_id' if job.target == 'company' else 'department_id'
+
+    def owned(relation):
+        return Q(**{f'{relation}__{key}': job.target_id})
+
+    tenders = owned('created_by')
+    if job.target == 'company':
+        tenders |= Q(company_id=job.target_id)
+    target_model = Company if job.target == 'company' else Department
+    return [
+        ('tenders', Tender.objects.filter(tenders)),
+        ('documents', Document.objects.filter(owned('uploader'))),
+        ('approvals', Approval.objects.filter(owned('approver'))),
+        ('bid_scores', BidScore.objects.filter(owned('evaluator'))),
+        ('notifications', Notification.objects.filter(owned('user'))),
+        ('inbox_items', InboxItem.objects.filter(owned('user'))),
+        ('cvs', CV.objects.filter(owned('user'))),
+        ('users', User.objects.filter(**{key: job.target_id})),
+        (job.target, target_model.objects.filter(pk=job.target_id)),
+    ]
+
+
+def stored_files(model, pks):
+    """(storage, name) of every uploaded file that deleting these rows orphans"""
+    files = []
+    for owner, lookup in FILE_OWNERS.get(model, ()):
+        storage = owner._meta.get_field('file').storage
+        files += [
+            (storage, name) for name in owner.objects.filter(**{lookup: pks}).values_list('file', flat=True) if name
+        ]
+    return files
+
+
+def remove_files(files):
+    for storage, name in files:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete stored file %s', name, exc_info=True)
+
+
+def delete_batch(queryset, batch_size):
+    """Delete up to `batch_size` rows of `queryset` in one transaction; returns {model: rows} or None when empty"""
+    with transaction.atomic():
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return None
+        files = stored_files(queryset.model, pks)
+        _, counts = queryset.model.objects.filter(pk__in=pks).delete()
+        # Files go only once the rows are gone for good
+        transaction.on_commit(lambda: remove_files(files))
+    return counts
+
+
+def run_job(job, batch_size=None):
+    """Work through every step of `job`, saving progress after each batch"""
+    batch_size = batch_size or deletion_setting('BATCH_SIZE', 100)
+    try:
+        for step, queryset in deletion_steps(job):
+            job.step = step
+            while True:
+                counts = delete_batch(queryset, batch_size)
+                if counts is None:
+                    break
+                for label, count in counts.items():
+                    model_name = label.rsplit('.', 1)[-1]
+                    job.progress[model_name] = job.progress.get(model_name, 0) + count
+                job.save(update_fields=['step', 'progress', 'updated_at'])
+        job.status = 'done'
+    except Exception as e:
+        logger.exception('Deletion job %s failed', job.job_id)
+        job.status, job.error = 'failed', str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    return job
+
+
+def claim_job():
+    """
+    Next pending job, or a running one whose worker stopped saving progress
+    STALE_SECONDS ago; every step can safely be repeated. The conditional
+    UPDATE makes concurrent workers take different jobs.
+    """
+    stale = timezone.now() - timedelta(seconds=deletion_setting('STALE_SECONDS', 600))
+    candidates = DeletionJob.objects.filter(
+        Q(status='pending') | Q(status='running', updated_at__lt=stale)
+    ).order_by('job_id')
+    for job in candidates[:10]:
+        claimed = DeletionJob.objects.filter(pk=job.pk, status=job.status, updated_at=job.updated_at).update(
+            status='running', updated_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_deletion_jobs(batch_size=None, log=None):
+    """Run queued jobs until none is left; returns how many ran"""
+    log = log or (lambda message: None)
+    count = 0
+    while True:
+        job = claim_job()
+        if job is None:
+            return count
+        run_job(job, batch_size)
+        count += 1
+        log(f"Deleting {job.target} {job.target_name}: {job.status}, removed {job.progress}")
@@ -0,0 +1,31 @@
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..auth.policy import policy_for
+from ..models import DeletionJob
+from .jobs import job_status
+
+
+def deletion_conflict(job):
+    """409 for a write to, or under, a company or department that is being deleted"""
+    return Response({
+        'message': f'{job.get_target_display()} {job.target_name} is being deleted',
+        'job': job_status(job),
+        'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    }, status=status.HTTP_409_CONFLICT)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def deletion_job(request, pk):
+    """Progress of a company or department deletion"""
+    job = DeletionJob.objects.filter(pk=pk).first()
+    if job is None or not (job.requested_by_id == request.user.pk or policy_for(request.user).sees_all(job.target)):
+        return Response({
+            'message': 'Deletion job not found',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response(job_status(job))
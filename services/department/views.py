@@ -1,16 +1,36 @@
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.views.decorators.http import require_GET
+from ..auth.policy import allows, visible
+from ..auth.utils import async_jwt_required
+from ..deletion.jobs import job_status, pending_deletion, request_deletion
+from ..deletion.views import deletion_conflict
 from ..models import Department
+from ..registry.reference_data import ReferenceDataConditionalGetMixin
+from ..renderers import json_response
 from .serializers import DepartmentSerializer
 from django.utils import timezone
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ReferenceDataConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
+    visibility_resource = 'department'
+
+    def get_queryset(self):
+        return visible(self.request.user, 'department', Department.objects.all())
+
+    def forbidden(self, request, verb):
+        return Response({
+            'message': f'Not authorized to {verb} departments',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'user': request.user.email
+        }, status=status.HTTP_403_FORBIDDEN)
 
     def create(self, request, *args, **kwargs):
+        if not allows(request.user, 'department', 'create'):
+            return self.forbidden(request, 'create')
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -22,8 +42,13 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
+        if not allows(request.user, 'department', 'update'):
+            return self.forbidden(request, 'update')
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
+        job = pending_deletion(department_ids=[instance.pk])
+        if job is not None:
+            return deletion_conflict(job)
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
@@ -35,11 +60,36 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         })
 
     def destroy(self, request, *args, **kwargs):
+        if not allows(request.user, 'department', 'destroy'):
+            return self.forbidden(request, 'delete')
+        # Users and tenders cascade from it, so run_deletion_jobs removes it
+        # in batches instead of one long transaction
         instance = self.get_object()
-        department_name = instance.department_name
-        self.perform_destroy(instance)
+        job, _ = request_deletion(instance, request.user)
         return Response({
-            'message': f'Department {department_name} deleted successfully',
+            'message': f'Department {job.target_name} is being deleted',
+            'job': job_status(job),
             'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
             'deleted_by': request.user.email
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+@require_GET
+@async_jwt_required
+async def async_department_list(request):
+    """List departments (async)"""
+    departments = [department async for department in visible(request.user, 'department', Department.objects.all())]
+    return json_response(DepartmentSerializer(departments, many=True).data)
+
+@require_GET
+@async_jwt_required
+async def async_department_detail(request, pk):
+    """Retrieve one department (async)"""
+    try:
+        department = await visible(request.user, 'department', Department.objects.all()).aget(pk=pk)
+    except Department.DoesNotExist:
+        return json_response({
+            'message': 'Department not found',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_404_NOT_FOUND)
+    return json_response(DepartmentSerializer(department).data)
@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import Document, DocumentText
+from .extractors import extract_file, lower_priority
+from .search import index_document
+
+
+def extraction_setting(name, default):
+    return getattr(settings, 'DOCUMENT_EXTRACTION', {}).get(name, default)
+
+
+def pending_documents(verify=False):
+    """Documents never extracted or saved since their last extraction; with `verify`, all of them"""
+    documents = Document.objects.all()
+    if not verify:
+        documents = documents.filter(Q(text__isnull=True) | Q(updated_at__gt=F('text__extracted_at')))
+    return documents.order_by('document_id').values_list('document_id', 'file', 'text__sha256')
+
+
+def save_result(document_id, result):
+    """Store one extraction result and refresh the document's index terms"""
+    now = timezone.now()
+    if result['status'] == 'unchanged':
+        DocumentText.objects.filter(document_id=document_id).update(extracted_at=now)
+        return
+    with transaction.atomic():
+        DocumentText.objects.update_or_create(document_id=document_id, defaults={
+            'sha256': result['sha256'], 'status': result['status'], 'text': result.get('text', ''),
+            'error': result.get('error', ''), 'extracted_at': now,
+        })
+        index_document(document_id, result.get('text', ''))
+
+
+def extraction_options():
+    return {
+        'max_bytes': extraction_setting('MAX_FILE_BYTES', 50 * 1024 * 1024),
+        'max_chars': extraction_setting('MAX_TEXT_CHARS', 500_000),
+    }
+
+
+def run_pool(jobs, record, workers=None):
+    """
+    Call record(key, result) for every (key, path, known_sha256) job,
+    extracting on a pool of `workers` low-priority processes (0 runs
+    inline). At most MAX_PENDING files are in flight, so a bulk upload
+    neither floods the pool nor holds its text in memory.
+    """
+    workers = extraction_setting('WORKERS', 2) if workers is None else workers
+    options = extraction_options()
+    root = str(settings.MEDIA_ROOT)
+    jobs = ((key, os.path.join(root, name), sha256) for key, name, sha256 in jobs)
+    if workers == 0:
+        for key, path, sha256 in jobs:
+            record(key, extract_file(path, sha256, **options))
+        return
+
+    max_pending = max(extraction_setting('MAX_PENDING', 8), workers)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=lower_priority,
+        initargs=(extraction_setting('NICE', 10),), max_tasks_per_child=extraction_setting('TASKS_PER_CHILD', 200)
+    ) as pool:
+        in_flight = {}
+        for key, path, sha256 in jobs:
+            if len(in_flight) >= max_pending:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(in_flight.pop(future), future.result())
+            in_flight[pool.submit(extract_file, path, sha256, **options)] = key
+        for future in wait(in_flight).done:
+            record(in_flight[future], future.result())
+
+
+def extract_documents(verify=False, workers=None, log=None):
+    """Extract and index every pending document; returns {status: count}"""
+    log = log or (lambda message: None)
+    counts = {}
+
+    def record(document_id, result):
+        save_result(document_id, result)
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        if result['status'] == 'failed':
+            log(f"Document {document_id}: {result['error']}")
+
+    run_pool(pending_documents(verify), record, workers)
+    return counts
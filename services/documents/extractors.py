@@ -0,0 +1,89 @@
+import hashlib
+import os
+import zipfile
+from xml.etree import ElementTree
+
+# Runs in the extraction pool's processes, which are spawned without Django
+# set up: nothing here may import models or settings
+
+try:
+    import pypdf
+except ImportError:  # pragma: no cover - pypdf is optional
+    pypdf = None
+
+TEXT_EXTENSIONS = ('.txt', '.csv', '.md')
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _docx_text(path, max_bytes):
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo('word/document.xml')
+        if info.file_size > max_bytes:
+            raise ValueError('document.xml is too large')
+        paragraphs, current = [], []
+        with archive.open(info) as stream:
+            for _, element in ElementTree.iterparse(stream):
+                if element.tag == f'{WORD_NAMESPACE}t' and element.text:
+                    current.append(element.text)
+                elif element.tag == f'{WORD_NAMESPACE}p':
+                    paragraphs.append(''.join(current))
+                    current = []
+                    element.clear()
+    return '\n'.join(paragraphs)
+
+
+def _pdf_text(path):
+    reader = pypdf.PdfReader(path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def extract_file(path, known_sha256=None, max_bytes=None, max_chars=None):
+    """
+    Runs in a pool process. Returns a dict with sha256 and status, plus
+    text for a changed file; status 'unchanged' when the hash matches
+    `known_sha256`, so unchanged files are never parsed again.
+    """
+    try:
+        size = os.path.getsize(path)
+        if max_bytes is not None and size > max_bytes:
+            return {'sha256': '', 'status': 'failed', 'error': f'File is larger than {max_bytes} bytes'}
+        sha256 = _file_sha256(path)
+    except OSError as e:
+        return {'sha256': '', 'status': 'failed', 'error': str(e)[:255]}
+    if sha256 == known_sha256:
+        return {'sha256': sha256, 'status': 'unchanged'}
+
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.docx' or (extension not in TEXT_EXTENSIONS and zipfile.is_zipfile(path)):
+            text = _docx_text(path, max_bytes or size * 20)
+        elif extension == '.pdf':
+            if pypdf is None:
+                return {'sha256': sha256, 'status': 'unsupported', 'error': 'pypdf is not installed'}
+            text = _pdf_text(path)
+        elif extension in TEXT_EXTENSIONS:
+            with open(path, 'rb') as handle:
+                text = handle.read().decode('utf-8', errors='replace')
+        else:
+            return {'sha256': sha256, 'status': 'unsupported', 'error': f'No text extractor for {extension!r} files'}
+    except (KeyError, ValueError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+        return {'sha256': sha256, 'status': 'failed', 'error': str(e)[:255]}
+    except Exception as e:  # third-party parsers raise anything on a damaged file
+        return {'sha256': sha256, 'status': 'failed', 'error': f'{type(e).__name__}: {e}'[:255]}
+    if max_chars is not None:
+        text = text[:max_chars]
+    return {'sha256': sha256, 'status': 'indexed', 'text': text}
+
+
+def lower_priority(niceness):
+    # Pool processes yield the CPU to web workers on the same host
+    if niceness and hasattr(os, 'nice'):
+        os.nice(niceness)
@@ -0,0 +1,76 @@
+import re
+from collections import Counter
+
+from django.db.models import Count, Sum
+
+from ..models import Document, DocumentTerm
+
+TERM_PATTERN = re.compile(r'\w+')
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 40
+MAX_QUERY_TERMS = 10
+SNIPPET_CHARS = 160
+
+
+def tokenize(text):
+    """Lower-cased word terms of `text`, in order"""
+    return [
+        term for term in TERM_PATTERN.findall(text.lower())
+        if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH
+    ]
+
+
+def index_document(document_id, text):
+    """Replace the index terms of one document with those of `text`"""
+    DocumentTerm.objects.filter(document_id=document_id).delete()
+    DocumentTerm.objects.bulk_create([
+        DocumentTerm(document_id=document_id, term=term, frequency=frequency)
+        for term, frequency in Counter(tokenize(text)).items()
+    ], batch_size=1000)
+
+
+def snippet(text, terms):
+    """Text around the first occurrence of any of `terms`"""
+    lowered = text.lower()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    start = max(min(positions, default=0) - SNIPPET_CHARS // 4, 0)
+    excerpt = ' '.join(text[start:start + SNIPPET_CHARS].split())
+    return ('...' if start else '') + excerpt + ('...' if start + SNIPPET_CHARS < len(text) else '')
+
+
+def search_documents(tenders, query, limit=20):
+    """
+    Documents of the `tenders` queryset containing every term of `query`,
+    best match (most occurrences) first. Raises ValueError for a query
+    without searchable terms.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        raise ValueError('Query has no searchable terms')
+    matches = list(
+        DocumentTerm.objects.filter(term__in=terms, document__tender__in=tenders)
+        .values('document_id')
+        .annotate(matched=Count('term'), score=Sum('frequency'))
+        .filter(matched=len(terms))
+        .order_by('-score', '-document_id')[:limit]
+    )
+    rows = Document.objects.filter(pk__in=[match['document_id'] for match in matches]).values(
+        'document_id', 'tender_id', 'tender__reference_number', 'tender__tender_name',
+        'document_type', 'description', 'file', 'text__text',
+    )
+    documents = {row['document_id']: row for row in rows}
+    results = []
+    for match in matches:
+        row = documents[match['document_id']]
+        results.append({
+            'document_id': row['document_id'],
+            'tender_id': row['tender_id'],
+            'reference_number': row['tender__reference_number'],
+            'tender_name': row['tender__tender_name'],
+            'document_type': row['document_type'],
+            'description': row['description'],
+            'file': row['file'],
+            'score': match['score'],
+            'snippet': snippet(row['text__text'] or '', terms),
+        })
+    return results
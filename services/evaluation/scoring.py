@@ -0,0 +1,228 @@
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import BidScore, ChangeVersion, Document, EvaluationCriterion
+from ..tender.versioning import bump_versions
+
+# With at least MIN_EVALUATORS_TO_TRIM scores on a bid and criterion, the
+# highest and lowest TRIM_FRACTION of them (at least one each) are dropped
+TRIM_FRACTION = 0.1
+MIN_EVALUATORS_TO_TRIM = 5
+
+# Tenders whose evaluation is kept in memory per process
+CACHE_SIZE = 256
+
+# Scores saved up to this long after a sync started are re-read by the next
+SYNC_OVERLAP = timedelta(minutes=1)
+
+CLOSED_STATUSES = ('awarded', 'closed')
+
+
+def scores_scope(tender_id):
+    # Bumped by score upserts: re-read the recently updated scores
+    return ('bid_scores', tender_id)
+
+
+def evaluation_scope(tender_id):
+    # Bumped when criteria, bids or scores are removed: rebuild from scratch
+    return ('bid_evaluation', tender_id)
+
+
+def trimmed_mean(values):
+    """Mean of `values` without their outliers; `values` must be sorted"""
+    count = len(values)
+    if count >= MIN_EVALUATORS_TO_TRIM:
+        trim = max(1, int(count * TRIM_FRACTION))
+        values = values[trim:count - trim]
+    return sum(values) / len(values)
+
+
+class TenderEvaluation:
+    """
+    Ranking state of one tender. Every (bid, criterion) cell keeps its
+    evaluators' normalised scores (score / max_score) and their trimmed
+    mean, and every bid its weighted total, so a changed score costs one
+    cell and one total instead of the whole bids x criteria x evaluators
+    matrix.
+    """
+
+    def __init__(self, tender_id):
+        self.tender_id = tender_id
+        # Held while syncing and ranking, so one tender's reload never waits on another's
+        self.lock = threading.Lock()
+        self.versions = None
+        self.synced_at = None
+        self.criteria = {}  # criterion_id -> (name, weight, max_score)
+        self.bids = {}  # bid_id -> (uploader_id, description)
+        self.cells = defaultdict(dict)  # (bid_id, criterion_id) -> {evaluator_id: normalised score}
+        self.means = {}  # (bid_id, criterion_id) -> trimmed mean
+        self.totals = {}  # bid_id -> weighted score in [0, 1]
+        self.rows = {}  # bid_id -> its ranking entry, dropped when a score changes
+
+    def load(self):
+        self.criteria = {
+            criterion_id: (name, weight, max_score)
+            for criterion_id, name, weight, max_score in EvaluationCriterion.objects.filter(
+                tender_id=self.tender_id
+            ).order_by('criterion_id').values_list('criterion_id', 'name', 'weight', 'max_score')
+        }
+        self.bids = {
+            bid_id: (uploader_id, description)
+            for bid_id, uploader_id, description in Document.objects.filter(
+                tender_id=self.tender_id, document_type='bid'
+            ).values_list('document_id', 'uploader_id', 'description')
+        }
+        self.cells.clear()
+        self.means.clear()
+        self.rows.clear()
+        self.totals = dict.fromkeys(self.bids, 0.0)
+        self.apply(BidScore.objects.filter(criterion__tender_id=self.tender_id))
+
+    def apply(self, scores):
+        """Fold (new or changed) score rows into the cells they belong to"""
+        touched = set()
+        for bid_id, criterion_id, evaluator_id, score in scores.values_list(
+            'bid_id', 'criterion_id', 'evaluator_id', 'score'
+        ):
+            if bid_id in self.bids and criterion_id in self.criteria:
+                self.cells[bid_id, criterion_id][evaluator_id] = score / self.criteria[criterion_id][2]
+                touched.add((bid_id, criterion_id))
+        for cell in touched:
+            self.means[cell] = trimmed_mean(sorted(self.cells[cell].values()))
+        for bid_id in {bid_id for bid_id, _ in touched}:
+            self.totals[bid_id] = self.total(bid_id)
+            self.rows.pop(bid_id, None)
+
+    def total(self, bid_id):
+        weights = sum(weight for _, weight, _ in self.criteria.values())
+        if not weights:
+            return 0.0
+        return sum(
+            weight * self.means.get((bid_id, criterion_id), 0.0)
+            for criterion_id, (_, weight, _) in self.criteria.items()
+        ) / weights
+
+    def row(self, bid_id):
+        row = self.rows.get(bid_id)
+        if row is None:
+            uploader_id, description = self.bids[bid_id]
+            evaluators = set()
+            for criterion_id in self.criteria:
+                evaluators.update(self.cells.get((bid_id, criterion_id), ()))
+            row = self.rows[bid_id] = {
+                'bid_id': bid_id,
+                'uploader_id': uploader_id,
+                'description': description,
+                'score': round(self.totals[bid_id] * 100, 2),
+                'criteria': {
+                    name: round(self.means[bid_id, criterion_id] * 100, 2)
+                    if (bid_id, criterion_id) in self.means else None
+                    for criterion_id, (name, _, _) in self.criteria.items()
+                },
+                'evaluators': len(evaluators),
+            }
+        return row
+
+    def ranking(self):
+        """Bids best first, scores on a 0-100 scale"""
+        ranked = sorted(self.bids, key=lambda bid_id: (-self.totals[bid_id], bid_id))
+        return [{'rank': position, **self.row(bid_id)} for position, bid_id in enumerate(ranked, 1)]
+
+
+class EvaluationCache:
+    """
+    Per-process LRU of TenderEvaluation. Reading a ranking costs one
+    change_versions query when nothing changed; after score upserts only
+    the scores updated since the last sync are re-read. The cache lock
+    only guards the LRU; queries run under the entry's own lock.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def ranking(self, tender_id):
+        scopes = {scores_scope(tender_id): 0, evaluation_scope(tender_id): 0}
+        rows = ChangeVersion.objects.filter(
+            Q(scope='bid_scores', scope_id=tender_id) | Q(scope='bid_evaluation', scope_id=tender_id)
+        ).values_list('scope', 'scope_id', 'version')
+        scopes.update({(scope, scope_id): version for scope, scope_id, version in rows})
+        versions = (scopes[evaluation_scope(tender_id)], scopes[scores_scope(tender_id)])
+
+        with self._lock:
+            entry = self._entries.get(tender_id)
+            if entry is None:
+                entry = self._entries[tender_id] = TenderEvaluation(tender_id)
+                if len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(tender_id)
+
+        with entry.lock:
+            if entry.versions != versions:
+                started = timezone.now()
+                if entry.versions is None or entry.versions[0] != versions[0]:
+                    entry.load()
+                else:
+                    entry.apply(BidScore.objects.filter(
+                        criterion__tender_id=tender_id, updated_at__gte=entry.synced_at - SYNC_OVERLAP
+                    ))
+                entry.versions, entry.synced_at = versions, started
+            return entry.ranking()
+
+
+evaluations = EvaluationCache()
+
+
+def submit_scores(tender, bid, evaluator, scores):
+    """
+    Create or replace `evaluator`'s scores for one bid from a list of
+    {'criterion_id', 'score', 'comments'}. Raises ValueError on a bad
+    criterion or a score outside [0, max_score].
+    """
+    if tender.status in CLOSED_STATUSES:
+        raise ValueError('Scoring is closed once a tender is awarded or closed')
+    criteria = dict(
+        EvaluationCriterion.objects.filter(tender=tender).values_list('criterion_id', 'max_score')
+    )
+    values = {}
+    for item in scores:
+        criterion_id = item.get('criterion_id')
+        if criterion_id not in criteria:
+            raise ValueError(f'Unknown criterion {criterion_id!r} for this tender')
+        try:
+            score = float(item.get('score'))
+        except (TypeError, ValueError):
+            raise ValueError(f'Score for criterion {criterion_id} must be a number')
+        if not 0 <= score <= criteria[criterion_id]:
+            raise ValueError(f'Score for criterion {criterion_id} must be between 0 and {criteria[criterion_id]}')
+        values[criterion_id] = (score, item.get('comments'))
+    if not values:
+        raise ValueError('No scores given')
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            row.criterion_id: row
+            for row in BidScore.objects.filter(bid=bid, evaluator=evaluator, criterion_id__in=values)
+        }
+        for criterion_id, row in existing.items():
+            row.score, row.comments = values[criterion_id]
+            row.updated_at = now
+        BidScore.objects.bulk_update(existing.values(), ['score', 'comments', 'updated_at'])
+        BidScore.objects.bulk_create([
+            BidScore(bid=bid, criterion_id=criterion_id, evaluator=evaluator, score=score, comments=comments,
+                     updated_at=now)
+            for criterion_id, (score, comments) in values.items() if criterion_id not in existing
+        ])
+        bump_versions([scores_scope(tender.tender_id)])
+    return len(values)
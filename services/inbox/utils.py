@@ -0,0 +1,152 @@
+import base64
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import InboxCounter, InboxItem, Tender
+
+# Tender statuses that wait on an assigned manager (approve or send back,
+# award or close); each has a same-named InboxCounter column
+ACTIONABLE_STATUSES = ('in_review', 'submitted')
+
+
+def _adjust_counters(deltas):
+    """Apply {user_id: Counter(status -> delta)}, one UPDATE per distinct delta"""
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        delta = tuple(sorted((status, n) for status, n in delta.items() if n))
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        changes = {status: F(status) + n for status, n in delta}
+        if InboxCounter.objects.filter(user_id__in=user_ids).update(**changes) == len(user_ids):
+            continue
+        existing = set(InboxCounter.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        for user_id in set(user_ids) - existing:
+            try:
+                with transaction.atomic():
+                    InboxCounter.objects.create(user_id=user_id, **dict(delta))
+            except IntegrityError:
+                # Created concurrently, after our UPDATE; apply the delta to it
+                InboxCounter.objects.filter(user_id=user_id).update(**changes)
+
+
+def sync_tender_inbox(tender, assignee_ids=None):
+    """
+    Bring the inbox rows of one tender in line with its status and
+    assignees, adjusting the counters of every user whose inbox changed.
+    """
+    if tender.status in ACTIONABLE_STATUSES:
+        if assignee_ids is None:
+            assignee_ids = tender.assigned_to.values_list('user_id', flat=True)
+        wanted = set(assignee_ids)
+    else:
+        wanted = set()
+
+    current = dict(InboxItem.objects.filter(tender_id=tender.pk).values_list('user_id', 'status'))
+    if not current and not wanted:
+        return
+    with transaction.atomic():
+        deltas = defaultdict(Counter)
+        removed = set(current) - wanted
+        changed = {user_id for user_id in wanted & set(current) if current[user_id] != tender.status}
+        added = wanted - set(current)
+
+        if removed:
+            InboxItem.objects.filter(tender_id=tender.pk, user_id__in=removed).delete()
+        if changed:
+            InboxItem.objects.filter(tender_id=tender.pk, user_id__in=changed).update(
+                status=tender.status, queued_at=timezone.now()
+            )
+        if added:
+            now = timezone.now()
+            InboxItem.objects.bulk_create([
+                InboxItem(user_id=user_id, tender_id=tender.pk, status=tender.status, queued_at=now)
+                for user_id in added
+            ])
+        for user_id in removed | changed:
+            deltas[user_id][current[user_id]] -= 1
+        for user_id in changed | added:
+            deltas[user_id][tender.status] += 1
+        _adjust_counters(deltas)
+
+
+def remove_tender_from_inboxes(tender_id):
+    with transaction.atomic():
+        current = list(InboxItem.objects.filter(tender_id=tender_id).values_list('user_id', 'status'))
+        if not current:
+            return
+        InboxItem.objects.filter(tender_id=tender_id).delete()
+        _adjust_counters({user_id: Counter({status: -1}) for user_id, status in current})
+
+
+def rebuild_inboxes(log=None):
+    """Recompute every inbox and counter from the tenders (backfill or repair)"""
+    log = log or (lambda message: None)
+    Assignment = Tender.assigned_to.through
+    rows = Assignment.objects.filter(tender__status__in=ACTIONABLE_STATUSES).values_list(
+        'user_id', 'tender_id', 'tender__status', 'tender__updated_at'
+    )
+    with transaction.atomic():
+        InboxItem.objects.all().delete()
+        InboxCounter.objects.all().delete()
+        items, counts = [], defaultdict(Counter)
+        for user_id, tender_id, status, updated_at in rows.iterator(chunk_size=2000):
+            items.append(InboxItem(user_id=user_id, tender_id=tender_id, status=status, queued_at=updated_at))
+            counts[user_id][status] += 1
+        InboxItem.objects.bulk_create(items, batch_size=1000)
+        InboxCounter.objects.bulk_create([
+            InboxCounter(user_id=user_id, **count)
+            for user_id, count in counts.items()
+        ], batch_size=1000)
+    log(f'{len(items)} inbox item(s) for {len(counts)} user(s)')
+    return len(items)
+
+
+def encode_inbox_cursor(queued_at, item_id):
+    raw = f"{queued_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_inbox_cursor(cursor):
+    """(queued_at, item_id) from a cursor; ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        queued_at, item_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(queued_at), int(item_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def inbox_page(user, status=None, cursor=None, limit=50):
+    """Newest-first inbox entries for `user` as (entries, next_cursor)"""
+    items = InboxItem.objects.filter(user=user)
+    if status is not None:
+        items = items.filter(status=status)
+    if cursor:
+        queued_at, item_id = decode_inbox_cursor(cursor)
+        items = items.filter(Q(queued_at__lt=queued_at) | Q(queued_at=queued_at, id__lt=item_id))
+    rows = list(
+        items.order_by('-queued_at', '-id').values_list(
+            'id', 'queued_at', 'status', 'tender_id', 'tender__tender_name',
+            'tender__reference_number', 'tender__deadline',
+        )[:limit + 1]
+    )
+    next_cursor = encode_inbox_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+    return [
+        {
+            'tender_id': tender_id, 'tender_name': name, 'reference_number': reference,
+            'status': status, 'deadline': deadline, 'queued_at': queued_at,
+        }
+        for _, queued_at, status, tender_id, name, reference, deadline in rows[:limit]
+    ], next_cursor
+
+
+def inbox_counts(user):
+    counter = InboxCounter.objects.filter(user=user).values(*ACTIONABLE_STATUSES).first()
+    counts = {status: (counter or {}).get(status, 0) for status in ACTIONABLE_STATUSES}
+    counts['total'] = sum(counts.values())
+    return counts
@@ -0,0 +1,42 @@
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .utils import ACTIONABLE_STATUSES, inbox_counts, inbox_page
+
+MAX_LIMIT = 200
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def inbox(request):
+    """Tenders waiting on the current user, newest first, with per-status counts"""
+    tender_status = request.query_params.get('status')
+    if tender_status is not None and tender_status not in ACTIONABLE_STATUSES:
+        return Response({
+            'message': f"status must be one of: {', '.join(ACTIONABLE_STATUSES)}",
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_LIMIT:
+        return Response({
+            'message': f'limit must be between 1 and {MAX_LIMIT}',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        entries, next_cursor = inbox_page(request.user, tender_status, request.query_params.get('cursor'), limit)
+    except ValueError:
+        return Response({
+            'message': 'Invalid cursor',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'counts': inbox_counts(request.user),
+        'results': entries,
+        'next_cursor': next_cursor
+    })
@@ -0,0 +1,156 @@
+import logging
+import random
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import Job
+
+logger = logging.getLogger('services.jobs')
+
+Task = namedtuple('Task', 'func max_attempts priority')
+
+# name -> Task, filled by @task as the modules defining tasks are imported
+TASKS = {}
+
+
+def jobs_setting(name, default):
+    return getattr(settings, 'JOBS', {}).get(name, default)
+
+
+def task(name, max_attempts=None, priority=0):
+    """Register a function as task `name`; it is called with the job's payload as keyword arguments"""
+    def decorator(func):
+        TASKS[name] = Task(func, max_attempts, priority)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=None, run_at=None, delay=None):
+    """
+    Queue task `name` with a JSON-serialisable `payload`. The row is written
+    in the caller's transaction, so a rolled-back request queues nothing.
+    `run_at` or `delay` (seconds) schedule it for later; higher priorities
+    run first.
+    """
+    spec = TASKS.get(name)
+    if spec is None:
+        raise ValueError(f'Unknown task {name!r}')
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        task=name,
+        payload=payload or {},
+        priority=spec.priority if priority is None else priority,
+        run_at=run_at,
+        max_attempts=spec.max_attempts or jobs_setting('MAX_ATTEMPTS', 5),
+    )
+
+
+def ready_jobs(now):
+    return Job.objects.filter(status='queued', run_at__lte=now).order_by('-priority', 'run_at', 'job_id')
+
+
+def claim_jobs(worker, limit=1):
+    """
+    Take up to `limit` ready jobs for `worker`. Where the database has
+    SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL, MySQL 8) concurrent
+    workers lock disjoint rows without waiting on each other; elsewhere
+    (SQLite) a conditional UPDATE per candidate decides who gets a job.
+    """
+    now = timezone.now()
+    claimed = {'status': 'running', 'locked_by': worker, 'locked_at': now, 'attempts': F('attempts') + 1}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(ready_jobs(now).select_for_update(skip_locked=True)[:limit])
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(**claimed)
+    else:
+        jobs = []
+        for job in ready_jobs(now)[:limit * 2]:
+            if Job.objects.filter(pk=job.pk, status='queued').update(**claimed):
+                jobs.append(job)
+                if len(jobs) == limit:
+                    break
+    for job in jobs:
+        job.status, job.locked_by, job.locked_at = 'running', worker, now
+        job.attempts += 1
+    return jobs
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`: doubling from BACKOFF_SECONDS, capped, with jitter"""
+    delay = min(jobs_setting('BACKOFF_SECONDS', 30) * 2 ** (attempts - 1), jobs_setting('MAX_BACKOFF_SECONDS', 3600))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def run_job(job):
+    """Run one claimed job, then mark it done, schedule its retry or give up on it"""
+    spec = TASKS.get(job.task)
+    owned = Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by)
+    try:
+        if spec is None:
+            raise LookupError(f'Unknown task {job.task!r}')
+        spec.func(**job.payload)
+    except Exception as e:
+        now = timezone.now()
+        error = f'{type(e).__name__}: {e}'
+        if job.attempts >= job.max_attempts:
+            logger.exception('Job %s (%s) failed for good after %s attempts', job.pk, job.task, job.attempts)
+            job.status = 'failed'
+            owned.update(status='failed', last_error=error, locked_by='', locked_at=None, finished_at=now)
+        else:
+            logger.warning('Job %s (%s) failed, retrying: %s', job.pk, job.task, error)
+            job.status = 'queued'
+            owned.update(status='queued', last_error=error, locked_by='', locked_at=None,
+                         run_at=now + timedelta(seconds=backoff(job.attempts)))
+        job.last_error = error
+        return job
+    job.status = 'done'
+    owned.update(status='done', locked_by='', locked_at=None, finished_at=timezone.now())
+    return job
+
+
+def work(worker, batch_size=None, stop=None, log=None):
+    """Claim and run ready jobs until none is left (or `stop` is set); returns how many ran"""
+    batch_size = batch_size or jobs_setting('BATCH_SIZE', 1)
+    log = log or (lambda message: None)
+    count = 0
+    while stop is None or not stop.is_set():
+        jobs = claim_jobs(worker, batch_size)
+        if not jobs:
+            break
+        for job in jobs:
+            run_job(job)
+            count += 1
+            log(f'{job.task} #{job.pk}: {job.status}')
+    return count
+
+
+def requeue_stale_jobs(now=None):
+    """
+    Release jobs whose worker died: running for over LOCK_SECONDS, which
+    must exceed the longest task. Those out of attempts fail instead.
+    Returns how many were released.
+    """
+    now = now or timezone.now()
+    stale = Job.objects.filter(
+        status='running', locked_at__lt=now - timedelta(seconds=jobs_setting('LOCK_SECONDS', 600))
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', last_error='Worker stopped while running the job', locked_by='', locked_at=None,
+        finished_at=now
+    )
+    return failed + stale.update(status='queued', locked_by='', locked_at=None, run_at=now)
+
+
+def prune_jobs(now=None):
+    """Forget jobs done over KEEP_SECONDS ago; failed ones stay for inspection. Returns how many"""
+    now = now or timezone.now()
+    deleted, _ = Job.objects.filter(
+        status='done', finished_at__lt=now - timedelta(seconds=jobs_setting('KEEP_SECONDS', 7 * 86400))
+    ).delete()
+    return deleted
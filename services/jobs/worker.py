@@ -0,0 +1,72 @@
+import logging
+import os
+import socket
+import threading
+
+from django.db import DatabaseError, close_old_connections
+
+logger = logging.getLogger('services.jobs')
+
+# Nothing here imports models at module level: worker processes are
+# spawned and must set Django up before the queue can be imported.
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+
+
+def work_loop(batch_size, interval, once, stop, log):
+    from .queue import work
+
+    while not stop.is_set():
+        # Each thread keeps its own connection, recycled like a request's
+        close_old_connections()
+        try:
+            work(worker_name(), batch_size, stop, log)
+        except DatabaseError:
+            # A dropped connection or lock timeout must not end the thread;
+            # jobs it had claimed are released after LOCK_SECONDS
+            logger.warning('Job worker hit a database error, retrying', exc_info=True)
+        else:
+            if once:
+                return
+        finally:
+            close_old_connections()
+        stop.wait(interval)
+
+
+def serve(threads, batch_size, interval, once, stop, log=None):
+    """
+    Run jobs on `threads` threads of this process until `stop` is set, or
+    until the queue is empty with `once`. The calling thread releases
+    stale jobs and prunes old ones between polls.
+    """
+    from .queue import prune_jobs, requeue_stale_jobs
+
+    log = log or (lambda message: None)
+    requeue_stale_jobs()
+    pool = [
+        threading.Thread(target=work_loop, args=(batch_size, interval, once, stop, log), name=f'jobs-{index}')
+        for index in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    try:
+        while not once and not stop.wait(interval):
+            requeue_stale_jobs()
+            prune_jobs()
+    except KeyboardInterrupt:
+        # Let running jobs finish rather than leave them for LOCK_SECONDS
+        stop.set()
+    finally:
+        for thread in pool:
+            thread.join()
+        close_old_connections()
+
+
+def serve_process(threads, batch_size, interval, once, stop):
+    """Entry point of a spawned worker process"""
+    import django
+
+    django.setup()
+    serve(threads, batch_size, interval, once, stop)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from services.audit.archive import archivable_months, archive_audit_logs
+
+
+class Command(BaseCommand):
+    help = 'Move audit_logs months older than the retention window into compressed JSONL archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, help="Defaults to AUDIT_LOG['RETENTION_DAYS']")
+        parser.add_argument('--batch-size', type=int, help='Rows read and deleted per statement')
+        parser.add_argument('--codec', choices=['zst', 'gz'], help="Defaults to AUDIT_LOG['CODEC']")
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months that would be archived')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            months = archivable_months(options['retention_days'])
+            for month in months:
+                self.stdout.write(f'{month:%Y-%m}')
+            self.stdout.write(f'{len(months)} month(s) to archive')
+            return
+        try:
+            archives = archive_audit_logs(
+                retention_days=options['retention_days'],
+                batch_size=options['batch_size'],
+                codec=options['codec'],
+                log=self.stdout.write,
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        rows = sum(archive.row_count for archive in archives)
+        self.stdout.write(self.style.SUCCESS(f'Archived {rows} row(s) into {len(archives)} file(s)'))
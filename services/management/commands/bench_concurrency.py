@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services.benchmark.concurrency import DEPLOYMENTS, ENDPOINTS, ConcurrencyBenchmark
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput, threads and memory per in-flight request across WSGI and ASGI deployments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', default='detail', choices=list(ENDPOINTS))
+        parser.add_argument('--concurrency', default='1,10,50', help='Comma separated in-flight levels')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per deployment and level')
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=0.0,
+            help='Delay added to every query to emulate a networked database'
+        )
+        parser.add_argument(
+            '--deployments', default=','.join(DEPLOYMENTS),
+            help=f"Comma separated subset of: {', '.join(DEPLOYMENTS)}"
+        )
+        parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+
+    def handle(self, *args, **options):
+        deployments = [name.strip() for name in options['deployments'].split(',') if name.strip()]
+        unknown = set(deployments) - set(DEPLOYMENTS)
+        if unknown:
+            raise CommandError(f"Unknown deployments: {', '.join(sorted(unknown))}")
+        try:
+            benchmark = ConcurrencyBenchmark(
+                endpoint=options['endpoint'],
+                levels=[int(level) for level in options['concurrency'].split(',')],
+                requests=options['requests'],
+                db_latency_ms=options['db_latency_ms'],
+                deployments=deployments,
+                log=None if options['json'] else self.stdout.write,
+            )
+            results = benchmark.run()
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from services.benchmark.encoding import benchmark_encoding
+
+
+class Command(BaseCommand):
+    help = 'Measure JSON encode/decode throughput on a synthetic tender list payload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenders', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+
+    def handle(self, *args, **options):
+        results = benchmark_encoding(options['tenders'], options['repeat'])
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{results['tenders']} tenders, orjson available: {results['orjson']}")
+        for label, codec in results['codecs'].items():
+            self.stdout.write(
+                f"{label:<7} {codec['bytes'] / 1e6:.1f}MB  encode {codec['encode_ms']:>8.1f}ms "
+                f"({codec['encode_mb_s']} MB/s)  decode {codec['decode_ms']:>8.1f}ms ({codec['decode_mb_s']} MB/s)"
+            )
+        self.stdout.write(
+            f"speedup: encode x{results['encode_speedup']}, decode x{results['decode_speedup']}, "
+            f"byte-identical output: {results['identical']}"
+        )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from services.benchmark.runner import (
+    BenchmarkRunner, compare_to_baseline, load_baseline, save_baseline
+)
+from services.benchmark.scenarios import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Run benchmark scenarios and optionally save or compare against a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help=f"Comma separated subset of: {', '.join(SCENARIOS)}"
+        )
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--save-baseline', metavar='PATH')
+        parser.add_argument('--compare', metavar='PATH', help='Baseline JSON to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 growth (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        try:
+            runner = BenchmarkRunner(
+                scenarios=[name.strip() for name in options['scenarios'].split(',') if name.strip()],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                seed=options['seed'],
+                log=self.stdout.write,
+            )
+            results = runner.run()
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+
+        if options['save_baseline']:
+            save_baseline(results, options['save_baseline'])
+            self.stdout.write(f"Baseline saved to {options['save_baseline']}")
+
+        if options['compare']:
+            regressions = compare_to_baseline(results, load_baseline(options['compare']), options['tolerance'])
+            for name, metric, old, new in regressions:
+                self.stdout.write(self.style.ERROR(f'{name}: {metric} regressed {old} -> {new}'))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from services.benchmark.generator import DatasetGenerator, flush_dataset
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic benchmark dataset of roughly --scale rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=10_000, help='Approximate total rows (10k-5M)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--flush', action='store_true', help='Remove an existing benchmark dataset first')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            flush_dataset(log=self.stdout.write)
+        generator = DatasetGenerator(
+            scale=options['scale'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        plan = generator.generate()
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded ' + ', '.join(f'{count} {name}' for name, count in plan.items())
+        ))
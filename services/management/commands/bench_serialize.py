@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from services.benchmark.serialization import benchmark_serialization
+
+
+class Command(BaseCommand):
+    help = 'Compare TenderSerializer with the values() projection on seeded tenders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', default='100,1000,10000')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+        for result in benchmark_serialization(page_sizes, options['repeat']):
+            self.stdout.write(
+                f"{result['page_size']:>6} tenders  serializer {result['serializer_ms']:>8.1f}ms  "
+                f"projection {result['projection_ms']:>8.1f}ms  x{result['speedup']}  "
+                f"identical: {result['identical']}"
+            )
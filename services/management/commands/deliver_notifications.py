@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from services.notifications.utils import fan_out_events, notification_setting, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Fan queued tender events out to in-app notifications and email the due digests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process what is queued, then exit')
+        parser.add_argument('--batch-size', type=int, default=None, help='Events fanned out per transaction')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds between polls')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or notification_setting('POLL_SECONDS', 5)
+        while True:
+            events = 0
+            while True:
+                processed = fan_out_events(options['batch_size'])
+                events += processed
+                if not processed:
+                    break
+            emails = send_digests()
+            if events or emails:
+                self.stdout.write(f'{events} event(s) fanned out, {emails} digest(s) sent')
+            if options['once']:
+                return
+            time.sleep(interval)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from services.documents.extraction import extract_documents
+from services.matching.profiles import extract_cvs
+
+
+class Command(BaseCommand):
+    help = 'Extract and index the text of new or changed documents and CVs on a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process what is pending, then exit')
+        parser.add_argument('--interval', type=float, default=30, help='Seconds between polls')
+        parser.add_argument('--workers', type=int, default=None, help='Pool processes (0 extracts inline)')
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Re-hash every document on the first pass and re-extract those whose file changed'
+        )
+
+    def handle(self, *args, **options):
+        verify = options['verify']
+        while True:
+            for kind, extract in (('document', extract_documents), ('CV', extract_cvs)):
+                counts = extract(verify=verify, workers=options['workers'], log=self.stdout.write)
+                if counts:
+                    summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+                    self.stdout.write(f'{kind}s: {summary}')
+            if options['once']:
+                return
+            verify = False
+            time.sleep(options['interval'])
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from services.tender.idempotency import prune_idempotency_records
+
+
+class Command(BaseCommand):
+    help = 'Forget stored Idempotency-Key responses past their TTL'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{prune_idempotency_records()} idempotency record(s) pruned')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from services.auth.tokens import prune_used_tokens
+
+
+class Command(BaseCommand):
+    help = 'Forget spent verification and password-reset tokens that have expired'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{prune_used_tokens()} used token(s) pruned')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from services.inbox.utils import rebuild_inboxes
+
+
+class Command(BaseCommand):
+    help = 'Recompute every manager inbox and its counters from the current tenders'
+
+    def handle(self, *args, **options):
+        rebuild_inboxes(log=self.stdout.write)
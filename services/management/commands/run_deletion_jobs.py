@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from services.deletion.jobs import deletion_setting, run_deletion_jobs
+
+
+class Command(BaseCommand):
+    help = 'Delete queued companies and departments with their dependents, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs, then exit')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows deleted per transaction')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds between polls')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or deletion_setting('POLL_SECONDS', 5)
+        while True:
+            run_deletion_jobs(options['batch_size'], log=self.stdout.write)
+            if options['once']:
+                return
+            time.sleep(interval)
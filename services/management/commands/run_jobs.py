@@ -0,0 +1,45 @@
+import multiprocessing
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from services.jobs.queue import jobs_setting
+from services.jobs.worker import serve, serve_process
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs on a pool of processes and threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the ready jobs, then exit')
+        parser.add_argument('--processes', type=int, default=None, help='Worker processes (1 runs in this one)')
+        parser.add_argument('--threads', type=int, default=None, help='Worker threads per process')
+        parser.add_argument('--batch-size', type=int, default=None, help='Jobs claimed at a time per thread')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds between polls')
+
+    def handle(self, *args, **options):
+        processes = options['processes'] or jobs_setting('PROCESSES', 1)
+        threads = options['threads'] or jobs_setting('THREADS', 4)
+        interval = options['interval'] or jobs_setting('POLL_SECONDS', 1)
+        if processes == 1:
+            serve(threads, options['batch_size'], interval, options['once'], threading.Event(), log=self.stdout.write)
+            return
+
+        # Children open their own connections; spawn keeps them from inheriting ours
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        children = [
+            context.Process(target=serve_process, args=(threads, options['batch_size'], interval, options['once'], stop))
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for child in children:
+                child.join()
@@ -0,0 +1,159 @@
+import heapq
+import math
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.utils import timezone
+
+from ..models import CVProfile, CVTerm
+from ..tender.versioning import get_version
+from .profiles import CV_INDEX_SCOPE
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is optional
+    numpy = None
+
+# Profiles committed up to this long after a sync started are picked up by
+# the next one; re-applying a CV is harmless, missing one is not
+SYNC_OVERLAP = timedelta(minutes=1)
+
+LOAD_CHUNK = 500
+
+
+class CVIndex:
+    """
+    In-process inverted index over the term vectors of every active CV.
+    Each ranking first reads the cv_index change counter (one query) and,
+    when it moved, patches only the CVs re-extracted or (de)activated since
+    the previous sync. Scoring touches only the postings of the tender's
+    terms: with numpy each term is one vectorised add over a dense score
+    array, otherwise a dict accumulation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget everything; the next ranking reloads from the database"""
+        self.version = None
+        self.synced_at = None
+        self.postings = defaultdict(dict)  # term -> {cv_id: weight}
+        self.cv_terms = {}  # cv_id -> terms, to unlink a CV's postings
+        self.owners = {}  # cv_id -> user_id
+        self._rows = {}  # cv_id -> position in the dense score array
+        self._row_cvs = []
+        self._arrays = {}  # term -> (rows, weights), built lazily
+
+    def sync(self):
+        version, _ = get_version(*CV_INDEX_SCOPE)
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            started = timezone.now()
+            live = dict(
+                CVProfile.objects.filter(status='indexed', cv__is_active=True).values_list('cv_id', 'cv__user_id')
+            )
+            for cv_id in set(self.cv_terms) - set(live):
+                self._remove(cv_id)
+            if self.synced_at is None:
+                changed = set(live)
+            else:
+                recent = CVProfile.objects.filter(indexed_at__gte=self.synced_at - SYNC_OVERLAP)
+                changed = {cv_id for cv_id in recent.values_list('cv_id', flat=True) if cv_id in live}
+                changed |= set(live) - set(self.cv_terms)
+            self._load(sorted(changed), live)
+            self.version, self.synced_at = version, started
+
+    def _load(self, cv_ids, owners):
+        for start in range(0, len(cv_ids), LOAD_CHUNK):
+            chunk = cv_ids[start:start + LOAD_CHUNK]
+            vectors = defaultdict(dict)
+            for cv_id, term, weight in CVTerm.objects.filter(cv_id__in=chunk).values_list('cv_id', 'term', 'weight'):
+                vectors[cv_id][term] = weight
+            for cv_id in chunk:
+                self._remove(cv_id)
+                self._add(cv_id, owners[cv_id], vectors.get(cv_id, {}))
+
+    def _add(self, cv_id, user_id, vector):
+        self.owners[cv_id] = user_id
+        self.cv_terms[cv_id] = tuple(vector)
+        if cv_id not in self._rows:
+            self._rows[cv_id] = len(self._row_cvs)
+            self._row_cvs.append(cv_id)
+        for term, weight in vector.items():
+            self.postings[term][cv_id] = weight
+            self._arrays.pop(term, None)
+
+    def _remove(self, cv_id):
+        for term in self.cv_terms.pop(cv_id, ()):
+            posting = self.postings[term]
+            posting.pop(cv_id, None)
+            if not posting:
+                del self.postings[term]
+            self._arrays.pop(term, None)
+        self.owners.pop(cv_id, None)
+
+    def _term_arrays(self, term):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            posting = self.postings[term]
+            arrays = self._arrays[term] = (
+                numpy.fromiter((self._rows[cv_id] for cv_id in posting), dtype=numpy.int64, count=len(posting)),
+                numpy.fromiter(posting.values(), dtype=numpy.float64, count=len(posting)),
+            )
+        return arrays
+
+    def _top(self, query, user_ids, limit):
+        """The `limit` best [(cv_id, score)] sharing a term with `query`, owned by `user_ids`"""
+        if numpy is not None:
+            scores = numpy.zeros(len(self._row_cvs))
+            for term, weight in query.items():
+                rows, weights = self._term_arrays(term)
+                scores[rows] += weights * weight  # rows are unique within a posting
+            hits = numpy.flatnonzero(scores)
+            ranked = ((self._row_cvs[row], float(scores[row])) for row in hits[numpy.argsort(-scores[hits], kind='stable')])
+            if user_ids is None:
+                return list(islice(ranked, limit))
+            return list(islice(((cv_id, score) for cv_id, score in ranked if self.owners[cv_id] in user_ids), limit))
+        scores = defaultdict(float)
+        for term, weight in query.items():
+            for cv_id, cv_weight in self.postings[term].items():
+                scores[cv_id] += cv_weight * weight
+        candidates = scores.items()
+        if user_ids is not None:
+            candidates = [(cv_id, score) for cv_id, score in candidates if self.owners[cv_id] in user_ids]
+        return heapq.nlargest(limit, candidates, key=lambda item: item[1])
+
+    def rank(self, vector, user_ids=None, limit=20):
+        """
+        Best matching CVs for a term vector, as [(user_id, score, matched
+        terms)]: cosine similarity with IDF weighting on the query side.
+        `user_ids` restricts the candidates.
+        """
+        self.sync()
+        with self._lock:
+            total = len(self.cv_terms)
+            query = {
+                term: weight * (math.log((1 + total) / (1 + len(self.postings[term]))) + 1)
+                for term, weight in vector.items() if term in self.postings
+            }
+            norm = math.sqrt(sum(weight * weight for weight in query.values()))
+            if not norm:
+                return []
+            query = {term: weight / norm for term, weight in query.items()}
+            return [
+                (self.owners[cv_id], score, heapq.nlargest(
+                    5, (term for term in query if cv_id in self.postings[term]),
+                    key=lambda term: query[term] * self.postings[term][cv_id]
+                ))
+                for cv_id, score in self._top(query, user_ids, limit)
+            ]
+
+
+cv_index = CVIndex()
@@ -0,0 +1,84 @@
+import math
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..documents.extraction import run_pool
+from ..documents.search import tokenize
+from ..models import CV, CVProfile, CVTerm
+from ..tender.versioning import bump_versions
+
+CV_INDEX_SCOPE = ('cv_index', 0)
+
+# Terms kept per CV, by weight; the long tail adds index size, not ranking quality
+MAX_TERMS = 200
+
+STOPWORDS = frozenset('''
+    about above after again all also am an and any are as at be because been before being below between both
+    but by can could did do does doing down during each few for from further had has have having he her here
+    hers him his how if in into is it its itself just me more most my no nor not now of off on once only or
+    other our ours out over own same she should so some such than that the their theirs them then there these
+    they this those through to too under until up very was we were what when where which while who whom why
+    will with would you your yours cv curriculum vitae page email phone address name date years year
+'''.split())
+
+
+def term_vector(text):
+    """Sublinear TF, L2-normalised {term: weight} of the skills/keywords in `text`"""
+    counts = Counter(
+        term for term in tokenize(text)
+        if term not in STOPWORDS and not term.isdigit()
+    )
+    weights = {term: 1 + math.log(count) for term, count in counts.most_common(MAX_TERMS)}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+
+def tender_vector(tender):
+    # A few hundred characters: cheaper to vectorise per request than to store
+    category = tender.category.name if tender.category_id else ''
+    return term_vector(f"{tender.tender_name} {tender.description} {category}")
+
+
+def pending_cvs(verify=False):
+    """CVs never extracted or saved since their last extraction; with `verify`, all of them"""
+    cvs = CV.objects.all()
+    if not verify:
+        cvs = cvs.filter(Q(profile__isnull=True) | Q(updated_at__gt=F('profile__indexed_at')))
+    return cvs.order_by('cv_id').values_list('cv_id', 'file', 'profile__sha256')
+
+
+def save_profile(cv_id, result):
+    """Store one CV extraction result as its term vector"""
+    now = timezone.now()
+    if result['status'] == 'unchanged':
+        CVProfile.objects.filter(cv_id=cv_id).update(indexed_at=now)
+        return
+    with transaction.atomic():
+        CVProfile.objects.update_or_create(cv_id=cv_id, defaults={
+            'sha256': result['sha256'], 'status': result['status'],
+            'error': result.get('error', ''), 'indexed_at': now,
+        })
+        CVTerm.objects.filter(cv_id=cv_id).delete()
+        CVTerm.objects.bulk_create([
+            CVTerm(cv_id=cv_id, term=term, weight=weight)
+            for term, weight in term_vector(result.get('text', '')).items()
+        ])
+        bump_versions([CV_INDEX_SCOPE])
+
+
+def extract_cvs(verify=False, workers=None, log=None):
+    """Extract and vectorise every pending CV; returns {status: count}"""
+    log = log or (lambda message: None)
+    counts = {}
+
+    def record(cv_id, result):
+        save_profile(cv_id, result)
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        if result['status'] == 'failed':
+            log(f"CV {cv_id}: {result['error']}")
+
+    run_pool(pending_cvs(verify), record, workers)
+    return counts
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_alter_tendertimeline_award_date_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('tender', 'Tender'), ('department', 'Department'), ('company', 'Company'), ('global', 'Global')], max_length=20)),
+                ('scope_id', models.IntegerField()),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'change_versions',
+                'unique_together': {('scope', 'scope_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_referencesequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('part', models.PositiveIntegerField(default=1)),
+                ('path', models.CharField(max_length=255)),
+                ('codec', models.CharField(max_length=10)),
+                ('row_count', models.PositiveIntegerField()),
+                ('first_log_id', models.IntegerField()),
+                ('last_log_id', models.IntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'audit_archives',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp'], name='audit_logs_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['target_model', 'target_id', 'timestamp'], name='audit_logs_target_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='auditarchive',
+            unique_together={('month', 'part')},
+        ),
+    ]
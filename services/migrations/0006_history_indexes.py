@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0005_audit_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='approval',
+            index=models.Index(fields=['tender', 'created_at'], name='approvals_tender_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['tender', 'created_at'], name='documents_tender_created_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0006_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inbox_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('in_review', models.IntegerField(default=0)),
+                ('submitted', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'inbox_counters',
+            },
+        ),
+        migrations.CreateModel(
+            name='InboxItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('in_review', 'In Review'), ('approved', 'Approved'), ('submitted', 'Submitted'), ('awarded', 'Awarded'), ('closed', 'Closed')], max_length=20)),
+                ('queued_at', models.DateTimeField()),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to='services.tender')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'inbox_items',
+                'indexes': [models.Index(fields=['user', '-queued_at', '-id'], name='inbox_items_user_idx'), models.Index(fields=['user', 'status', '-queued_at', '-id'], name='inbox_items_user_status_idx')],
+                'unique_together': {('user', 'tender')},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0007_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationPreference',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_preference', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('digest', models.CharField(choices=[('immediate', 'Immediate'), ('hourly', 'Hourly'), ('daily', 'Daily'), ('off', 'Off')], default='immediate', max_length=10)),
+                ('last_digest_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'notification_preferences',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('event_id', models.AutoField(primary_key=True, serialize=False)),
+                ('previous_status', models.CharField(choices=[('draft', 'Draft'), ('in_review', 'In Review'), ('approved', 'Approved'), ('submitted', 'Submitted'), ('awarded', 'Awarded'), ('closed', 'Closed')], max_length=20, null=True)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('in_review', 'In Review'), ('approved', 'Approved'), ('submitted', 'Submitted'), ('awarded', 'Awarded'), ('closed', 'Closed')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='services.tender')),
+            ],
+            options={
+                'db_table': 'notification_events',
+            },
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('notification_id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('in_review', 'In Review'), ('approved', 'Approved'), ('submitted', 'Submitted'), ('awarded', 'Awarded'), ('closed', 'Closed')], max_length=20)),
+                ('message', models.CharField(max_length=255)),
+                ('event_count', models.PositiveIntegerField(default=1)),
+                ('email_state', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('skipped', 'Skipped')], default='pending', max_length=10)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField()),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='services.tender')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notifications',
+                'indexes': [models.Index(fields=['user', '-updated_at'], name='notifications_user_idx'), models.Index(fields=['email_state', 'user'], name='notifications_email_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0008_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text', serialize=False, to='services.document')),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('indexed', 'Indexed'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], max_length=20)),
+                ('text', models.TextField(blank=True)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('extracted_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'document_texts',
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40)),
+                ('frequency', models.PositiveIntegerField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='services.document')),
+            ],
+            options={
+                'db_table': 'document_terms',
+                'unique_together': {('term', 'document')},
+            },
+        ),
+    ]
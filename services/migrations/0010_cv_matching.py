@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0009_document_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVProfile',
+            fields=[
+                ('cv', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile', serialize=False, to='services.cv')),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('indexed', 'Indexed'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], max_length=20)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('indexed_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'cv_profiles',
+            },
+        ),
+        migrations.AlterField(
+            model_name='changeversion',
+            name='scope',
+            field=models.CharField(choices=[('tender', 'Tender'), ('department', 'Department'), ('company', 'Company'), ('global', 'Global'), ('cv_index', 'CV index')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='CVTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40)),
+                ('weight', models.FloatField()),
+                ('cv', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='services.cv')),
+            ],
+            options={
+                'db_table': 'cv_terms',
+                'unique_together': {('cv', 'term')},
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0010_cv_matching'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changeversion',
+            name='scope',
+            field=models.CharField(choices=[('tender', 'Tender'), ('department', 'Department'), ('company', 'Company'), ('global', 'Global'), ('cv_index', 'CV index'), ('bid_scores', 'Bid scores'), ('bid_evaluation', 'Bid evaluation')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='EvaluationCriterion',
+            fields=[
+                ('criterion_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('weight', models.FloatField()),
+                ('max_score', models.FloatField(default=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='criteria', to='services.tender')),
+            ],
+            options={
+                'db_table': 'evaluation_criteria',
+                'unique_together': {('tender', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='BidScore',
+            fields=[
+                ('score_id', models.AutoField(primary_key=True, serialize=False)),
+                ('score', models.FloatField()),
+                ('comments', models.TextField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField()),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='services.document')),
+                ('evaluator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bid_scores', to=settings.AUTH_USER_MODEL)),
+                ('criterion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='services.evaluationcriterion')),
+            ],
+            options={
+                'db_table': 'bid_scores',
+                'indexes': [models.Index(fields=['criterion', 'updated_at'], name='bid_scores_criterion_idx')],
+                'unique_together': {('bid', 'criterion', 'evaluator')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0011_bid_evaluation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changeversion',
+            name='scope',
+            field=models.CharField(choices=[('tender', 'Tender'), ('department', 'Department'), ('company', 'Company'), ('global', 'Global'), ('cv_index', 'CV index'), ('bid_scores', 'Bid scores'), ('bid_evaluation', 'Bid evaluation'), ('reference_data', 'Reference data')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0012_reference_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('job_id', models.AutoField(primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('company', 'Company'), ('department', 'Department')], max_length=20)),
+                ('target_id', models.IntegerField()),
+                ('target_name', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('step', models.CharField(blank=True, max_length=30)),
+                ('progress', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'deletion_jobs',
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='deletion_jobs_status_idx'), models.Index(fields=['target', 'target_id'], name='deletion_jobs_target_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0013_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsedToken',
+            fields=[
+                ('jti', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('purpose', models.CharField(max_length=20)),
+                ('used_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'used_tokens',
+            },
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='email_verification_token',
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0016_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tendertimeline',
+            index=models.Index(fields=['submission_start'], name='timelines_sub_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tendertimeline',
+            index=models.Index(fields=['submission_end'], name='timelines_sub_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tendertimeline',
+            index=models.Index(fields=['evaluation_start'], name='timelines_eval_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tendertimeline',
+            index=models.Index(fields=['evaluation_end'], name='timelines_eval_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tendertimeline',
+            index=models.Index(fields=['award_date'], name='timelines_award_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tendertimeline',
+            index=models.Index(fields=['project_start_date'], name='timelines_project_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tendertimeline',
+            index=models.Index(fields=['project_end_date'], name='timelines_project_end_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0017_timeline_milestone_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditarchive',
+            name='targets_indexed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='AuditArchiveTarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_model', models.CharField(max_length=50)),
+                ('target_id', models.IntegerField()),
+                ('archive', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='targets', to='services.auditarchive')),
+            ],
+            options={
+                'db_table': 'audit_archive_targets',
+                'indexes': [models.Index(fields=['target_model', 'target_id'], name='audit_archive_targets_idx')],
+                'unique_together': {('archive', 'target_model', 'target_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def reissue_verification(apps, schema_editor):
+    # Links emailed before 0014 carried the dropped email_verification_token;
+    # queue a signed one for every account still waiting to be verified
+    User = apps.get_model('services', 'User')
+    Job = apps.get_model('services', 'Job')
+    now = timezone.now()
+    Job.objects.bulk_create([
+        Job(task='auth.send_verification_email', payload={'user_id': user_id}, priority=10, run_at=now)
+        for user_id in User.objects.filter(is_active=False).values_list('pk', flat=True).iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0018_audit_archive_targets'),
+    ]
+
+    operations = [
+        migrations.RunPython(reissue_verification, migrations.RunPython.noop),
+    ]
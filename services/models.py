@@ -58,7 +58,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    email_verification_token = models.CharField(max_length=255, null=True, blank=True)
 
     # Add related_name to avoid clashes
     groups = models.ManyToManyField(
@@ -115,8 +114,24 @@ class TenderTimeline(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Milestone columns, in the order a tender reaches them
+    MILESTONES = (
+        'submission_start', 'submission_end', 'evaluation_start', 'evaluation_end', 'award_date',
+        'project_start_date', 'project_end_date',
+    )
+
     class Meta:
         db_table = 'tender_timelines'
+        # One per milestone, for the calendar's range queries
+        indexes = [
+            models.Index(fields=['submission_start'], name='timelines_sub_start_idx'),
+            models.Index(fields=['submission_end'], name='timelines_sub_end_idx'),
+            models.Index(fields=['evaluation_start'], name='timelines_eval_start_idx'),
+            models.Index(fields=['evaluation_end'], name='timelines_eval_end_idx'),
+            models.Index(fields=['award_date'], name='timelines_award_idx'),
+            models.Index(fields=['project_start_date'], name='timelines_project_start_idx'),
+            models.Index(fields=['project_end_date'], name='timelines_project_end_idx'),
+        ]
 
     def update_dates_based_on_status(self, status):
         """Update timeline dates based on tender status"""
@@ -174,16 +189,30 @@ class Tender(models.Model):
     def __str__(self):
         return f"{self.reference_number} - {self.tender_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the scopes the tender was loaded with, so moving it to
+        # another department/company invalidates the old scope as well
+        instance._loaded_scopes = (
+            instance.__dict__.get('required_department_id'),
+            instance.__dict__.get('company_id'),
+        )
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
+        creating = self._state.adding
         super().save(*args, **kwargs)
         
-        # Auto-assign managers from required department
-        if self.required_department:
-            managers = User.objects.filter(
-                department=self.required_department,
-                role='manager'
-            )
-            self.assigned_to.set(managers)
+        # Auto-assign managers from required department; set() only writes
+        # the difference from the current assignees
+        if self.required_department_id:
+            managers = User.objects.filter(department_id=self.required_department_id, role='manager')
+            if creating:
+                self.assigned_to.add(*managers)
+            else:
+                self.assigned_to.set(managers)
 
     def get_timeline(self):
         """Get or create a timeline for the tender"""
@@ -224,6 +253,7 @@ class Document(models.Model):
 
     class Meta:
         db_table = 'documents'
+        indexes = [models.Index(fields=['tender', 'created_at'], name='documents_tender_created_idx')]
 
     def __str__(self):
         return f"{self.get_document_type_display()} - {self.tender.tender_name}"
@@ -245,10 +275,72 @@ class Approval(models.Model):
 
     class Meta:
         db_table = 'approvals'
+        indexes = [models.Index(fields=['tender', 'created_at'], name='approvals_tender_created_idx')]
 
     def __str__(self):
         return f"{self.tender} - {self.approver}"
     
+class DocumentText(models.Model):
+    """Text extracted from a document's file by `manage.py extract_documents`"""
+    STATUSES = [
+        ('indexed', 'Indexed'),
+        ('unsupported', 'Unsupported'),
+        ('failed', 'Failed'),
+    ]
+
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, primary_key=True, related_name='text')
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES)
+    text = models.TextField(blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    extracted_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'document_texts'
+
+class DocumentTerm(models.Model):
+    """Inverted index entry: `term` occurs `frequency` times in the document's text"""
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=40)
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'document_terms'
+        unique_together = ('term', 'document')
+
+class EvaluationCriterion(models.Model):
+    """One weighted criterion bids on a tender are scored against"""
+    criterion_id = models.AutoField(primary_key=True)
+    tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name='criteria')
+    name = models.CharField(max_length=100)
+    weight = models.FloatField()
+    max_score = models.FloatField(default=10)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'evaluation_criteria'
+        unique_together = ('tender', 'name')
+
+    def __str__(self):
+        return f"{self.tender_id} - {self.name}"
+
+class BidScore(models.Model):
+    """One evaluator's score for one bid document on one criterion"""
+    score_id = models.AutoField(primary_key=True)
+    bid = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='scores')
+    criterion = models.ForeignKey(EvaluationCriterion, on_delete=models.CASCADE, related_name='scores')
+    evaluator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bid_scores')
+    score = models.FloatField()
+    comments = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'bid_scores'
+        unique_together = ('bid', 'criterion', 'evaluator')
+        indexes = [
+            models.Index(fields=['criterion', 'updated_at'], name='bid_scores_criterion_idx'),
+        ]
+
 class AuditLog(models.Model):
     ACTION_TYPES = [
         ('create', 'Create'),
@@ -268,10 +360,53 @@ class AuditLog(models.Model):
 
     class Meta:
         db_table = 'audit_logs'
+        indexes = [
+            # Retention/archival scans by month, history reads by target
+            models.Index(fields=['timestamp'], name='audit_logs_timestamp_idx'),
+            models.Index(fields=['target_model', 'target_id', 'timestamp'], name='audit_logs_target_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.action} {self.target_model}"
     
+class AuditArchive(models.Model):
+    """
+    Manifest entry for one compressed JSONL file holding audit_logs rows of
+    one calendar month that were moved out of the hot table. A month may
+    have several parts if late rows are archived on a later run.
+    """
+    month = models.DateField()  # first day of the month
+    part = models.PositiveIntegerField(default=1)
+    path = models.CharField(max_length=255)  # relative to AUDIT_LOG['ARCHIVE_DIR']
+    codec = models.CharField(max_length=10)
+    row_count = models.PositiveIntegerField()
+    first_log_id = models.IntegerField()
+    last_log_id = models.IntegerField()
+    sha256 = models.CharField(max_length=64)
+    # False for archives written before AuditArchiveTarget rows existed
+    targets_indexed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'audit_archives'
+        unique_together = ('month', 'part')
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} part {self.part} ({self.row_count} rows)"
+
+class AuditArchiveTarget(models.Model):
+    """One target with rows in an archive file, so target reads skip the other files"""
+    archive = models.ForeignKey(AuditArchive, on_delete=models.CASCADE, related_name='targets')
+    target_model = models.CharField(max_length=50)
+    target_id = models.IntegerField()
+
+    class Meta:
+        db_table = 'audit_archive_targets'
+        unique_together = ('archive', 'target_model', 'target_id')
+        indexes = [
+            models.Index(fields=['target_model', 'target_id'], name='audit_archive_targets_idx'),
+        ]
+
 class CV(models.Model):
     cv_id = models.AutoField(primary_key=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cv')
@@ -286,6 +421,27 @@ class CV(models.Model):
     def __str__(self):
         return f"CV - {self.user.first_name} {self.user.last_name}"
     
+class CVProfile(models.Model):
+    """Extraction state of a CV's file; its terms are in CVTerm"""
+    cv = models.OneToOneField(CV, on_delete=models.CASCADE, primary_key=True, related_name='profile')
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=DocumentText.STATUSES)
+    error = models.CharField(max_length=255, blank=True)
+    indexed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'cv_profiles'
+
+class CVTerm(models.Model):
+    """Weight of one skill/keyword term in a CV's L2-normalised term vector"""
+    cv = models.ForeignKey(CV, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=40)
+    weight = models.FloatField()
+
+    class Meta:
+        db_table = 'cv_terms'
+        unique_together = ('cv', 'term')
+
 # models.py (Token model)
 
 class Token(models.Model):
@@ -297,3 +453,251 @@ class Token(models.Model):
     class Meta:
         db_table = 'tokens'
 
+class UsedToken(models.Model):
+    """
+    Ledger of spent verification and password-reset tokens. The tokens are
+    signed and carry their own expiry, so this only makes them single-use;
+    rows past expires_at can be pruned.
+    """
+    jti = models.CharField(max_length=32, primary_key=True)
+    purpose = models.CharField(max_length=20)
+    used_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'used_tokens'
+
+class IdempotencyRecord(models.Model):
+    """
+    Outcome of a write sent with an Idempotency-Key header. A row without
+    response_status is a claim: the request holding it is still running.
+    """
+    record_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'idempotency_records'
+        unique_together = ('user', 'key')
+
+class ChangeVersion(models.Model):
+    """
+    Monotonic change counter for a tender or for every tender in a scope.
+    Bumped whenever a tender or its timeline, documents or approvals change,
+    and read to answer conditional GETs without touching the tender tables.
+    """
+    SCOPES = [
+        ('tender', 'Tender'),
+        ('department', 'Department'),
+        ('company', 'Company'),
+        ('global', 'Global'),
+        ('cv_index', 'CV index'),
+        ('bid_scores', 'Bid scores'),
+        ('bid_evaluation', 'Bid evaluation'),
+        ('reference_data', 'Reference data'),
+    ]
+
+    scope = models.CharField(max_length=20, choices=SCOPES)
+    scope_id = models.IntegerField()
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'change_versions'
+        unique_together = ('scope', 'scope_id')
+
+    def __str__(self):
+        return f"{self.scope}:{self.scope_id} v{self.version}"
+
+
+class InboxItem(models.Model):
+    """
+    One tender awaiting action by one assigned manager. Maintained from
+    tender saves and assigned_to changes (services/inbox/utils.py) so the
+    inbox is a range scan on (user, queued_at).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inbox_items')
+    tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name='inbox_items')
+    status = models.CharField(max_length=20, choices=Tender.TENDER_STATUS)
+    queued_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'inbox_items'
+        unique_together = ('user', 'tender')
+        indexes = [
+            models.Index(fields=['user', '-queued_at', '-id'], name='inbox_items_user_idx'),
+            models.Index(fields=['user', 'status', '-queued_at', '-id'], name='inbox_items_user_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.tender}"
+
+class InboxCounter(models.Model):
+    """Per-user inbox sizes, kept in step with InboxItem"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='inbox_counter')
+    in_review = models.IntegerField(default=0)
+    submitted = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'inbox_counters'
+
+class NotificationEvent(models.Model):
+    """
+    Outbox row written by a tender transition; the notification worker fans
+    it out to the assignees and deletes it, so requests pay one INSERT.
+    """
+    event_id = models.AutoField(primary_key=True)
+    tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name='notification_events')
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    previous_status = models.CharField(max_length=20, choices=Tender.TENDER_STATUS, null=True)
+    status = models.CharField(max_length=20, choices=Tender.TENDER_STATUS)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_events'
+
+class Notification(models.Model):
+    """
+    In-app notification about one tender. Events for the same tender
+    arriving within NOTIFICATIONS['COALESCE_SECONDS'] of the last one are
+    folded into it while it is unread and not yet emailed.
+    """
+    EMAIL_STATES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+    ]
+
+    notification_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name='notifications')
+    status = models.CharField(max_length=20, choices=Tender.TENDER_STATUS)
+    message = models.CharField(max_length=255)
+    event_count = models.PositiveIntegerField(default=1)
+    email_state = models.CharField(max_length=10, choices=EMAIL_STATES, default='pending')
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'notifications'
+        indexes = [
+            models.Index(fields=['user', '-updated_at'], name='notifications_user_idx'),
+            models.Index(fields=['email_state', 'user'], name='notifications_email_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.message}"
+
+class NotificationPreference(models.Model):
+    """How often a user receives notification emails"""
+    DIGESTS = [
+        ('immediate', 'Immediate'),
+        ('hourly', 'Hourly'),
+        ('daily', 'Daily'),
+        ('off', 'Off'),
+    ]
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_preference')
+    digest = models.CharField(max_length=10, choices=DIGESTS, default='immediate')
+    last_digest_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'notification_preferences'
+
+class ReferenceSequence(models.Model):
+    """
+    Next free tender reference number for one prefix and day. Processes
+    reserve blocks of numbers by advancing next_value, then hand them out
+    from memory.
+    """
+    prefix = models.CharField(max_length=20)
+    day = models.DateField()
+    next_value = models.BigIntegerField(default=1)
+
+    class Meta:
+        db_table = 'reference_sequences'
+        unique_together = ('prefix', 'day')
+
+class DeletionJob(models.Model):
+    """
+    Background removal of a company or department and everything that
+    cascades from it. `manage.py run_deletion_jobs` deletes the dependents
+    in ordered batches, each in its own short transaction, and records the
+    rows removed so far in `progress`.
+    """
+    TARGETS = [
+        ('company', 'Company'),
+        ('department', 'Department'),
+    ]
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    job_id = models.AutoField(primary_key=True)
+    target = models.CharField(max_length=20, choices=TARGETS)
+    target_id = models.IntegerField()
+    target_name = models.CharField(max_length=50)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    step = models.CharField(max_length=30, blank=True)
+    progress = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'deletion_jobs'
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='deletion_jobs_status_idx'),
+            models.Index(fields=['target', 'target_id'], name='deletion_jobs_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"Delete {self.target} {self.target_name} ({self.status})"
+
+class Job(models.Model):
+    """
+    Background task queued in the database and run by `manage.py run_jobs`.
+    Ready jobs are taken highest priority first, then oldest run_at; a
+    failed attempt is retried with exponential backoff until max_attempts.
+    """
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    job_id = models.BigAutoField(primary_key=True)
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    run_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'priority'], name='jobs_ready_idx'),
+            models.Index(fields=['status', 'locked_at'], name='jobs_locked_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.job_id} ({self.status})"
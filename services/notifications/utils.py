@@ -0,0 +1,273 @@
+import base64
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from ..models import Notification, NotificationEvent, NotificationPreference, Tender, User
+
+logger = logging.getLogger('services.notifications')
+
+DIGEST_INTERVALS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+}
+
+
+def notification_setting(name, default):
+    return getattr(settings, 'NOTIFICATIONS', {}).get(name, default)
+
+
+def record_transition(tender, user, previous_status):
+    """Queue a tender transition for fan-out by the notification worker"""
+    NotificationEvent.objects.create(
+        tender_id=tender.pk, actor_id=user.user_id if user else None,
+        previous_status=previous_status, status=tender.status
+    )
+
+
+def notification_message(name, reference, previous_status, status):
+    label = dict(Tender.TENDER_STATUS).get(status, status)
+    if previous_status is None:
+        return f"New tender {reference} - {name}"
+    return f"Tender {reference} - {name} is now {label}"
+
+
+def _claim_events(batch_size):
+    events = NotificationEvent.objects.order_by('event_id')
+    if connection.features.has_select_for_update_skip_locked:
+        # Several workers may run; each takes a disjoint batch
+        events = events.select_for_update(skip_locked=True)
+    return list(events.values('event_id', 'tender_id', 'actor_id', 'previous_status', 'status')[:batch_size])
+
+
+def fan_out_events(batch_size=None):
+    """
+    Turn one batch of queued events into notifications for every assignee
+    except the actor. A burst of events for one tender and user becomes a
+    single notification, merged into a recent unread one when there is
+    one. The query count depends on the batch, not on the recipients.
+    Returns the number of events processed.
+    """
+    batch_size = batch_size or notification_setting('BATCH_SIZE', 500)
+    now = timezone.now()
+    with transaction.atomic():
+        events = _claim_events(batch_size)
+        if not events:
+            return 0
+        tender_ids = {event['tender_id'] for event in events}
+        tenders = {
+            tender_id: (name, reference)
+            for tender_id, name, reference in Tender.objects.filter(pk__in=tender_ids).values_list(
+                'tender_id', 'tender_name', 'reference_number'
+            )
+        }
+        assignees = defaultdict(list)
+        for tender_id, user_id in Tender.assigned_to.through.objects.filter(tender_id__in=tender_ids).values_list(
+            'tender_id', 'user_id'
+        ):
+            assignees[tender_id].append(user_id)
+
+        # (user, tender) -> [event count, previous status and status of the latest event]
+        pending = {}
+        for event in events:
+            for user_id in assignees[event['tender_id']]:
+                if user_id == event['actor_id']:
+                    continue
+                key = (user_id, event['tender_id'])
+                if key in pending:
+                    pending[key][0] += 1
+                    pending[key][1:] = event['previous_status'], event['status']
+                else:
+                    pending[key] = [1, event['previous_status'], event['status']]
+
+        if pending:
+            user_ids = {user_id for user_id, _ in pending}
+            recent = Notification.objects.filter(
+                user_id__in=user_ids, tender_id__in=tender_ids, read_at__isnull=True,
+                email_state__in=('pending', 'skipped'),
+                updated_at__gte=now - timedelta(seconds=notification_setting('COALESCE_SECONDS', 300)),
+            ).order_by('updated_at')
+            merge_into = {(item.user_id, item.tender_id): item for item in recent}
+            muted = set(NotificationPreference.objects.filter(user_id__in=user_ids, digest='off').values_list(
+                'user_id', flat=True
+            ))
+
+            updated, created = [], []
+            for (user_id, tender_id), (count, previous_status, status) in pending.items():
+                name, reference = tenders[tender_id]
+                existing = merge_into.get((user_id, tender_id))
+                if existing is not None:
+                    existing.event_count += count
+                    existing.status = status
+                    existing.message = notification_message(name, reference, previous_status, status)
+                    existing.updated_at = now
+                    updated.append(existing)
+                else:
+                    created.append(Notification(
+                        user_id=user_id, tender_id=tender_id, status=status, event_count=count,
+                        message=notification_message(name, reference, previous_status, status),
+                        email_state='skipped' if user_id in muted else 'pending', updated_at=now,
+                    ))
+            Notification.objects.bulk_update(
+                updated, ['event_count', 'status', 'message', 'updated_at'], batch_size=batch_size
+            )
+            Notification.objects.bulk_create(created, batch_size=batch_size)
+
+        NotificationEvent.objects.filter(event_id__in=[event['event_id'] for event in events]).delete()
+    return len(events)
+
+
+def _due_users(now):
+    """(users to email now, users with email turned off) among those with pending notifications"""
+    quiet = timedelta(seconds=notification_setting('COALESCE_SECONDS', 300))
+    max_delay = timedelta(seconds=notification_setting('MAX_DELAY_SECONDS', 900))
+    pending = Notification.objects.filter(email_state='pending').values('user_id').annotate(
+        oldest=Min('created_at'), latest=Max('updated_at')
+    )
+    pending = {row['user_id']: row for row in pending}
+    if not pending:
+        return [], []
+    preferences = {
+        preference.user_id: preference
+        for preference in NotificationPreference.objects.filter(user_id__in=pending)
+    }
+    due, muted = [], []
+    for user_id, row in pending.items():
+        preference = preferences.get(user_id)
+        digest = preference.digest if preference else 'immediate'
+        if digest == 'off':
+            muted.append(user_id)
+        elif digest in DIGEST_INTERVALS:
+            last = preference.last_digest_at
+            if last is None or last <= now - DIGEST_INTERVALS[digest]:
+                due.append(user_id)
+        # Immediate: wait for a burst to settle, but not forever
+        elif row['latest'] <= now - quiet or row['oldest'] <= now - max_delay:
+            due.append(user_id)
+    return due, muted
+
+
+def digest_message(user, notifications):
+    count = len(notifications)
+    subject = f"{count} tender update{'s' if count != 1 else ''}"
+    lines = []
+    for notification in notifications:
+        line = f"    - {notification.message}"
+        if notification.event_count > 1:
+            line += f" ({notification.event_count} updates)"
+        lines.append(line)
+    items = '\n'.join(lines)
+    body = f"""
+    Hello {user.first_name},
+
+    There {'are' if count != 1 else 'is'} {count} update{'s' if count != 1 else ''} on tenders assigned to you:
+
+{items}
+
+    See them at {settings.SITE_URL}/api/notifications/
+
+    Best regards,
+    Your Application Team
+    """
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [user.email])
+
+
+def send_digests(now=None):
+    """
+    Email every due user one digest of their pending notifications over a
+    single SMTP connection. A failed send leaves that user's notifications
+    pending for the next run. Returns the number of emails sent.
+    """
+    now = now or timezone.now()
+    due, skipped = _due_users(now)
+    users = User.objects.in_bulk(due)
+    notifications = defaultdict(list)
+    for notification in Notification.objects.filter(user_id__in=due, email_state='pending').order_by(
+        'user_id', '-updated_at'
+    ):
+        notifications[notification.user_id].append(notification)
+
+    sent = []
+    if notifications:
+        mail = get_connection(fail_silently=False)
+        mail.open()
+        try:
+            for user_id, items in notifications.items():
+                user = users[user_id]
+                if not user.is_active or not user.email:
+                    skipped.append(user_id)
+                    continue
+                try:
+                    mail.send_messages([digest_message(user, items)])
+                except Exception:
+                    logger.exception('Notification digest to user %s failed', user_id)
+                    continue
+                sent.append(user_id)
+        finally:
+            mail.close()
+
+    if skipped:
+        Notification.objects.filter(user_id__in=skipped, email_state='pending').update(email_state='skipped')
+    if sent:
+        # Notifications merged into after `now` stay pending for the next digest
+        Notification.objects.filter(user_id__in=sent, email_state='pending', updated_at__lte=now).update(
+            email_state='sent'
+        )
+        if NotificationPreference.objects.filter(user_id__in=sent).update(last_digest_at=now) < len(sent):
+            NotificationPreference.objects.bulk_create(
+                [NotificationPreference(user_id=user_id, last_digest_at=now) for user_id in sent],
+                ignore_conflicts=True
+            )
+    return len(sent)
+
+
+def encode_notification_cursor(updated_at, notification_id):
+    raw = f"{updated_at.isoformat()}|{notification_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_notification_cursor(cursor):
+    """(updated_at, notification_id) from a cursor; ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        updated_at, notification_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(updated_at), int(notification_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def notification_page(user, unread_only=False, cursor=None, limit=50):
+    """Newest-first notifications of `user` as (entries, next_cursor)"""
+    items = Notification.objects.filter(user=user)
+    if unread_only:
+        items = items.filter(read_at__isnull=True)
+    if cursor:
+        updated_at, notification_id = decode_notification_cursor(cursor)
+        items = items.filter(
+            Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, notification_id__lt=notification_id)
+        )
+    rows = list(items.order_by('-updated_at', '-notification_id').values(
+        'notification_id', 'tender_id', 'status', 'message', 'event_count', 'read_at', 'created_at', 'updated_at'
+    )[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_notification_cursor(rows[limit - 1]['updated_at'], rows[limit - 1]['notification_id'])
+    return rows[:limit], next_cursor
+
+
+def unread_count(user):
+    return Notification.objects.filter(user=user, read_at__isnull=True).count()
+
+
+def mark_read(user, notification_ids=None):
+    """Mark some (or, without ids, all) unread notifications of `user` read; returns how many"""
+    unread = Notification.objects.filter(user=user, read_at__isnull=True)
+    if notification_ids is not None:
+        unread = unread.filter(notification_id__in=notification_ids)
+    return unread.update(read_at=timezone.now())
@@ -0,0 +1,84 @@
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..models import NotificationPreference
+from .utils import mark_read, notification_page, unread_count
+
+MAX_LIMIT = 200
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def notifications(request):
+    """In-app notifications of the current user, newest first"""
+    try:
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_LIMIT:
+        return Response({
+            'message': f'limit must be between 1 and {MAX_LIMIT}',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    unread_only = request.query_params.get('unread', '').lower() in ('1', 'true', 'yes')
+    try:
+        entries, next_cursor = notification_page(
+            request.user, unread_only, request.query_params.get('cursor'), limit
+        )
+    except ValueError:
+        return Response({
+            'message': 'Invalid cursor',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'unread': unread_count(request.user),
+        'results': entries,
+        'next_cursor': next_cursor
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_notifications_read(request):
+    """Mark the given notification ids, or every unread notification, as read"""
+    ids = request.data.get('ids')
+    if ids is not None and (
+        not isinstance(ids, list) or not all(isinstance(value, int) and not isinstance(value, bool) for value in ids)
+    ):
+        return Response({
+            'message': 'ids must be a list of notification ids',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_400_BAD_REQUEST)
+    marked = mark_read(request.user, ids)
+    return Response({
+        'message': f'{marked} notification(s) marked as read',
+        'marked': marked,
+        'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+
+@api_view(['GET', 'PUT'])
+@permission_classes([IsAuthenticated])
+def notification_preferences(request):
+    """Read or change how often the current user gets notification emails"""
+    if request.method == 'PUT':
+        digest = request.data.get('digest')
+        choices = [value for value, _ in NotificationPreference.DIGESTS]
+        if digest not in choices:
+            return Response({
+                'message': f"digest must be one of: {', '.join(choices)}",
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not NotificationPreference.objects.filter(user=request.user).update(digest=digest):
+            NotificationPreference.objects.bulk_create(
+                [NotificationPreference(user=request.user, digest=digest)], ignore_conflicts=True
+            )
+    else:
+        digest = NotificationPreference.objects.filter(user=request.user).values_list('digest', flat=True).first()
+    return Response({
+        'digest': digest or 'immediate',
+        'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
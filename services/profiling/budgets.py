@@ -0,0 +1,81 @@
+# Maximum number of SQL queries each endpoint may issue, keyed by URL name
+# and HTTP method. Counts include the JWT user lookup and, for tender writes,
+# first-time creation of change_versions rows and of the day's
+# reference_sequences row, plus inbox_items/inbox_counters upkeep and the
+# notification_events INSERT on transitions. Tender and registration writes
+# include a cold reference-data registry (its version counter and one SELECT
+# per company/department/category table), as in the first request after any
+# change to those; company, department and category writes bump that
+# counter, and their reads take an ETag from it. Updates of those, registrations and
+# tender writes also check for an active deletion job of their target.
+# Spending a signed auth token is one used_tokens INSERT in a savepoint, and
+# emailing one is a jobs INSERT; the email itself is sent by a worker.
+# Writes sent with an Idempotency-Key also pay IDEMPOTENCY_KEY_QUERIES for
+# their claim and stored response; replaying one costs fewer than that.
+# Tender budgets are independent of the number of rows returned; anything
+# scaling with the result size shows up as an N+1 suspect instead.
+QUERY_BUDGETS = {
+    'register': {'POST': 8},
+    'token_obtain_pair': {'POST': 2},
+    'token_refresh': {'POST': 1},
+    'verify-email': {'GET': 5},
+    'resend-verification': {'POST': 2},
+    'request-password-reset': {'POST': 2},
+    'reset-password': {'POST': 5},
+    'change-password': {'POST': 2},
+
+    'company-list': {'GET': 3, 'POST': 3},
+    'company-detail': {'GET': 3, 'PUT': 5, 'PATCH': 5, 'DELETE': 4},
+
+    'department-list': {'GET': 3, 'POST': 3},
+    'department-detail': {'GET': 3, 'PUT': 5, 'PATCH': 5, 'DELETE': 4},
+
+    'async-company-list': {'GET': 2},
+    'async-company-detail': {'GET': 2},
+    'async-department-list': {'GET': 2},
+    'async-department-detail': {'GET': 2},
+    'async-tender-list': {'GET': 5},
+    'async-tender-detail': {'GET': 5},
+
+    'tender-category-list': {'GET': 3, 'POST': 5},
+    'tender-category-detail': {'GET': 3, 'PUT': 6, 'PATCH': 6, 'DELETE': 6},
+
+    'tender-list': {'GET': 5, 'POST': 29},
+    'tender-export': {'GET': 5},
+    'tender-detail': {'GET': 5, 'PUT': 14, 'PATCH': 15, 'DELETE': 18},
+    'tender-submit-for-review': {'POST': 20},
+    'tender-approve': {'POST': 19},
+    'tender-award': {'POST': 21},
+    'tender-close': {'POST': 21},
+    'tender-upload-document': {'POST': 8},
+    'tender-timeline': {'GET': 3},
+    'tender-history': {'GET': 7},
+    # Includes patching the CV index after a CV change (up to 500 CVs)
+    'tender-candidates': {'GET': 9},
+    'tender-search-documents': {'GET': 3},
+    'tender-criteria': {'GET': 3, 'POST': 9},
+    'tender-scores': {'POST': 13},
+    'tender-ranking': {'GET': 6},
+
+    'inbox': {'GET': 3},
+    'notifications': {'GET': 3},
+    'notifications-read': {'POST': 2},
+    'notification-preferences': {'GET': 2, 'PUT': 3},
+    'deletion-job': {'GET': 2},
+    'calendar': {'GET': 3},
+    'calendar-feed-url': {'GET': 1},
+    'calendar-feed': {'GET': 3},
+}
+
+
+# The claim INSERT and the response UPDATE, plus the savepoints around the
+# claim and the view when the request already runs in a transaction (tests)
+IDEMPOTENCY_KEY_QUERIES = 6
+
+
+def get_query_budget(view_name, method, idempotency_key=False):
+    """Return the query budget for a view name and method, or None"""
+    budget = QUERY_BUDGETS.get(view_name, {}).get(method.upper())
+    if budget is not None and idempotency_key and method.upper() != 'GET':
+        budget += IDEMPOTENCY_KEY_QUERIES
+    return budget
@@ -0,0 +1,63 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .budgets import get_query_budget
+from .query_inspector import QueryInspector
+
+logger = logging.getLogger('services.queries')
+
+
+class QueryInspectorMiddleware:
+    """
+    Development/CI middleware that groups the SQL issued by each request,
+    logs N+1 suspects with their call sites and flags endpoints that go
+    over their query budget. Disabled unless QUERY_INSPECTOR['ENABLED'].
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'QUERY_INSPECTOR', {})
+        if not config.get('ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.expose_header = config.get('EXPOSE_HEADER', True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inspector = QueryInspector()
+        with connection.execute_wrapper(inspector):
+            response = self.get_response(request)
+        return self.process_queries(request, response, inspector)
+
+    async def __acall__(self, request):
+        # The async ORM runs queries on a sync thread, but `connection`
+        # follows the request's context there, so the wrapper still applies
+        inspector = QueryInspector()
+        with connection.execute_wrapper(inspector):
+            response = await self.get_response(request)
+        return self.process_queries(request, response, inspector)
+
+    def process_queries(self, request, response, inspector):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path
+        budget = get_query_budget(view_name, request.method, 'Idempotency-Key' in request.headers)
+
+        if inspector.n_plus_one():
+            logger.warning(inspector.report(f"{request.method} {request.path}"))
+        if budget is not None and inspector.total > budget:
+            logger.warning(
+                "%s %s (%s) used %d queries, budget is %d",
+                request.method, request.path, view_name, inspector.total, budget
+            )
+        if self.expose_header:
+            response['X-Query-Count'] = str(inspector.total)
+        return response
@@ -0,0 +1,140 @@
+import re
+import time
+import traceback
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|\$\d+)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+_PROJECT_ROOT = str(settings.BASE_DIR)
+_SKIPPED_PATHS = ('site-packages', 'dist-packages', '/services/profiling/')
+
+
+def normalize_sql(sql):
+    """Reduce a SQL statement to its shape so repeated lookups group together"""
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def caller_location():
+    """Return 'path:line in func' for the innermost project frame issuing a query"""
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if not filename.startswith(_PROJECT_ROOT):
+            continue
+        if any(part in filename for part in _SKIPPED_PATHS):
+            continue
+        return f"{filename[len(_PROJECT_ROOT) + 1:]}:{frame.lineno} in {frame.name}"
+    return 'unknown'
+
+
+class QueryShape:
+    def __init__(self, shape):
+        self.shape = shape
+        self.count = 0
+        self.duration = 0.0
+        self.locations = Counter()
+
+    def as_dict(self):
+        return {
+            'sql': self.shape,
+            'count': self.count,
+            'duration_ms': round(self.duration * 1000, 3),
+            'locations': [loc for loc, _ in self.locations.most_common()],
+        }
+
+
+class QueryInspector:
+    """
+    Records every query issued on a connection while active and groups them
+    by SQL shape. Install it with ``connection.execute_wrapper(inspector)``
+    or use the ``inspect_queries`` context manager.
+    """
+
+    def __init__(self, n_plus_one_threshold=None, capture_locations=True):
+        config = getattr(settings, 'QUERY_INSPECTOR', {})
+        if n_plus_one_threshold is None:
+            n_plus_one_threshold = config.get('N_PLUS_ONE_THRESHOLD', 3)
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.capture_locations = capture_locations
+        self.shapes = OrderedDict()
+        self.total = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.record(sql, elapsed)
+
+    def record(self, sql, elapsed):
+        key = normalize_sql(sql)
+        shape = self.shapes.get(key)
+        if shape is None:
+            shape = self.shapes[key] = QueryShape(key)
+        shape.count += 1
+        shape.duration += elapsed
+        if self.capture_locations:
+            shape.locations[caller_location()] += 1
+        self.total += 1
+        self.duration += elapsed
+
+    def n_plus_one(self):
+        """Repeated SELECT shapes, the signature of lazy related-object loads"""
+        return [
+            shape for shape in self.shapes.values()
+            if shape.count >= self.n_plus_one_threshold
+            and shape.shape.upper().startswith('SELECT')
+        ]
+
+    def report(self, label=None):
+        lines = [f"{label or 'Queries'}: {self.total} queries in {self.duration * 1000:.1f}ms"]
+        for shape in self.n_plus_one():
+            lines.append(f"  N+1 suspect x{shape.count}: {shape.shape[:200]}")
+            for location in list(shape.locations)[:3]:
+                lines.append(f"    at {location}")
+        return '\n'.join(lines)
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'duration_ms': round(self.duration * 1000, 3),
+            'shapes': [shape.as_dict() for shape in self.shapes.values()],
+            'n_plus_one': [shape.as_dict() for shape in self.n_plus_one()],
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def inspect_queries(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Context manager yielding a QueryInspector bound to one connection"""
+    inspector = QueryInspector(**kwargs)
+    with connections[using].execute_wrapper(inspector):
+        yield inspector
+
+
+@contextmanager
+def query_budget(max_queries, label=None, allow_n_plus_one=False, using=DEFAULT_DB_ALIAS):
+    """Fail with QueryBudgetExceeded when the wrapped block exceeds its budget"""
+    with inspect_queries(using=using) as inspector:
+        yield inspector
+    problems = []
+    if inspector.total > max_queries:
+        problems.append(f"budget of {max_queries} exceeded")
+    if not allow_n_plus_one and inspector.n_plus_one():
+        problems.append("N+1 pattern detected")
+    if problems:
+        raise QueryBudgetExceeded(f"{'; '.join(problems)}\n{inspector.report(label)}")
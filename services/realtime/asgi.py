@@ -0,0 +1,57 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from ..auth.utils import authenticate_token, extract_token
+from ..tender.utils import tender_visible_to
+from .broker import get_broker, realtime_setting
+
+WEBSOCKET_PATH = '/ws/tenders/'
+
+
+async def tender_websocket(scope, receive, send):
+    """
+    Plain ASGI WebSocket endpoint streaming the same events as the SSE feed.
+    Authenticates with a bearer token in the Authorization header or the
+    ?token= query parameter; closes with 4401 when that fails.
+    """
+    if scope['path'] != WEBSOCKET_PATH:
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    headers = {key.decode('latin1').lower(): value.decode('latin1') for key, value in scope.get('headers', [])}
+    query = {key: values[0] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+    user = await authenticate_token(extract_token(headers, query))
+    if user is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+
+    await send({'type': 'websocket.accept'})
+    subscription = get_broker().subscribe()
+    heartbeat = realtime_setting('HEARTBEAT_SECONDS', 15)
+
+    async def pump():
+        while True:
+            try:
+                event = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                await send({'type': 'websocket.send', 'text': '{"type":"keep-alive"}'})
+                continue
+            if tender_visible_to(user, event['required_department_id'], event['created_by_id']):
+                await send({'type': 'websocket.send', 'text': json.dumps(event)})
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        # The feed is one-way; incoming frames are ignored until disconnect
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+    finally:
+        pump_task.cancel()
+        subscription.close()
@@ -0,0 +1,151 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+
+from django.conf import settings
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional
+    redis = aioredis = None
+
+logger = logging.getLogger('services.realtime')
+
+_event_ids = itertools.count(1)
+
+
+def realtime_setting(name, default):
+    return getattr(settings, 'REALTIME', {}).get(name, default)
+
+
+class Subscription:
+    """
+    One connected client: a bounded queue owned by the event loop serving
+    it. An idle subscription costs a queue and a set entry, no thread.
+    """
+
+    def __init__(self, broker, loop, max_queue):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    def deliver(self, event):
+        # Runs on the subscriber's loop. A client that stops reading loses
+        # its oldest events instead of growing memory without bound.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fan-out pub/sub inside one worker process. publish() is thread-safe so
+    sync views (running in Django's thread pool under ASGI) can publish to
+    subscribers waiting on the event loop.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, max_queue=None):
+        subscription = Subscription(
+            self, asyncio.get_running_loop(), max_queue or realtime_setting('QUEUE_SIZE', 100)
+        )
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The loop has shut down; drop the stale subscription
+                self.unsubscribe(subscription)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+class RedisRelayBroker(InProcessBroker):
+    """
+    InProcessBroker that routes publishes through a local Redis channel so
+    every worker process sees every event. Each worker relays the channel
+    into its own in-process subscribers from a single listener task.
+    """
+
+    def __init__(self, url, channel):
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def subscribe(self, max_queue=None):
+        subscription = super().subscribe(max_queue)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._relay())
+        return subscription
+
+    def publish(self, event):
+        try:
+            self._client.publish(self.channel, json.dumps(event))
+        except redis.RedisError:
+            logger.exception('Realtime broker unavailable, delivering locally only')
+            super().publish(event)
+
+    async def _relay(self):
+        client = aioredis.Redis.from_url(self.url)
+        async with client.pubsub() as pubsub:
+            await pubsub.subscribe(self.channel)
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    super().publish(json.loads(message['data']))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = realtime_setting('BROKER_URL', None)
+                if url and redis is not None:
+                    _broker = RedisRelayBroker(url, realtime_setting('CHANNEL', 'tender-events'))
+                else:
+                    if url:
+                        logger.warning('REALTIME BROKER_URL set but redis is not installed; using in-process broker')
+                    _broker = InProcessBroker()
+    return _broker
+
+
+def publish_event(event_type, tender, **data):
+    """Publish a tender event carrying the fields needed for visibility checks"""
+    get_broker().publish({
+        'id': next(_event_ids),
+        'type': event_type,
+        'tender_id': tender.tender_id,
+        'required_department_id': tender.required_department_id,
+        'created_by_id': tender.created_by_id,
+        'status': tender.status,
+        **data,
+    })
@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+from django.http import StreamingHttpResponse
+
+from ..auth.utils import async_jwt_required
+from ..tender.utils import tender_visible_to
+from .broker import get_broker, realtime_setting
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(user):
+    """
+    Yield Server-Sent Events for tenders `user` may see, with a comment
+    line as heartbeat so proxies keep the idle connection open.
+    """
+    heartbeat = realtime_setting('HEARTBEAT_SECONDS', 15)
+    subscription = get_broker().subscribe()
+    try:
+        yield f"retry: {realtime_setting('RETRY_MS', 5000)}\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if tender_visible_to(user, event['required_department_id'], event['created_by_id']):
+                yield format_event(event)
+    finally:
+        subscription.close()
+
+
+@async_jwt_required(query_token=True)
+async def tender_events(request):
+    """Server-Sent Events feed of tender transitions, documents and approvals (ASGI only)"""
+    response = StreamingHttpResponse(event_stream(request.user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,181 @@
+import copy
+import hashlib
+import threading
+import time
+
+from django.db import connection
+from rest_framework import serializers
+
+from ..auth.policy import policy_for
+from ..models import Company, Department, TenderCategory
+from ..tender.versioning import ConditionalGetMixin, conditional_response, get_version
+
+REFERENCE_DATA_SCOPE = ('reference_data', 0)
+
+REFERENCE_MODELS = (Company, Department, TenderCategory)
+
+# How long a process trusts its copy before re-reading the version counter.
+# A lookup that misses always re-checks, so rows created by another worker
+# are found at once; a row deleted by another worker can still validate for
+# this long, after which the write fails on its foreign key instead.
+MAX_STALENESS = 1.0
+
+
+def _transaction():
+    """The outermost atomic block the application opened, or None"""
+    # Like Django's durable check, the atomic blocks TestCase wraps each test
+    # in stand in for autocommit and do not count
+    return next((block for block in connection.atomic_blocks if not block._from_testcase), None)
+
+
+class ReferenceDataRegistry:
+    """
+    Per-process copy of every company, department and tender category.
+    These tables are small and rarely written, so serializers validate and
+    display them from memory; any change bumps the reference_data counter,
+    which other processes notice within MAX_STALENESS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.rows = {}
+        self.invalidate()
+
+    def invalidate(self):
+        """Make the next lookup reload; the current rows stay readable until then"""
+        self.version = None
+        self.checked_at = 0.0
+        self.peeked = (None, 0.0)
+
+    def sync(self, force=False):
+        """
+        Reload the copy if it is stale or `force` is set, and return the rows
+        (model -> {pk: instance}) it checked. Lookups read that snapshot rather
+        than self.rows, which another thread may replace meanwhile.
+
+        Rows reloaded inside a transaction may include its uncommitted writes
+        and roll back with it, so they are kept for that transaction and
+        thread only, never as the process-wide copy.
+        """
+        now = time.monotonic()
+        block = _transaction()
+        local = getattr(self._local, 'snapshot', None)
+        if local is None or local[0] is not block:
+            local = None
+        elif not force and now - local[3] < MAX_STALENESS:
+            return local[2]
+        if not force and local is None and self.version is not None and now - self.checked_at < MAX_STALENESS:
+            return self.rows
+        version = get_version(*REFERENCE_DATA_SCOPE)
+        if block is not None and version != self.version:
+            rows = local[2] if local is not None and local[1] == version else self._load()
+            self._local.snapshot = (block, version, rows, now)
+            return rows
+        with self._lock:
+            if version != self.version:
+                self.rows, self.version = self._load(), version
+            self.checked_at = now
+            return self.rows
+
+    def _load(self):
+        return {model: model._default_manager.order_by('pk').in_bulk() for model in REFERENCE_MODELS}
+
+    def current_version(self):
+        """
+        The reference_data (version, updated_at): the copy's while fresh, else
+        read without reloading any rows and trusted for MAX_STALENESS like the
+        copy, unless read inside a transaction
+        """
+        now = time.monotonic()
+        for version, checked_at in ((self.version, self.checked_at), self.peeked):
+            if version is not None and now - checked_at < MAX_STALENESS:
+                return version
+        version = get_version(*REFERENCE_DATA_SCOPE)
+        if _transaction() is None:
+            self.peeked = (version, now)
+        return version
+
+    def get(self, model, pk):
+        """A private copy of one `model` row, or None if it does not exist"""
+        instance = self.sync()[model].get(pk)
+        if instance is None:
+            instance = self.sync(force=True)[model].get(pk)
+        return copy.copy(instance) if instance is not None else None
+
+    def all(self, model):
+        return list(self.sync()[model].values())
+
+
+registry = ReferenceDataRegistry()
+
+
+class ReferenceDataConditionalGetMixin(ConditionalGetMixin):
+    """
+    ETag validators for company, department and category reads from the
+    reference_data version; while the registry's copy is fresh they cost
+    no extra query.
+    """
+
+    # VISIBILITY resource deciding which rows the user sees
+    visibility_resource = None
+
+    def get_version_scope(self):
+        return REFERENCE_DATA_SCOPE
+
+    def get_etag_variant(self):
+        # Which rows are visible follows the role and the user attributes its
+        # rule reads, which a demotion or move changes without a version bump
+        user = self.request.user
+        lookups = policy_for(user).visibility[self.visibility_resource] or ()
+        key = '|'.join([user.role, *(f'{lookup}={getattr(user, attribute)}' for lookup, attribute in lookups)])
+        return f'{super().get_etag_variant()}-{hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:8]}'
+
+    def check_not_modified(self):
+        version, updated_at = registry.current_version()
+        # A rolled back bump can hand its version number out again, never
+        # its timestamp
+        stamp = f'{version}.{updated_at.timestamp():.6f}' if updated_at else version
+        return conditional_response(
+            self.request, REFERENCE_DATA_SCOPE, (stamp, None), self.get_etag_variant()
+        )
+
+    def list(self, request, *args, **kwargs):
+        not_modified, validators = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+        return self.set_validators(super().list(request, *args, **kwargs), validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        not_modified, validators = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+        return self.set_validators(super().retrieve(request, *args, **kwargs), validators)
+
+
+class RegistryRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField to a reference-data model, resolved from the registry instead of a SELECT"""
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+        if not kwargs.get('read_only'):
+            kwargs.setdefault('queryset', model._default_manager.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = registry.get(self.model, pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+    def get_choices(self, cutoff=None):
+        instances = registry.all(self.model)
+        if cutoff is not None:
+            instances = instances[:cutoff]
+        return {self.to_representation(instance): self.display_value(instance) for instance in instances}
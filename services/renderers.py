@@ -0,0 +1,60 @@
+import decimal
+
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+_drf_default = encoders.JSONEncoder().default
+
+
+def _default(obj):
+    """DRF's JSONEncoder.default, refusing the non-finite Decimals it would pass on as NaN floats"""
+    if isinstance(obj, decimal.Decimal) and not obj.is_finite():
+        raise ValueError('Out of range float values are not JSON compliant')
+    return _drf_default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson. Output matches DRF's compact renderer
+    (UTF-8, no whitespace, 'Z' for UTC datetimes, U+2028/U+2029 escaped).
+    Indented output, ASCII-only output and anything orjson refuses to encode
+    (e.g. integers wider than 64 bits) go through the stdlib renderer,
+    which raises on a NaN or infinite Decimal. orjson would write a NaN or
+    infinite float as null; FloatField input rejects those, so no stored
+    value is one.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_default,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Keep the output a strict javascript subset, as JSONRenderer does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def json_response(data, status=200):
+    """HttpResponse rendered by FastJSONRenderer, for plain (non-DRF) views"""
+    return HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status)
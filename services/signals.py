@@ -0,0 +1,141 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .evaluation.scoring import evaluation_scope
+from .inbox.utils import ACTIONABLE_STATUSES, remove_tender_from_inboxes, sync_tender_inbox
+from .matching.profiles import CV_INDEX_SCOPE
+from .models import (
+    CV, BidScore, Company, Department, EvaluationCriterion, Tender, TenderCategory, TenderTimeline, Document,
+    Approval, User
+)
+from .notifications.utils import record_transition
+from .realtime.broker import publish_event
+from .registry.reference_data import REFERENCE_DATA_SCOPE, registry
+from .tender.signals import tender_transitioned
+from .tender.versioning import bump_tender_versions, bump_versions, tender_scopes
+
+
+@receiver([post_save, post_delete], sender=Tender)
+def tender_changed(sender, instance, **kwargs):
+    bump_tender_versions(instance)
+
+
+def deleted_with_tender(origin):
+    """Whether a delete started from tenders, so their children go in the same cascade"""
+    if isinstance(origin, QuerySet):
+        return origin.model is Tender
+    return isinstance(origin, Tender)
+
+
+@receiver([post_save, post_delete], sender=TenderTimeline)
+@receiver([post_save, post_delete], sender=Document)
+@receiver([post_save, post_delete], sender=Approval)
+def tender_child_changed(sender, instance, origin=None, **kwargs):
+    if deleted_with_tender(origin):
+        # The tender's own post_delete bumps the same scopes once
+        return
+    if sender._meta.get_field('tender').is_cached(instance):
+        tender = instance.tender
+    else:
+        # The tender row may already be gone when a cascade deletes children
+        tender = Tender.objects.filter(pk=instance.tender_id).only(
+            'tender_id', 'required_department', 'company'
+        ).first()
+    if tender is not None:
+        scopes = tender_scopes(tender)
+        if sender is Document and instance.document_type == 'bid':
+            scopes.add(evaluation_scope(tender.pk))
+        bump_versions(scopes)
+
+
+@receiver([post_save, post_delete], sender=Company)
+@receiver([post_save, post_delete], sender=Department)
+@receiver([post_save, post_delete], sender=TenderCategory)
+def reference_data_changed(sender, instance, **kwargs):
+    bump_versions([REFERENCE_DATA_SCOPE])
+    # Reloading before the commit would cache rows that may still roll back
+    transaction.on_commit(registry.invalidate)
+
+
+@receiver(tender_transitioned)
+def push_transition(sender, tender, user, previous_status, **kwargs):
+    transaction.on_commit(lambda: publish_event(
+        'tender.created' if previous_status is None else 'tender.transitioned', tender,
+        previous_status=previous_status, actor_id=user.user_id if user else None,
+    ))
+
+
+@receiver(tender_transitioned)
+def queue_notifications(sender, tender, user, previous_status, **kwargs):
+    # Written in the request's transaction, fanned out by deliver_notifications
+    record_transition(tender, user, previous_status)
+
+
+@receiver(post_save, sender=Document)
+def push_document(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_event(
+            'document.uploaded', instance.tender, document_id=instance.document_id,
+            document_type=instance.document_type, actor_id=instance.uploader_id,
+        ))
+
+
+@receiver(post_save, sender=Approval)
+def push_approval(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_event(
+            'approval.created', instance.tender, approval_id=instance.approval_id,
+            approval_status=instance.status, actor_id=instance.approver_id,
+        ))
+
+
+@receiver(post_save, sender=Tender)
+def tender_status_changed(sender, instance, created, **kwargs):
+    # New tenders reach the inbox through their assigned_to change
+    if not created and instance.status != getattr(instance, '_loaded_status', None):
+        sync_tender_inbox(instance)
+    instance._loaded_status = instance.status
+
+
+@receiver(m2m_changed, sender=Tender.assigned_to.through)
+def tender_assignees_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # Inbox rows only exist for actionable tenders, so a tender that is
+        # not, and was not when last synced, has nothing to update
+        statuses = {instance.status, getattr(instance, '_loaded_status', 'unknown')}
+        if statuses & set(ACTIONABLE_STATUSES) or 'unknown' in statuses:
+            sync_tender_inbox(instance)
+    else:
+        # user.assigned_tenders changed; on clear pk_set is not provided
+        tenders = Tender.objects.filter(pk__in=pk_set) if pk_set else Tender.objects.filter(inbox_items__user=instance)
+        for tender in tenders.only('tender_id', 'status'):
+            sync_tender_inbox(tender)
+
+
+@receiver(pre_delete, sender=Tender)
+def tender_deleted(sender, instance, **kwargs):
+    # Only actionable tenders have inbox rows to uncount
+    if getattr(instance, '_loaded_status', None) in (None, *ACTIONABLE_STATUSES):
+        remove_tender_from_inboxes(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=CV)
+def cv_changed(sender, instance, **kwargs):
+    # Activation changes apply at once; a new file waits for extract_documents
+    bump_versions([CV_INDEX_SCOPE])
+
+
+@receiver([post_save, post_delete], sender=EvaluationCriterion)
+def criterion_changed(sender, instance, **kwargs):
+    bump_versions([evaluation_scope(instance.tender_id)])
+
+
+@receiver(pre_delete, sender=User)
+def evaluator_deleted(sender, instance, **kwargs):
+    # Their scores go with them; rankings that used them must be rebuilt
+    tender_ids = BidScore.objects.filter(evaluator=instance).values_list('bid__tender_id', flat=True).distinct()
+    bump_versions([evaluation_scope(tender_id) for tender_id in tender_ids])
@@ -0,0 +1,141 @@
+import base64
+import heapq
+import math
+from datetime import datetime
+from itertools import islice
+
+from django.db.models import Q
+
+from ..audit.archive import iter_audit_entries
+from ..models import Approval, Document, TenderTimeline
+
+# Ties on timestamp are broken by source (in this order, newest first) and
+# then by primary key, so every event has one fixed place in the stream
+SOURCES = ('approval', 'audit', 'document', 'timeline')
+
+MAX_LIMIT = 200
+
+
+def encode_history_cursor(event):
+    raw = f"{event['timestamp'].isoformat()}|{event['source']}|{event['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_history_cursor(cursor):
+    """(timestamp, source, id) from a cursor; ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, source, pk = raw.split('|')
+        if source not in SOURCES:
+            raise ValueError(source)
+        return datetime.fromisoformat(timestamp), source, int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def _position_for(source, cursor):
+    """
+    Per-source (timestamp, pk) keyset position equivalent to the global
+    (timestamp, source, pk) cursor: sources sorting before the cursor's
+    keep rows at the cursor timestamp, sources after it drop them.
+    """
+    if cursor is None:
+        return None
+    timestamp, cursor_source, pk = cursor
+    if source == cursor_source:
+        return timestamp, pk
+    return timestamp, math.inf if source < cursor_source else -math.inf
+
+
+def _model_stream(queryset, time_field, pk_field, position, chunk_size, to_event):
+    """Keyset-paged rows of `queryset`, newest first, as history events"""
+    queryset = queryset.order_by(f'-{time_field}', f'-{pk_field}')
+    while True:
+        page = queryset
+        if position is not None:
+            timestamp, pk = position
+            condition = Q(**{f'{time_field}__lt': timestamp})
+            if pk == math.inf:
+                condition |= Q(**{time_field: timestamp})
+            elif pk != -math.inf:
+                condition |= Q(**{time_field: timestamp, f'{pk_field}__lt': pk})
+            page = queryset.filter(condition)
+        rows = list(page[:chunk_size])
+        for row in rows:
+            yield to_event(row)
+        if len(rows) < chunk_size:
+            return
+        position = (rows[-1][time_field], rows[-1][pk_field])
+
+
+def _audit_events(tender_id, position, chunk_size):
+    for entry in iter_audit_entries({'target_model': 'Tender', 'target_id': tender_id}, position, chunk_size):
+        yield {
+            'source': 'audit', 'id': entry['log_id'], 'timestamp': entry['timestamp'],
+            'event': entry['action'], 'actor_id': entry['user_id'], 'details': entry['details'],
+        }
+
+
+def _approval_events(tender_id, position, chunk_size):
+    rows = Approval.objects.filter(tender_id=tender_id).values(
+        'approval_id', 'created_at', 'approver_id', 'status', 'comments'
+    )
+    return _model_stream(rows, 'created_at', 'approval_id', position, chunk_size, lambda row: {
+        'source': 'approval', 'id': row['approval_id'], 'timestamp': row['created_at'],
+        'event': f"approval_{row['status']}", 'actor_id': row['approver_id'], 'details': row['comments'],
+    })
+
+
+def _document_events(tender_id, position, chunk_size):
+    rows = Document.objects.filter(tender_id=tender_id).values(
+        'document_id', 'created_at', 'uploader_id', 'document_type', 'description'
+    )
+    return _model_stream(rows, 'created_at', 'document_id', position, chunk_size, lambda row: {
+        'source': 'document', 'id': row['document_id'], 'timestamp': row['created_at'],
+        'event': 'document_uploaded', 'actor_id': row['uploader_id'],
+        'details': row['description'] or row['document_type'],
+    })
+
+
+def _timeline_events(tender_id, position, chunk_size):
+    # One timeline per tender; only its creation and last change are known
+    timeline = TenderTimeline.objects.filter(tender_id=tender_id).values(
+        'timeline_id', 'created_at', 'updated_at'
+    ).first()
+    if timeline is None:
+        return
+    events = [(timeline['updated_at'], 'timeline_updated'), (timeline['created_at'], 'timeline_created')]
+    if timeline['updated_at'] == timeline['created_at']:
+        events = events[1:]
+    for timestamp, event in events:
+        if position is None or (timestamp, timeline['timeline_id']) < position:
+            yield {
+                'source': 'timeline', 'id': timeline['timeline_id'], 'timestamp': timestamp,
+                'event': event, 'actor_id': None, 'details': None,
+            }
+
+
+STREAMS = {
+    'approval': _approval_events,
+    'audit': _audit_events,
+    'document': _document_events,
+    'timeline': _timeline_events,
+}
+
+
+def tender_history(tender_id, cursor=None, limit=50):
+    """
+    One page of a tender's activity, newest first. Each source is read
+    lazily in index order and the streams are combined with a k-way merge,
+    so a page costs about `limit` rows per source rather than the whole
+    history. Returns (events, next_cursor).
+    """
+    position = decode_history_cursor(cursor) if cursor else None
+    chunk_size = limit + 1
+    streams = [STREAMS[source](tender_id, _position_for(source, position), chunk_size) for source in SOURCES]
+    merged = heapq.merge(
+        *streams, key=lambda event: (event['timestamp'], event['source'], event['id']), reverse=True
+    )
+    events = list(islice(merged, limit + 1))
+    next_cursor = encode_history_cursor(events[limit - 1]) if len(events) > limit else None
+    return events[:limit], next_cursor
@@ -0,0 +1,130 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from ..models import IdempotencyRecord
+
+MAX_KEY_LENGTH = 255
+
+
+def idempotency_setting(name, default):
+    return getattr(settings, 'IDEMPOTENCY', {}).get(name, default)
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for; a key may only be reused with the same one"""
+    payload = json.dumps([request.method, request.path, request.data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def claim(user, key, fingerprint):
+    """
+    Take `key` for this request: (record, True) when the caller must do the
+    work, (record, False) when another request already holds or finished
+    it. Claims left behind for LOCK_SECONDS by a crashed request, and
+    records past their TTL, are taken over.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=idempotency_setting('TTL_SECONDS', 86400))
+    try:
+        with transaction.atomic():
+            return IdempotencyRecord.objects.create(
+                user=user, key=key, fingerprint=fingerprint, created_at=now, expires_at=expires_at
+            ), True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyRecord.objects.filter(user=user, key=key).first()
+    abandoned = now - timedelta(seconds=idempotency_setting('LOCK_SECONDS', 60))
+    if record is not None and (
+        record.expires_at <= now or (record.response_status is None and record.created_at <= abandoned)
+    ):
+        # Conditional on created_at, so only one retry takes over
+        taken = IdempotencyRecord.objects.filter(pk=record.pk, created_at=record.created_at).update(
+            fingerprint=fingerprint, response_status=None, response_body=None, created_at=now, expires_at=expires_at
+        )
+        if taken:
+            record.fingerprint, record.response_status, record.response_body = fingerprint, None, None
+            record.created_at, record.expires_at = now, expires_at
+            return record, True
+        record = IdempotencyRecord.objects.filter(pk=record.pk).first()
+    if record is None:
+        # Pruned between our INSERT and SELECT
+        return claim(user, key, fingerprint)
+    return record, False
+
+
+def idempotency_error(message, status_code):
+    return Response({
+        'message': message,
+        'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    }, status=status_code)
+
+
+def idempotent(view):
+    """
+    Honour an Idempotency-Key header on a write action. The first request
+    with a key runs the action in one transaction and stores its response;
+    repeats get that response back without running anything, a concurrent
+    repeat gets 409 and a repeat with a different body 422. Requests
+    without the header are untouched.
+    """
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return idempotency_error(
+                f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters', status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request)
+        record, created = claim(request.user, key, fingerprint)
+        if not created:
+            if record.fingerprint != fingerprint:
+                return idempotency_error(
+                    'Idempotency-Key was already used for a different request', status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.response_status is None:
+                response = idempotency_error(
+                    'A request with this Idempotency-Key is still in progress', status.HTTP_409_CONFLICT
+                )
+                response['Retry-After'] = '1'
+                return response
+            response = Response(record.response_body, status=record.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            with transaction.atomic():
+                response = view(self, request, *args, **kwargs)
+                if response.status_code < 500:
+                    IdempotencyRecord.objects.filter(pk=record.pk).update(
+                        response_status=response.status_code,
+                        response_body=json.loads(json.dumps(response.data, cls=JSONEncoder)),
+                    )
+                else:
+                    transaction.set_rollback(True)
+        except Exception:
+            # Nothing was written, so a retry must do the work
+            IdempotencyRecord.objects.filter(pk=record.pk).delete()
+            raise
+        if response.status_code >= 500:
+            IdempotencyRecord.objects.filter(pk=record.pk).delete()
+        return response
+    return wrapper
+
+
+def prune_idempotency_records(now=None):
+    """Forget responses past their TTL; returns how many"""
+    deleted, _ = IdempotencyRecord.objects.filter(expires_at__lt=now or timezone.now()).delete()
+    return deleted
@@ -0,0 +1,248 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from ..models import Document, Approval
+from .serializers import TenderSerializer, TenderTimelineSerializer, TenderDocumentSerializer, TenderApprovalSerializer
+
+# SQLite caps the number of bound parameters per statement
+IN_CHUNK_SIZE = 500
+
+
+def _converter(field):
+    """
+    Classify how a raw column value becomes field.to_representation(value):
+    None when the database value is already the representation, 'datetime'
+    and 'file' for the hot paths specialised in bind(), otherwise the
+    field's own to_representation.
+    """
+    if isinstance(field, (serializers.IntegerField, serializers.PrimaryKeyRelatedField, serializers.CharField)):
+        return None
+    if isinstance(field, serializers.FileField):
+        return 'file'
+    if (isinstance(field, serializers.DateTimeField) and settings.USE_TZ
+            and not hasattr(field, 'timezone')
+            and (getattr(field, 'format', api_settings.DATETIME_FORMAT) or '').lower() == ISO_8601):
+        return 'datetime'
+    return field.to_representation
+
+
+class CompiledSerializer:
+    """
+    Column layout and converters for the scalar fields of a ModelSerializer,
+    computed once from the serializer definition so the projection cannot
+    drift from it. Nested serializers are reported back by name.
+    """
+
+    def __init__(self, serializer_class, field_names=None, prefix=''):
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        self.columns = []
+        self.layout = []
+        self.nested = []
+        for name, field in serializer.fields.items():
+            if field.write_only or (field_names is not None and name not in field_names):
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                self.layout.append((name, None, None))
+                self.nested.append(name)
+                continue
+            model_field = model._meta.get_field(field.source)
+            self.layout.append((name, len(self.columns), _converter(field)))
+            self.columns.append(prefix + model_field.attname)
+
+    def bind(self, converters):
+        """Resolve the 'datetime'/'file' placeholders for one request"""
+        return [(name, index, converters.get(convert, convert)) for name, index, convert in self.layout]
+
+    @staticmethod
+    def build(layout, row, offset):
+        ret = {}
+        for name, index, convert in layout:
+            if index is None:
+                ret[name] = None
+                continue
+            value = row[offset + index]
+            ret[name] = value if value is None or convert is None else convert(value)
+        return ret
+
+
+_compiled = {}
+
+
+def compile_serializer(serializer_class, field_names=None, prefix=''):
+    key = (serializer_class, field_names, prefix)
+    if key not in _compiled:
+        _compiled[key] = CompiledSerializer(serializer_class, field_names, prefix)
+    return _compiled[key]
+
+
+class TenderProjection:
+    """
+    Read-only path producing exactly what TenderSerializer(many=True) would,
+    built from values_list() tuples instead of model instances. One query
+    fetches tenders joined to their timeline, then documents and approvals
+    are fetched per chunk of tenders and grouped in Python.
+    """
+
+    def __init__(self, request=None, field_names=None):
+        self.request = request
+        if field_names is not None:
+            field_names = frozenset(field_names)
+        self.tender = compile_serializer(TenderSerializer, field_names)
+        self.timeline = compile_serializer(TenderTimelineSerializer, prefix='timeline__')
+        self.document = compile_serializer(TenderDocumentSerializer)
+        self.approval = compile_serializer(TenderApprovalSerializer)
+
+        converters = {'datetime': self._datetime_converter(), 'file': self._file_converter()}
+        self.tender_layout = self.tender.bind(converters)
+        self.timeline_layout = self.timeline.bind(converters)
+        self.document_layout = self.document.bind(converters)
+        self.approval_layout = self.approval.bind(converters)
+
+    def _datetime_converter(self):
+        # DateTimeField.to_representation looks the current timezone up for
+        # every value; it cannot change during one response, so do it once
+        tz = timezone.get_current_timezone()
+
+        def convert(value):
+            if value.tzinfo is None:
+                value = timezone.make_aware(value, tz)
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+
+    def _file_converter(self):
+        storage = Document._meta.get_field('file').storage
+        request = self.request
+
+        def slow(name):
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        if not isinstance(storage, FileSystemStorage) or not storage.base_url.endswith('/'):
+            return lambda name: slow(name) if name else None
+        # FileSystemStorage.url() is urljoin(base_url, filepath_to_uri(name)),
+        # which is plain concatenation for relative names without dot segments
+        prefix = request.build_absolute_uri(storage.base_url) if request is not None else storage.base_url
+
+        def convert(name):
+            if not name:
+                return None
+            if name.startswith(('/', './')) or '..' in name or '/./' in name:
+                return slow(name)
+            return prefix + filepath_to_uri(name)
+        return convert
+
+    def serialize(self, queryset):
+        return list(self.iter_rows(queryset, chunk_size=None))
+
+    async def aserialize(self, queryset):
+        return [row async for row in self.aiter_rows(queryset)]
+
+    def _plan(self):
+        """values_list() columns for the tender query and where each part lives in a row"""
+        with_timeline = 'timeline' in self.tender.nested
+        columns = list(self.tender.columns)
+        if 'tender_id' not in columns:
+            columns.append('tender_id')
+        timeline_offset = len(columns)
+        if with_timeline:
+            columns += self.timeline.columns
+        return {
+            'columns': columns,
+            'id_index': columns.index('tender_id'),
+            'with_timeline': with_timeline,
+            'timeline_offset': timeline_offset,
+            'timeline_id_index': timeline_offset + self.timeline.columns.index('timeline__timeline_id'),
+        }
+
+    def _rows(self, queryset, plan):
+        return queryset.select_related(None).prefetch_related(None).values_list(*plan['columns'])
+
+    def iter_rows(self, queryset, chunk_size=1000):
+        """Yield one output dict per tender, `chunk_size` tenders per batch"""
+        plan = self._plan()
+        rows = self._rows(queryset, plan)
+        rows = iter(rows) if chunk_size is None else rows.iterator(chunk_size=chunk_size)
+        while True:
+            batch = list(rows if chunk_size is None else islice(rows, chunk_size))
+            if not batch:
+                return
+            tender_ids = [row[plan['id_index']] for row in batch]
+            children = {
+                name: self._group(layout, queries)
+                for name, layout, queries in self._child_queries(tender_ids)
+            }
+            yield from self._assemble(batch, plan, children)
+            if chunk_size is None:
+                return
+
+    async def aiter_rows(self, queryset, chunk_size=1000):
+        """
+        iter_rows() on the async ORM. The tender rows are fetched in one go
+        (QuerySet.aiterator() cannot stream values_list() querysets);
+        documents and approvals still follow in batches of `chunk_size`.
+        """
+        plan = self._plan()
+        rows = [row async for row in self._rows(queryset, plan)]
+        for start in range(0, len(rows), chunk_size):
+            for ret in await self._aassemble(rows[start:start + chunk_size], plan):
+                yield ret
+
+    async def _aassemble(self, batch, plan):
+        tender_ids = [row[plan['id_index']] for row in batch]
+        children = {}
+        for name, layout, queries in self._child_queries(tender_ids):
+            children[name] = self._group(layout, [[row async for row in query] for query in queries])
+        return list(self._assemble(batch, plan, children))
+
+    def _assemble(self, batch, plan, children):
+        build = CompiledSerializer.build
+        id_index = plan['id_index']
+        timeline_offset = plan['timeline_offset']
+        timeline_id_index = plan['timeline_id_index']
+        documents = children.get('documents')
+        approvals = children.get('approvals')
+        for row in batch:
+            ret = build(self.tender_layout, row, 0)
+            if plan['with_timeline']:
+                has_timeline = row[timeline_id_index] is not None
+                ret['timeline'] = build(self.timeline_layout, row, timeline_offset) if has_timeline else None
+            if documents is not None:
+                ret['documents'] = documents.get(row[id_index], [])
+            if approvals is not None:
+                ret['approvals'] = approvals.get(row[id_index], [])
+            yield ret
+
+    def _child_queries(self, tender_ids):
+        """(name, layout, querysets) for each requested nested list, chunked by tender id"""
+        children = [
+            ('documents', Document, self.document, self.document_layout),
+            ('approvals', Approval, self.approval, self.approval_layout),
+        ]
+        for name, model, compiled, layout in children:
+            if name not in self.tender.nested:
+                continue
+            pk = model._meta.pk.attname
+            queries = [
+                model.objects.filter(tender_id__in=tender_ids[start:start + IN_CHUNK_SIZE])
+                .order_by('tender_id', pk)
+                .values_list('tender_id', *compiled.columns)
+                for start in range(0, len(tender_ids), IN_CHUNK_SIZE)
+            ]
+            yield name, layout, queries
+
+    @staticmethod
+    def _group(layout, chunks):
+        grouped = defaultdict(list)
+        for rows in chunks:
+            for row in rows:
+                grouped[row[0]].append(CompiledSerializer.build(layout, row, 1))
+        return grouped
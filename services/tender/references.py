@@ -0,0 +1,105 @@
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import ReferenceSequence, Tender
+
+REFERENCE_PREFIX = 'BTD'
+BLOCK_SIZE = 50
+
+
+def format_reference(prefix, day, value):
+    return f"{prefix}-{day:%Y%m%d}-{value:06d}"
+
+
+class ReferenceNumberAllocator:
+    """
+    Hands out BTD-YYYYMMDD-NNNNNN reference numbers from per-day sequences.
+    Each process reserves `block_size` numbers per database round trip and
+    serves them from memory, so numbers are unique across processes and
+    increasing within one; a restart leaves a gap, never a duplicate.
+
+    Inside an open transaction blocks are reserved on a separate
+    connection and committed at once, so the sequence row is not locked
+    until the caller commits; a rollback just leaves a gap. SQLite locks
+    the whole database for the caller's transaction, so there only the
+    numbers actually needed are reserved in it, uncached: a rollback also
+    rolls the reservation back, and a cached block would then be handed
+    out twice.
+    """
+
+    def __init__(self, prefix=REFERENCE_PREFIX, block_size=BLOCK_SIZE):
+        self.prefix = prefix
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._day = None
+        self._next = self._end = 0
+
+    def next(self):
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        """`count` reference numbers for today, in increasing order"""
+        day = timezone.localdate()
+        with self._lock:
+            if day != self._day:
+                self._day, self._next, self._end = day, 0, 0
+            values = []
+            while len(values) < count:
+                if self._next == self._end:
+                    needed = count - len(values)
+                    size = max(needed, self.block_size)
+                    if not connection.in_atomic_block:
+                        start = self._reserve(day, size)
+                    elif connection.vendor != 'sqlite':
+                        start = self._reserve_apart(day, size)
+                    else:
+                        start = self._reserve(day, needed)
+                        values.extend(range(start, start + needed))
+                        break
+                    self._next, self._end = start, start + size
+                take = min(count - len(values), self._end - self._next)
+                values.extend(range(self._next, self._next + take))
+                self._next += take
+        return [format_reference(self.prefix, day, value) for value in values]
+
+    def _reserve(self, day, size):
+        """Advance the day's sequence by `size` and return the first reserved value"""
+        rows = ReferenceSequence.objects.filter(prefix=self.prefix, day=day)
+        with transaction.atomic(savepoint=False):
+            # The UPDATE row lock keeps the read-back consistent across processes
+            if rows.update(next_value=F('next_value') + size):
+                return rows.values_list('next_value', flat=True).get() - size
+            start = self._first_free(day)
+            try:
+                with transaction.atomic():
+                    ReferenceSequence.objects.create(prefix=self.prefix, day=day, next_value=start + size)
+                return start
+            except IntegrityError:
+                # Another process created today's row first
+                rows.update(next_value=F('next_value') + size)
+                return rows.values_list('next_value', flat=True).get() - size
+
+    def _reserve_apart(self, day, size):
+        """_reserve on a fresh connection of its own, committed before returning"""
+        outer = connections[DEFAULT_DB_ALIAS]
+        connections[DEFAULT_DB_ALIAS] = apart = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            return self._reserve(day, size)
+        finally:
+            connections[DEFAULT_DB_ALIAS] = outer
+            apart.close()
+
+    def _first_free(self, day):
+        # Numbers issued before the sequence existed (older random hex
+        # suffixes happen to be all digits sometimes) must not be reused
+        issued = Tender.objects.filter(
+            reference_number__startswith=format_reference(self.prefix, day, 0)[:-6]
+        ).values_list('reference_number', flat=True)
+        suffixes = [reference.rsplit('-', 1)[-1] for reference in issued]
+        return max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0) + 1
+
+
+reference_numbers = ReferenceNumberAllocator()
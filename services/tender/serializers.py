@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from ..models import Tender, TenderTimeline, Document, Approval, TenderCategory, User
+from ..models import Tender, TenderTimeline, Document, Approval, TenderCategory, User, EvaluationCriterion, Company, Department
+from ..registry.reference_data import RegistryRelatedField
 
 class TenderTimelineSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,6 +14,21 @@ class TenderDocumentSerializer(serializers.ModelSerializer):
         fields = ['document_id', 'document_type', 'file', 'description', 'created_at']
         read_only_fields = ['uploader']
 
+class EvaluationCriterionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EvaluationCriterion
+        fields = ['criterion_id', 'name', 'weight', 'max_score', 'created_at']
+
+    def validate_weight(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Weight must be positive')
+        return value
+
+    def validate_max_score(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Maximum score must be positive')
+        return value
+
 class TenderApprovalSerializer(serializers.ModelSerializer):
     class Meta:
         model = Approval
@@ -23,7 +39,21 @@ class TenderSerializer(serializers.ModelSerializer):
     timeline = TenderTimelineSerializer(required=False)
     documents = TenderDocumentSerializer(many=True, read_only=True)
     approvals = TenderApprovalSerializer(many=True, read_only=True)
-    
+    company = RegistryRelatedField(Company)
+    category = RegistryRelatedField(TenderCategory, allow_null=True, required=False)
+    required_department = RegistryRelatedField(Department, allow_null=True, required=False)
+
+    # Nested relations that are only embedded when requested via ?expand=
+    EXPANDABLE_FIELDS = ('timeline', 'documents', 'approvals')
+
+    def __init__(self, *args, **kwargs):
+        # Optional subset of field names to render (sparse fieldsets)
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Tender
         fields = [
@@ -44,4 +74,30 @@ class TenderSerializer(serializers.ModelSerializer):
             # Create default timeline
             tender.get_timeline()
             
-        return tender
\ No newline at end of file
+        return tender
+
+
+def select_tender_fields(fields=None, expand=None):
+    """
+    Resolve the ?fields= and ?expand= query parameters into the set of
+    TenderSerializer fields to render, or None for the full representation.
+    `fields` picks the fields; nested relations are embedded only when named
+    in `expand` (or, without `expand`, listed in `fields`).
+    """
+    if fields is None and expand is None:
+        return None
+
+    all_fields = TenderSerializer.Meta.fields
+    expandable = TenderSerializer.EXPANDABLE_FIELDS
+    requested = [name.strip() for name in (fields or '').split(',') if name.strip()]
+    expanded = [name.strip() for name in (expand or '').split(',') if name.strip()]
+
+    unknown = [name for name in requested if name not in all_fields]
+    unknown += [name for name in expanded if name not in expandable]
+    if unknown:
+        raise serializers.ValidationError({'fields': [f"Unknown field '{name}'" for name in unknown]})
+
+    selected = set(requested) if fields is not None else set(all_fields) - set(expandable)
+    if expand is not None:
+        selected = (selected - set(expandable)) | set(expanded)
+    return frozenset(selected)
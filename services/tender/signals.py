@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by TenderProcessManager (and tender creation in TenderViewSet) once a
+# tender has changed status. Receivers get `tender`, `user` (the actor) and
+# `previous_status`, which is None for a newly created tender.
+tender_transitioned = Signal()
@@ -1,13 +1,17 @@
+from django.db.models import Q
 from django.utils import timezone
-from ..models import AuditLog, User, Approval
-from datetime import datetime
-import uuid
+from ..models import AuditLog, User, Approval, Tender
+from ..auth.policy import allows, policy_for, visible
+from .references import reference_numbers
+from .signals import tender_transitioned
 
 def generate_reference_number():
     """Generate a unique reference number for tenders"""
-    timestamp = datetime.now().strftime('%Y%m%d')
-    unique_id = str(uuid.uuid4().hex)[:6].upper()
-    return f"BTD-{timestamp}-{unique_id}"
+    return reference_numbers.next()
+
+def generate_reference_numbers(count):
+    """Reference numbers for `count` tenders, e.g. before a bulk_create"""
+    return reference_numbers.allocate(count)
 
 def create_audit_log(user, action, target_model, target_id, details=None):
     """Create an audit log entry"""
@@ -19,9 +23,31 @@ def create_audit_log(user, action, target_model, target_id, details=None):
         details=details
     )
 
-def check_user_permission(user, required_role):
-    """Check if user has required role"""
-    return user.role == required_role
+def visible_tenders(user, params):
+    """Tenders `user` may see, narrowed by the status/category/search query parameters"""
+    queryset = visible(user, 'tender', Tender.objects.all())
+
+    status = params.get('status', None)
+    category = params.get('category', None)
+    search = params.get('search', None)
+
+    if status:
+        queryset = queryset.filter(status=status)
+    if category:
+        queryset = queryset.filter(category=category)
+    if search:
+        queryset = queryset.filter(
+            Q(tender_name__icontains=search) |
+            Q(description__icontains=search) |
+            Q(reference_number__icontains=search)
+        )
+    return queryset
+
+def tender_visible_to(user, required_department_id, created_by_id):
+    """Same visibility rules as visible_tenders, for one tender"""
+    return policy_for(user).can_see('tender', user, {
+        'required_department_id': required_department_id, 'created_by_id': created_by_id
+    })
 
 def validate_tender_status_transition(current_status, new_status):
     """Validate tender status transitions"""
@@ -51,6 +77,7 @@ class TenderProcessManager:
             target_id=tender.tender_id,
             details=f"Tender {tender.reference_number} created"
         )
+        tender_transitioned.send(sender=TenderProcessManager, tender=tender, user=user, previous_status=None)
         return tender
 
     @staticmethod
@@ -59,13 +86,10 @@ class TenderProcessManager:
         if not validate_tender_status_transition(tender.status, 'in_review'):
             raise ValueError("Invalid status transition")
         
+        previous_status = tender.status
         tender.status = 'in_review'
         tender.save()
         
-        # Update timeline
-        timeline = tender.get_timeline()
-        timeline.update_dates_based_on_status('in_review')
-        
         create_audit_log(
             user=user,
             action='submit',
@@ -73,24 +97,22 @@ class TenderProcessManager:
             target_id=tender.tender_id,
             details=f"Tender {tender.reference_number} submitted for review"
         )
+        tender_transitioned.send(sender=TenderProcessManager, tender=tender, user=user, previous_status=previous_status)
         return tender
 
     @staticmethod
     def approve_tender(tender, user, comments=None):
         """Approve tender"""
-        if not check_user_permission(user, 'manager'):
+        if not allows(user, 'tender', 'approve'):
             raise ValueError("User not authorized to approve tenders")
             
         if not validate_tender_status_transition(tender.status, 'approved'):
             raise ValueError("Invalid status transition")
         
+        previous_status = tender.status
         tender.status = 'approved'
         tender.save()
         
-        # Update timeline
-        timeline = tender.get_timeline()
-        timeline.update_dates_based_on_status('approved')
-        
         # Create approval record
         Approval.objects.create(
             tender=tender,
@@ -106,17 +128,19 @@ class TenderProcessManager:
             target_id=tender.tender_id,
             details=f"Tender {tender.reference_number} approved"
         )
+        tender_transitioned.send(sender=TenderProcessManager, tender=tender, user=user, previous_status=previous_status)
         return tender
 
     @staticmethod
     def award_tender(tender, user, comments=None):
         """Award tender"""
-        if not check_user_permission(user, 'manager'):
+        if not allows(user, 'tender', 'award'):
             raise ValueError("User not authorized to award tenders")
             
         if not validate_tender_status_transition(tender.status, 'awarded'):
             raise ValueError("Invalid status transition")
         
+        previous_status = tender.status
         tender.status = 'awarded'
         tender.save()
         
@@ -131,17 +155,19 @@ class TenderProcessManager:
             target_id=tender.tender_id,
             details=f"Tender {tender.reference_number} awarded"
         )
+        tender_transitioned.send(sender=TenderProcessManager, tender=tender, user=user, previous_status=previous_status)
         return tender
 
     @staticmethod
     def close_tender(tender, user, comments=None):
         """Close tender"""
-        if not check_user_permission(user, 'manager'):
+        if not allows(user, 'tender', 'close'):
             raise ValueError("User not authorized to close tenders")
             
         if not validate_tender_status_transition(tender.status, 'closed'):
             raise ValueError("Invalid status transition")
         
+        previous_status = tender.status
         tender.status = 'closed'
         tender.save()
         
@@ -156,68 +182,6 @@ class TenderProcessManager:
             target_id=tender.tender_id,
             details=f"Tender {tender.reference_number} closed"
         )
+        tender_transitioned.send(sender=TenderProcessManager, tender=tender, user=user, previous_status=previous_status)
         return tender
-    
-    @staticmethod
-    def initiate_tender(tender, user):
-        """Initialize a new tender"""
-        tender.reference_number = generate_reference_number()
-        tender.created_by = user
-        tender.status = 'draft'
-        tender.save()
-        
-        create_audit_log(
-            user=user,
-            action='create',
-            target_model='Tender',
-            target_id=tender.tender_id,
-            details=f"Tender {tender.reference_number} created"
-        )
-        return tender
-
-    @staticmethod
-    def submit_for_review(tender, user):
-        """Submit tender for review"""
-        if not validate_tender_status_transition(tender.status, 'in_review'):
-            raise ValueError("Invalid status transition")
-        
-        tender.status = 'in_review'
-        tender.save()
-        
-        create_audit_log(
-            user=user,
-            action='submit',
-            target_model='Tender',
-            target_id=tender.tender_id,
-            details=f"Tender {tender.reference_number} submitted for review"
-        )
-        return tender
-
-    @staticmethod
-    def approve_tender(tender, user, comments=None):
-        """Approve tender"""
-        if not check_user_permission(user, 'manager'):
-            raise ValueError("User not authorized to approve tenders")
-            
-        if not validate_tender_status_transition(tender.status, 'approved'):
-            raise ValueError("Invalid status transition")
-        
-        tender.status = 'approved'
-        tender.save()
-        
-        # Create approval record
-        Approval.objects.create(
-            tender=tender,
-            approver=user,
-            status='approved',
-            comments=comments
-        )
-        
-        create_audit_log(
-            user=user,
-            action='approve',
-            target_model='Tender',
-            target_id=tender.tender_id,
-            details=f"Tender {tender.reference_number} approved"
-        )
-        return tender
\ No newline at end of file
+    
\ No newline at end of file
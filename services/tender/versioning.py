@@ -0,0 +1,161 @@
+import calendar
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Q, Sum
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from ..auth.policy import policy_for
+from ..models import ChangeVersion
+
+# Every tender belongs to a company, so the global version is derived from
+# the company counters rather than kept in a row of its own that every
+# tender write would lock until its transaction commits
+GLOBAL_SCOPE = ('global', 0)
+
+
+def tender_scopes(tender):
+    """Every version scope whose representation includes this tender"""
+    scopes = {('tender', tender.pk)}
+    department_ids = {tender.__dict__.get('required_department_id')}
+    company_ids = {tender.__dict__.get('company_id')}
+    loaded = getattr(tender, '_loaded_scopes', None)
+    if loaded:
+        department_ids.add(loaded[0])
+        company_ids.add(loaded[1])
+    scopes |= {('department', pk) for pk in department_ids if pk is not None}
+    scopes |= {('company', pk) for pk in company_ids if pk is not None}
+    return scopes
+
+
+def bump_versions(scopes):
+    """Increment the counters for `scopes` in one UPDATE, creating missing rows"""
+    scopes = set(scopes)
+    if not scopes:
+        return
+    condition = reduce(or_, (Q(scope=scope, scope_id=scope_id) for scope, scope_id in scopes))
+    now = timezone.now()
+    updated = ChangeVersion.objects.filter(condition).update(version=F('version') + 1, updated_at=now)
+    if updated == len(scopes):
+        return
+
+    existing = set(ChangeVersion.objects.filter(condition).values_list('scope', 'scope_id'))
+    for scope, scope_id in scopes - existing:
+        try:
+            with transaction.atomic():
+                ChangeVersion.objects.create(scope=scope, scope_id=scope_id, version=1)
+        except IntegrityError:
+            # Another process created it between our UPDATE and INSERT
+            ChangeVersion.objects.filter(scope=scope, scope_id=scope_id).update(
+                version=F('version') + 1, updated_at=now
+            )
+
+
+def tender_version_scope(user, pk=None):
+    """Scope covering one tender, or every tender `user` can list"""
+    if pk is not None:
+        return ('tender', int(pk))
+    if policy_for(user).sees_all('tender'):
+        return GLOBAL_SCOPE
+    return ('department', user.department_id)
+
+
+def bump_tender_versions(tender):
+    bump_versions(tender_scopes(tender))
+
+
+def _global_row(totals):
+    # Company counters only ever grow, so their sum changes on every bump
+    return (totals['version'], totals['updated_at']) if totals['version'] else (0, None)
+
+
+def get_version(scope, scope_id):
+    """(version, updated_at) for a scope; (0, None) if it never changed"""
+    if (scope, scope_id) == GLOBAL_SCOPE:
+        return _global_row(ChangeVersion.objects.filter(scope='company').aggregate(
+            version=Sum('version'), updated_at=Max('updated_at')
+        ))
+    row = (
+        ChangeVersion.objects.filter(scope=scope, scope_id=scope_id)
+        .values_list('version', 'updated_at')
+        .first()
+    )
+    return row or (0, None)
+
+
+async def aget_version(scope, scope_id):
+    if (scope, scope_id) == GLOBAL_SCOPE:
+        return _global_row(await ChangeVersion.objects.filter(scope='company').aaggregate(
+            version=Sum('version'), updated_at=Max('updated_at')
+        ))
+    row = await (
+        ChangeVersion.objects.filter(scope=scope, scope_id=scope_id)
+        .values_list('version', 'updated_at')
+        .afirst()
+    )
+    return row or (0, None)
+
+
+def etag_variant(request, accepted_media_type=''):
+    # The representation also depends on who asks, the query string
+    # (filters, sparse fieldsets), the host (absolute file URLs) and the
+    # negotiated renderer
+    key = '|'.join([
+        str(request.user.pk),
+        request.get_full_path(),
+        request.get_host(),
+        accepted_media_type or '',
+    ])
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def conditional_response(request, version_scope, version_row, variant):
+    """Return (304_response_or_None, validators) for one scope's (version, updated_at)"""
+    scope, scope_id = version_scope
+    version, updated_at = version_row
+    etag = quote_etag(f'{scope}-{scope_id}-{version}-{variant}')
+    last_modified = calendar.timegm(updated_at.utctimetuple()) if updated_at else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return response, (etag, last_modified)
+
+
+def set_validators(response, validators):
+    if validators is None:
+        return response
+    etag, last_modified = validators
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match/If-Modified-Since for list and retrieve from the
+    ChangeVersion counter of the view's scope, before any tender query runs.
+    Views implement get_version_scope() returning (scope, scope_id).
+    """
+
+    def get_version_scope(self):
+        """Return (scope, scope_id), or None to skip conditional handling"""
+        raise NotImplementedError
+
+    def get_etag_variant(self):
+        return etag_variant(self.request, getattr(self.request, 'accepted_media_type', ''))
+
+    def check_not_modified(self):
+        """Return (response_or_None, validators) for the current request"""
+        version_scope = self.get_version_scope()
+        if version_scope is None:
+            return None, None
+        return conditional_response(
+            self.request, version_scope, get_version(*version_scope), self.get_etag_variant()
+        )
+
+    def set_validators(self, response, validators):
+        return set_validators(response, validators)
@@ -1,53 +1,156 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Q
-from ..models import Tender, Document, Approval 
-from .serializers import TenderSerializer, TenderDocumentSerializer
-from .utils import TenderProcessManager, check_user_permission, generate_reference_number
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from ..models import Tender, TenderTimeline, Document, Approval, User
+from ..auth.policy import allows
+from ..auth.utils import async_jwt_required
+from ..deletion.jobs import pending_deletion
+from ..deletion.views import deletion_conflict
+from ..documents.search import search_documents as find_documents
+from ..evaluation.scoring import evaluations, submit_scores
+from ..matching.index import cv_index
+from ..matching.profiles import tender_vector
+from ..renderers import FastJSONRenderer, json_response
+from .history import MAX_LIMIT as HISTORY_MAX_LIMIT, tender_history
+from .idempotency import idempotent
+from .projections import TenderProjection
+from .serializers import (
+    EvaluationCriterionSerializer, TenderSerializer, TenderDocumentSerializer, TenderTimelineSerializer,
+    select_tender_fields
+)
+from .utils import TenderProcessManager, generate_reference_number, visible_tenders
+from .signals import tender_transitioned
+from .versioning import (
+    ConditionalGetMixin, aget_version, conditional_response, etag_variant, set_validators, tender_version_scope
+)
 from django.core.exceptions import ValidationError
 
-class TenderViewSet(viewsets.ModelViewSet):
+DOCUMENT_SEARCH_MAX_LIMIT = 50
+CANDIDATES_MAX_LIMIT = 100
+
+class TenderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TenderSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         """Filter tenders based on user's role and department"""
-        user = self.request.user
-        
-        # Base queryset based on user role
-        if user.role == 'admin':
-            queryset = Tender.objects.all()
-        elif user.role == 'manager':
-            queryset = Tender.objects.filter(required_department=user.department)
-        else:
-            queryset = Tender.objects.filter(
-                required_department=user.department,
-                created_by=user
-            )
-        # Apply filters from query parameters
-        status = self.request.query_params.get('status', None)
-        category = self.request.query_params.get('category', None)
-        search = self.request.query_params.get('search', None)
-        
-        if status:
-            queryset = queryset.filter(status=status)
-        if category:
-            queryset = queryset.filter(category=category)
-        if search:
-            queryset = queryset.filter(
-                Q(tender_name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(reference_number__icontains=search)
-            )
-            
+        queryset = visible_tenders(self.request.user, self.request.query_params)
+
+        # Load nested relations up front so serializing is a fixed number of
+        # queries rather than three per tender. Write actions skip this: they
+        # change documents/approvals after the object is fetched.
+        if self.action == 'retrieve':
+            queryset = self.restrict_to_fields(queryset, self.get_requested_fields())
         return queryset.order_by('-created_at')
+
+    def get_requested_fields(self):
+        """Field subset from ?fields=/?expand=, or None for everything"""
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = select_tender_fields(
+                self.request.query_params.get('fields'),
+                self.request.query_params.get('expand'),
+            )
+        return self._requested_fields
+
+    def restrict_to_fields(self, queryset, fields):
+        """Prefetch only the requested relations and defer unrequested columns"""
+        nested = TenderSerializer.EXPANDABLE_FIELDS if fields is None else [
+            name for name in TenderSerializer.EXPANDABLE_FIELDS if name in fields
+        ]
+        prefetches = {
+            'documents': Prefetch('documents', queryset=Document.objects.order_by('document_id')),
+            'approvals': Prefetch('approvals', queryset=Approval.objects.order_by('approval_id')),
+        }
+        queryset = queryset.prefetch_related(*[prefetches[name] for name in nested if name in prefetches])
+        if 'timeline' in nested:
+            queryset = queryset.select_related('timeline')
+        if fields is not None:
+            columns = {'tender_id'} | (set(fields) - set(TenderSerializer.EXPANDABLE_FIELDS))
+            if 'timeline' in nested:
+                columns |= {f'timeline__{field.name}' for field in TenderTimeline._meta.concrete_fields}
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def handle_exception(self, exc):
+        # Bad ?fields=/?expand= values use the viewset's usual error envelope
+        if isinstance(exc, DRFValidationError) and self.action in ('list', 'retrieve', 'export'):
+            return Response({
+                'message': 'Invalid field selection',
+                'errors': exc.detail,
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return super().handle_exception(exc)
+
+    def get_version_scope(self):
+        """ChangeVersion scope covering everything this request can return"""
+        if self.action == 'retrieve':
+            pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            return tender_version_scope(self.request.user, pk) if str(pk).isdigit() else None
+        return tender_version_scope(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        """List tenders through the values() projection, same output as TenderSerializer"""
+        not_modified, validators = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+        queryset = self.filter_queryset(self.get_queryset())
+        projection = TenderProjection(request=request, field_names=self.get_requested_fields())
+        return self.set_validators(Response(projection.serialize(queryset)), validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        not_modified, validators = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+        tender = self.get_object()
+        serializer = self.get_serializer(tender, fields=self.get_requested_fields())
+        return self.set_validators(Response(serializer.data), validators)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every visible tender as one JSON array"""
+        not_modified, validators = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+        projection = TenderProjection(request=request, field_names=self.get_requested_fields())
+        rows = projection.iter_rows(self.filter_queryset(self.get_queryset()))
+        renderer = FastJSONRenderer()
+
+        def stream():
+            yield b'['
+            for index, row in enumerate(rows):
+                yield (b',' if index else b'') + renderer.render(row)
+            yield b']'
+
+        response = StreamingHttpResponse(stream(), content_type='application/json')
+        response['Content-Disposition'] = f'attachment; filename="tenders-{timezone.now():%Y%m%d}.json"'
+        return self.set_validators(response, validators)
     
+    def pending_deletion(self, data, tender=None):
+        """
+        Deletion job of the company or department a tender write lands under:
+        its own, or for a new tender its creator's, whose tenders go with them
+        """
+        def target_id(field):
+            if field in data:
+                return data[field].pk if data[field] is not None else None
+            return getattr(tender, f'{field}_id', None)
+
+        company_ids, department_ids = [target_id('company')], [target_id('required_department')]
+        if tender is None:
+            company_ids.append(self.request.user.company_id)
+            department_ids.append(self.request.user.department_id)
+        return pending_deletion(company_ids, department_ids)
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         """Create a new tender"""
-        if not check_user_permission(request.user, 'manager'):
+        if not allows(request.user, 'tender', 'create'):
             return Response({
                 'message': 'Not authorized to create tenders',
                 'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -59,6 +162,9 @@ class TenderViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(data=data)
         if serializer.is_valid():
+            job = self.pending_deletion(serializer.validated_data)
+            if job is not None:
+                return deletion_conflict(job)
             reference_number = generate_reference_number()
             
             tender = serializer.save(
@@ -66,6 +172,7 @@ class TenderViewSet(viewsets.ModelViewSet):
                 reference_number=reference_number,
                 status='draft'
             )
+            tender_transitioned.send(sender=TenderViewSet, tender=tender, user=request.user, previous_status=None)
             
             return Response({
                 'message': 'Tender created successfully',
@@ -84,7 +191,7 @@ class TenderViewSet(viewsets.ModelViewSet):
         tender = self.get_object()
         
         # Only creator or manager can update tender
-        if not (request.user == tender.created_by or check_user_permission(request.user, 'manager')):
+        if not allows(request.user, 'tender', 'update', tender.created_by_id):
             return Response({
                 'message': 'Not authorized to update this tender',
                 'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -100,6 +207,9 @@ class TenderViewSet(viewsets.ModelViewSet):
             
         serializer = self.get_serializer(tender, data=request.data, partial=True)
         if serializer.is_valid():
+            job = self.pending_deletion(serializer.validated_data, tender)
+            if job is not None:
+                return deletion_conflict(job)
             tender = serializer.save()
             return Response({
                 'message': 'Tender updated successfully',
@@ -113,7 +223,7 @@ class TenderViewSet(viewsets.ModelViewSet):
         tender = self.get_object()
         
         # Only admin or creator can delete tender
-        if not (request.user == tender.created_by or check_user_permission(request.user, 'admin')):
+        if not allows(request.user, 'tender', 'destroy', tender.created_by_id):
             return Response({
                 'message': 'Not authorized to delete this tender',
                 'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -136,6 +246,7 @@ class TenderViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
+    @idempotent
     def submit_for_review(self, request, pk=None):
         """Submit tender for review"""
         tender = self.get_object()
@@ -152,6 +263,7 @@ class TenderViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def approve(self, request, pk=None):
         """Approve tender"""
         tender = self.get_object()
@@ -189,6 +301,151 @@ class TenderViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['get'])
+    def search_documents(self, request):
+        """Search the extracted text of documents on the tenders visible to the user"""
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= DOCUMENT_SEARCH_MAX_LIMIT:
+            return Response({
+                'message': f'limit must be between 1 and {DOCUMENT_SEARCH_MAX_LIMIT}',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            results = find_documents(
+                visible_tenders(request.user, {}), request.query_params.get('q', ''), limit
+            )
+        except ValueError as e:
+            return Response({
+                'message': str(e),
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'results': results,
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    @action(detail=True, methods=['get'])
+    def candidates(self, request, pk=None):
+        """Users whose CVs best match the tender, from its required department unless ?department=any"""
+        if not allows(request.user, 'tender', 'candidates'):
+            return Response({
+                'message': 'Not authorized to view candidates',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_403_FORBIDDEN)
+        tender = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= CANDIDATES_MAX_LIMIT:
+            return Response({
+                'message': f'limit must be between 1 and {CANDIDATES_MAX_LIMIT}',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        users = User.objects.filter(is_active=True)
+        if request.query_params.get('department') != 'any':
+            users = users.filter(department_id=tender.required_department_id)
+        ranked = cv_index.rank(tender_vector(tender), set(users.values_list('user_id', flat=True)), limit)
+        details = users.filter(user_id__in=[user_id for user_id, _, _ in ranked]).in_bulk()
+        return Response({
+            'tender_id': tender.tender_id,
+            'results': [
+                {
+                    'user_id': user_id,
+                    'first_name': details[user_id].first_name,
+                    'last_name': details[user_id].last_name,
+                    'email': details[user_id].email,
+                    'department_id': details[user_id].department_id,
+                    'score': round(score, 4),
+                    'matched_terms': matched,
+                }
+                for user_id, score, matched in ranked
+            ],
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    @action(detail=True, methods=['get', 'post'])
+    def criteria(self, request, pk=None):
+        """List the tender's evaluation criteria, or add one (managers)"""
+        tender = self.get_object()
+        if request.method == 'GET':
+            return Response(EvaluationCriterionSerializer(tender.criteria.order_by('criterion_id'), many=True).data)
+
+        if not allows(request.user, 'tender', 'define_criteria'):
+            return Response({
+                'message': 'Not authorized to define evaluation criteria',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_403_FORBIDDEN)
+        serializer = EvaluationCriterionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if tender.criteria.filter(name=serializer.validated_data['name']).exists():
+            return Response({
+                'message': 'A criterion with this name already exists for the tender',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save(tender=tender)
+        return Response({
+            'message': 'Criterion created successfully',
+            'data': serializer.data,
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def scores(self, request, pk=None):
+        """Record the current manager's scores for one bid: {'bid_id', 'scores': [{'criterion_id', 'score'}]}"""
+        if not allows(request.user, 'tender', 'score'):
+            return Response({
+                'message': 'Not authorized to score bids',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_403_FORBIDDEN)
+        tender = self.get_object()
+        bid_id = request.data.get('bid_id')
+        bid = None
+        if isinstance(bid_id, int):
+            bid = Document.objects.filter(tender=tender, document_type='bid', document_id=bid_id).first()
+        if bid is None:
+            return Response({
+                'message': 'bid_id must be a bid document of this tender',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        scores = request.data.get('scores')
+        if not isinstance(scores, list) or not all(isinstance(item, dict) for item in scores):
+            return Response({
+                'message': 'scores must be a list of {criterion_id, score, comments}',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            count = submit_scores(tender, bid, request.user, scores)
+        except ValueError as e:
+            return Response({
+                'message': str(e),
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': f'{count} score(s) recorded',
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    @action(detail=True, methods=['get'])
+    def ranking(self, request, pk=None):
+        """Bids ranked by weighted, outlier-trimmed evaluator scores"""
+        if not allows(request.user, 'tender', 'ranking'):
+            return Response({
+                'message': 'Not authorized to view bid rankings',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_403_FORBIDDEN)
+        tender = self.get_object()
+        return Response({
+            'tender_id': tender.tender_id,
+            'results': evaluations.ranking(tender.tender_id),
+            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
     @action(detail=True, methods=['get'])
     def timeline(self, request, pk=None):
         """Get tender timeline"""
@@ -196,7 +453,34 @@ class TenderViewSet(viewsets.ModelViewSet):
         timeline = tender.get_timeline()
         return Response(TenderTimelineSerializer(timeline).data)
     
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Audit entries, approvals, documents and timeline changes, newest first"""
+        tender = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= HISTORY_MAX_LIMIT:
+            return Response({
+                'message': f'limit must be between 1 and {HISTORY_MAX_LIMIT}',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            events, next_cursor = tender_history(tender.tender_id, request.query_params.get('cursor'), limit)
+        except ValueError:
+            return Response({
+                'message': 'Invalid cursor',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'tender_id': tender.tender_id,
+            'results': events,
+            'next_cursor': next_cursor
+        })
+
     @action(detail=True, methods=['post'])
+    @idempotent
     def award(self, request, pk=None):
         """Award tender"""
         tender = self.get_object()
@@ -218,6 +502,7 @@ class TenderViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def close(self, request, pk=None):
         """Close tender"""
         tender = self.get_object()
@@ -236,4 +521,56 @@ class TenderViewSet(viewsets.ModelViewSet):
         except ValueError as e:
             return Response({
                 'message': str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+
+# Async-native read endpoints for the ASGI deployment. Same output, filters,
+# sparse fieldsets and conditional GET handling as TenderViewSet.list and
+# retrieve, but a request waiting on the database holds no worker thread.
+
+def invalid_field_selection(exc):
+    return json_response({
+        'message': 'Invalid field selection',
+        'errors': exc.detail,
+        'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+async def render_tenders(request, queryset, version_scope, fields, single=False):
+    """Serialize `queryset` through the projection, answering 304 when unchanged"""
+    not_modified, validators = conditional_response(
+        request, version_scope, await aget_version(*version_scope), etag_variant(request)
+    )
+    if not_modified is not None:
+        return not_modified
+    projection = TenderProjection(request=request, field_names=fields)
+    data = await projection.aserialize(queryset)
+    if single:
+        if not data:
+            return json_response({
+                'message': 'Tender not found',
+                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, status=status.HTTP_404_NOT_FOUND)
+        data = data[0]
+    return set_validators(json_response(data), validators)
+
+@require_GET
+@async_jwt_required
+async def async_tender_list(request):
+    """List tenders (async)"""
+    try:
+        fields = select_tender_fields(request.GET.get('fields'), request.GET.get('expand'))
+    except DRFValidationError as exc:
+        return invalid_field_selection(exc)
+    queryset = visible_tenders(request.user, request.GET).order_by('-created_at')
+    return await render_tenders(request, queryset, tender_version_scope(request.user), fields)
+
+@require_GET
+@async_jwt_required
+async def async_tender_detail(request, pk):
+    """Retrieve one tender (async)"""
+    try:
+        fields = select_tender_fields(request.GET.get('fields'), request.GET.get('expand'))
+    except DRFValidationError as exc:
+        return invalid_field_selection(exc)
+    queryset = visible_tenders(request.user, request.GET).filter(pk=pk)
+    return await render_tenders(request, queryset, tender_version_scope(request.user, pk), fields, single=True)
@@ -9,7 +9,3 @@ def create_audit_log(user, action, target_model, target_id, details=None):
         target_id=target_id,
         details=details
     )
-
-def check_user_permission(user, required_role):
-    """Check if user has required role"""
-    return user.role == required_role
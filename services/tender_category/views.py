@@ -4,11 +4,14 @@ from rest_framework.response import Response
 from django.utils import timezone
 from ..models import TenderCategory
 from .serializers import TenderCategorySerializer
-from .utils import create_audit_log, check_user_permission
+from ..auth.policy import allows, visible
+from ..registry.reference_data import ReferenceDataConditionalGetMixin
+from .utils import create_audit_log
 
-class TenderCategoryViewSet(viewsets.ModelViewSet):
+class TenderCategoryViewSet(ReferenceDataConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TenderCategorySerializer
     permission_classes = [IsAuthenticated]
+    visibility_resource = 'category'
     queryset = TenderCategory.objects.all()
 
     def get_queryset(self):
@@ -16,7 +19,7 @@ class TenderCategoryViewSet(viewsets.ModelViewSet):
         Optionally restricts the returned categories,
         by filtering against a `name` query parameter in the URL.
         """
-        queryset = TenderCategory.objects.all()
+        queryset = visible(self.request.user, 'category', TenderCategory.objects.all())
         name = self.request.query_params.get('name', None)
         if name is not None:
             queryset = queryset.filter(name__icontains=name)
@@ -24,7 +27,7 @@ class TenderCategoryViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         # Only managers and admins can create categories
-        if not check_user_permission(request.user, 'manager') and not check_user_permission(request.user, 'admin'):
+        if not allows(request.user, 'category', 'create'):
             return Response({
                 'message': 'Not authorized to create tender categories',
                 'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -51,7 +54,7 @@ class TenderCategoryViewSet(viewsets.ModelViewSet):
 
     def update(self, request, *args, **kwargs):
         # Only managers and admins can update categories
-        if not check_user_permission(request.user, 'manager') and not check_user_permission(request.user, 'admin'):
+        if not allows(request.user, 'category', 'update'):
             return Response({
                 'message': 'Not authorized to update tender categories',
                 'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -80,7 +83,7 @@ class TenderCategoryViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         # Only admins can delete categories
-        if not check_user_permission(request.user, 'admin'):
+        if not allows(request.user, 'category', 'destroy'):
             return Response({
                 'message': 'Not authorized to delete tender categories',
                 'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -1,3 +1,1729 @@
-from django.test import TestCase
+import asyncio
+import decimal
+import gzip
+import io
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .audit.archive import archive_audit_logs, audit_entries
+from .benchmark.encoding import benchmark_encoding
+from .auth.tokens import TOKEN_MAX_AGE, make_token, prune_used_tokens, read_token
+from .deletion.jobs import run_deletion_jobs
+from .auth.policy import allows, policy_for, visible
+from .documents.extraction import extract_documents
+from .evaluation.scoring import TenderEvaluation, evaluations, trimmed_mean
+from .calendar.events import feeds, fold
+from .compression.middleware import ENCODERS, CompressionMiddleware, choose_encoding, compressed_bodies
+from .inbox.utils import rebuild_inboxes
+from .jobs.queue import TASKS, claim_jobs, enqueue, prune_jobs, requeue_stale_jobs, task, work
+from .jobs.worker import serve
+from .matching.index import CVIndex, cv_index
+from .matching.profiles import extract_cvs, term_vector
+from .notifications.utils import fan_out_events, send_digests
+from .models import (
+    Company, Department, TenderCategory, Tender, Document, Approval, User, ReferenceSequence,
+    AuditLog, AuditArchive, AuditArchiveTarget, InboxItem, InboxCounter, Notification, NotificationEvent, NotificationPreference,
+    DocumentText, DocumentTerm, CV, CVTerm, EvaluationCriterion, IdempotencyRecord, Job, ChangeVersion
+)
+from .profiling.budgets import get_query_budget
+from .profiling.query_inspector import inspect_queries
+from .realtime.broker import InProcessBroker
+from .realtime import broker as realtime_broker
+from .realtime.views import event_stream, tender_events
+from .parsers import FastJSONParser
+from .registry.reference_data import ReferenceDataRegistry, registry
+from .renderers import FastJSONRenderer, orjson
+from .tender.idempotency import prune_idempotency_records, request_fingerprint
+from .tender.projections import TenderProjection
+from .tender.references import ReferenceNumberAllocator
+from .tender.serializers import EvaluationCriterionSerializer, TenderSerializer
+from .tender.utils import TenderProcessManager, tender_visible_to
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def emailed_token(route):
+    """Token from the link in the latest email pointing at `route`, once queued emails are sent"""
+    work('tests')
+    for message in reversed(mail.outbox):
+        match = re.search(rf'/{route}/([^/\s]+)/', message.body)
+        if match:
+            return match.group(1)
+    raise AssertionError(f'No {route} link was emailed')
+
+
+class TenderFixturesMixin:
+    password = 'Str0ng-Passw0rd!'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
+            company_name='Acme', address='1 Main St', phone_number='123', email='info@acme.test'
+        )
+        cls.department = Department.objects.create(department_name='Works', description='Public works')
+        cls.category = TenderCategory.objects.create(name='Construction')
+        cls.admin = cls.make_user('admin@acme.test', 'admin')
+        cls.manager = cls.make_user('manager@acme.test', 'manager')
+        cls.other_manager = cls.make_user('manager2@acme.test', 'manager')
+        cls.staff = cls.make_user('staff@acme.test', 'staff')
+        cls.tenders = [cls.make_tender(f'Road {i}', status) for i, status in enumerate(
+            ['draft', 'draft', 'in_review', 'submitted', 'submitted', 'draft']
+        )]
+
+    @classmethod
+    def make_user(cls, email, role, **extra):
+        return User.objects.create_user(
+            email=email, password=cls.password, first_name=role.title(), last_name='User',
+            role=role, phone_number='123', address='1 Main St', department=cls.department,
+            company=cls.company, is_active=True, **extra
+        )
+
+    @classmethod
+    def make_tender(cls, name, status='draft'):
+        tender = Tender.objects.create(
+            tender_name=name, description=f'{name} resurfacing', reference_number=f'BTD-TEST-{name}',
+            budget='125000.50', deadline=timezone.now() + timedelta(days=30), status=status,
+            created_by=cls.manager, company=cls.company, category=cls.category,
+            required_department=cls.department
+        )
+        tender.get_timeline()
+        Document.objects.create(
+            tender=tender, uploader=cls.manager, document_type='spec', file=f'uploads/documents/spec/{name}.pdf'
+        )
+        Approval.objects.create(tender=tender, approver=cls.manager, status='approved', comments='ok')
+        return tender
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetTests(TenderFixturesMixin, TestCase):
+    """Every endpoint must stay within its budget in services/profiling/budgets.py"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Budgets cover the first request after a reference-data change
+        registry.invalidate()
+
+    def assertWithinBudget(self, view_name, method, call, expected_status=None, idempotency_key=False):
+        budget = get_query_budget(view_name, method, idempotency_key)
+        self.assertIsNotNone(budget, f'No query budget defined for {method} {view_name}')
+        with inspect_queries() as inspector:
+            response = call()
+        if expected_status is not None:
+            self.assertEqual(response.status_code, expected_status, getattr(response, 'data', None))
+        self.assertLessEqual(inspector.total, budget, inspector.report(f'{method} {view_name}'))
+        self.assertEqual(inspector.n_plus_one(), [], inspector.report(f'{method} {view_name}'))
+        return response
+
+    def test_auth_endpoints(self):
+        client = APIClient()
+        self.assertWithinBudget('register', 'POST', lambda: client.post(reverse('register'), {
+            'email': 'new@acme.test', 'password': self.password, 'password2': self.password,
+            'first_name': 'New', 'last_name': 'User', 'role': 'staff', 'phone_number': '1',
+            'address': 'x', 'department': self.department.pk, 'company': self.company.pk,
+        }), 201)
+        self.assertWithinBudget('token_obtain_pair', 'POST', lambda: client.post(
+            reverse('token_obtain_pair'), {'email': self.staff.email, 'password': self.password}
+        ), 200)
+        refresh = str(RefreshToken.for_user(self.staff))
+        self.assertWithinBudget('token_refresh', 'POST', lambda: client.post(
+            reverse('token_refresh'), {'refresh': refresh}
+        ), 200)
+        self.assertWithinBudget('resend-verification', 'POST', lambda: client.post(
+            reverse('resend-verification'), {'email': 'new@acme.test'}
+        ), 200)
+        token = emailed_token('verify-email')
+        self.assertWithinBudget('verify-email', 'GET', lambda: client.get(
+            reverse('verify-email', args=[token])
+        ), 200)
+        self.assertWithinBudget('request-password-reset', 'POST', lambda: client.post(
+            reverse('request-password-reset'), {'email': self.staff.email}
+        ), 200)
+        self.assertWithinBudget('change-password', 'POST', lambda: self.client_for(self.staff).post(
+            reverse('change-password'), {'old_password': self.password, 'new_password': 'An0ther-Passw0rd!'}
+        ), 200)
+        client.post(reverse('request-password-reset'), {'email': self.staff.email})
+        token = emailed_token('reset-password')
+        self.assertWithinBudget('reset-password', 'POST', lambda: client.post(
+            reverse('reset-password', args=[token]), {'new_password': 'Res3t-Passw0rd!'}
+        ), 200)
+
+    def test_reference_data_endpoints(self):
+        client = self.client_for(self.admin)
+        resources = [
+            ('company', {'company_name': 'Beta', 'address': 'x', 'phone_number': '1', 'email': 'b@b.test'}),
+            ('department', {'department_name': 'Roads', 'description': 'Roads'}),
+            ('tender-category', {'name': 'Supplies', 'description': 'Supplies'}),
+        ]
+        for basename, payload in resources:
+            list_url = reverse(f'{basename}-list')
+            self.assertWithinBudget(f'{basename}-list', 'GET', lambda: client.get(list_url), 200)
+            response = self.assertWithinBudget(f'{basename}-list', 'POST', lambda: client.post(list_url, payload), 201)
+            pk = next(iter(response.data['data'].values()))
+            detail_url = reverse(f'{basename}-detail', args=[pk])
+            self.assertWithinBudget(f'{basename}-detail', 'GET', lambda: client.get(detail_url), 200)
+            self.assertWithinBudget(f'{basename}-detail', 'PUT', lambda: client.put(detail_url, payload), 200)
+            self.assertWithinBudget(f'{basename}-detail', 'PATCH', lambda: client.patch(detail_url, payload), 200)
+            if basename == 'tender-category':
+                self.assertWithinBudget(f'{basename}-detail', 'DELETE', lambda: client.delete(detail_url), 200)
+                continue
+            # Companies and departments are queued for run_deletion_jobs
+            response = self.assertWithinBudget(f'{basename}-detail', 'DELETE', lambda: client.delete(detail_url), 202)
+            job_url = reverse('deletion-job', args=[response.data['job']['job_id']])
+            self.assertWithinBudget('deletion-job', 'GET', lambda: client.get(job_url), 200)
+
+    def test_tender_read_endpoints(self):
+        client = self.client_for(self.manager)
+        tender = self.tenders[0]
+        self.assertWithinBudget('tender-list', 'GET', lambda: client.get(reverse('tender-list')), 200)
+        self.assertWithinBudget('tender-export', 'GET', lambda: b''.join(
+            client.get(reverse('tender-export')).streaming_content
+        ))
+        self.assertWithinBudget('tender-detail', 'GET', lambda: client.get(
+            reverse('tender-detail', args=[tender.pk])
+        ), 200)
+        self.assertWithinBudget('tender-timeline', 'GET', lambda: client.get(
+            reverse('tender-timeline', args=[tender.pk])
+        ), 200)
+        self.assertWithinBudget('tender-history', 'GET', lambda: client.get(
+            reverse('tender-history', args=[tender.pk])
+        ), 200)
+        self.assertWithinBudget('inbox', 'GET', lambda: client.get(reverse('inbox')), 200)
+        self.assertWithinBudget('notifications', 'GET', lambda: client.get(reverse('notifications')), 200)
+        self.assertWithinBudget('tender-candidates', 'GET', lambda: client.get(
+            reverse('tender-candidates', args=[tender.pk])
+        ), 200)
+        self.assertWithinBudget('tender-search-documents', 'GET', lambda: client.get(
+            reverse('tender-search-documents'), {'q': 'road'}
+        ), 200)
+        self.assertWithinBudget('tender-criteria', 'GET', lambda: client.get(
+            reverse('tender-criteria', args=[tender.pk])
+        ), 200)
+        self.assertWithinBudget('tender-ranking', 'GET', lambda: client.get(
+            reverse('tender-ranking', args=[tender.pk])
+        ), 200)
+        self.assertWithinBudget('calendar', 'GET', lambda: client.get(
+            reverse('calendar'), {'end': (timezone.localdate() + timedelta(days=60)).isoformat()}
+        ), 200)
+        feed_url = self.assertWithinBudget(
+            'calendar-feed-url', 'GET', lambda: client.get(reverse('calendar-feed-url')), 200
+        ).data['url']
+        self.assertWithinBudget('calendar-feed', 'GET', lambda: b''.join(
+            APIClient().get(feed_url).streaming_content
+        ))
+
+    def test_tender_write_endpoints(self):
+        client = self.client_for(self.manager)
+        payload = {
+            'tender_name': 'Bridge', 'description': 'New bridge', 'budget': '990000.00',
+            'deadline': (timezone.now() + timedelta(days=60)).isoformat(), 'company': self.company.pk,
+            'category': self.category.pk, 'required_department': self.department.pk,
+        }
+        response = self.assertWithinBudget('tender-list', 'POST', lambda: client.post(
+            reverse('tender-list'), payload, format='json'
+        ), 201)
+        detail_url = reverse('tender-detail', args=[response.data['data']['tender_id']])
+        self.assertWithinBudget('tender-detail', 'PUT', lambda: client.put(detail_url, payload, format='json'), 200)
+        self.assertWithinBudget('tender-detail', 'PATCH', lambda: client.patch(
+            detail_url, {'tender_name': 'Bridge 2'}, format='json'
+        ), 200)
+        self.assertWithinBudget('tender-upload-document', 'POST', lambda: client.post(
+            reverse('tender-upload-document', args=[self.tenders[1].pk]),
+            {'document_type': 'bid', 'file': SimpleUploadedFile('bid.txt', b'bid')}, format='multipart'
+        ), 201)
+        self.assertWithinBudget('tender-submit-for-review', 'POST', lambda: client.post(
+            reverse('tender-submit-for-review', args=[self.tenders[1].pk])
+        ), 200)
+        self.assertWithinBudget('tender-approve', 'POST', lambda: client.post(
+            reverse('tender-approve', args=[self.tenders[2].pk]), {'comments': 'fine'}
+        ), 200)
+        self.assertWithinBudget('tender-award', 'POST', lambda: client.post(
+            reverse('tender-award', args=[self.tenders[3].pk])
+        ), 200)
+        self.assertWithinBudget('tender-close', 'POST', lambda: client.post(
+            reverse('tender-close', args=[self.tenders[4].pk])
+        ), 200)
+        self.assertWithinBudget('tender-detail', 'DELETE', lambda: client.delete(detail_url), 200)
+
+    def test_idempotent_and_batched_writes(self):
+        client = self.client_for(self.manager)
+        payload = {
+            'tender_name': 'Bridge', 'description': 'New bridge', 'budget': '990000.00',
+            'deadline': (timezone.now() + timedelta(days=60)).isoformat(), 'company': self.company.pk,
+            'category': self.category.pk, 'required_department': self.department.pk,
+        }
+        response = self.assertWithinBudget('tender-list', 'POST', lambda: client.post(
+            reverse('tender-list'), payload, format='json', HTTP_IDEMPOTENCY_KEY='create'
+        ), 201, idempotency_key=True)
+        tender_id = response.data['data']['tender_id']
+        self.assertWithinBudget('tender-submit-for-review', 'POST', lambda: client.post(
+            reverse('tender-submit-for-review', args=[tender_id]), HTTP_IDEMPOTENCY_KEY='submit'
+        ), 200, idempotency_key=True)
+        # Deleting a tender with a timeline, documents and an approval bumps its versions once
+        for key, tender in (('delete', self.make_tender('Doomed')), (None, self.make_tender('Also doomed'))):
+            headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+            self.assertWithinBudget('tender-detail', 'DELETE', lambda: client.delete(
+                reverse('tender-detail', args=[tender.pk]), **headers
+            ), 200, idempotency_key=bool(key))
+
+        # A batch costs no more than its requests sent one by one, less their JWT lookups
+        draft = self.make_tender('Batched')
+        with inspect_queries() as inspector:
+            results = client.post(reverse('batch'), {'requests': [
+                {'method': 'POST', 'path': reverse('tender-list'), 'body': {**payload, 'tender_name': 'Tunnel'},
+                 'headers': {'Idempotency-Key': 'batch-create'}},
+                {'method': 'PATCH', 'path': reverse('tender-detail', args=[draft.pk]), 'body': {'tender_name': 'B'}},
+                {'method': 'POST', 'path': reverse('tender-submit-for-review', args=[draft.pk]),
+                 'headers': {'Idempotency-Key': 'batch-submit'}},
+            ]}, format='json').json()['responses']
+        self.assertEqual([result['status'] for result in results], [201, 200, 200])
+        self.assertLessEqual(inspector.total, 1 + sum(
+            get_query_budget(view_name, method, idempotency_key) - 1 for view_name, method, idempotency_key in [
+                ('tender-list', 'POST', True), ('tender-detail', 'PATCH', False),
+                ('tender-submit-for-review', 'POST', True),
+            ]
+        ), inspector.report('POST batch'))
+
+    def test_evaluation_endpoints(self):
+        client = self.client_for(self.manager)
+        tender = self.tenders[3]
+        response = self.assertWithinBudget('tender-criteria', 'POST', lambda: client.post(
+            reverse('tender-criteria', args=[tender.pk]), {'name': 'Price', 'weight': 3, 'max_score': 10},
+            format='json'
+        ), 201)
+        bid = Document.objects.create(tender=tender, uploader=self.staff, document_type='bid', file='bid.pdf')
+        self.assertWithinBudget('tender-scores', 'POST', lambda: client.post(
+            reverse('tender-scores', args=[tender.pk]),
+            {'bid_id': bid.pk, 'scores': [{'criterion_id': response.data['data']['criterion_id'], 'score': 7}]},
+            format='json'
+        ), 200)
+
+    def test_notification_endpoints(self):
+        TenderProcessManager.submit_for_review(self.tenders[0], self.staff)
+        fan_out_events()
+        client = self.client_for(self.manager)
+        self.assertWithinBudget('notifications-read', 'POST', lambda: client.post(
+            reverse('notifications-read'), {}, format='json'
+        ), 200)
+        url = reverse('notification-preferences')
+        self.assertWithinBudget('notification-preferences', 'GET', lambda: client.get(url), 200)
+        # The first PUT creates the row, later ones update it
+        for digest in ('daily', 'immediate'):
+            self.assertWithinBudget('notification-preferences', 'PUT', lambda: client.put(
+                url, {'digest': digest}, format='json'
+            ), 200)
+
+    def test_async_read_endpoints(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.manager)}'}
+        tender = self.tenders[0]
+        for view_name, args in [
+            ('async-company-list', []), ('async-company-detail', [self.company.pk]),
+            ('async-department-list', []), ('async-department-detail', [self.department.pk]),
+            ('async-tender-list', []), ('async-tender-detail', [tender.pk]),
+        ]:
+            self.assertWithinBudget(view_name, 'GET', lambda: async_to_sync(self.async_client.get)(
+                reverse(view_name, args=args), headers=headers
+            ), 200)
+
+
+class JSONCodecTests(TestCase):
+    def test_renderer_matches_drf(self):
+        data = {
+            'budget': decimal.Decimal('125000.50'), 'ratio': 0.25, 'none': None, 'id': uuid.UUID(int=7),
+            'at': timezone.now(), 'day': timezone.localdate(), 'text': 'line\u2028break', 'nested': [{'x': (1, 2)}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertIn(b'"budget":125000.5,', FastJSONRenderer().render(data))
+
+    def test_renderer_rejects_non_finite_decimals(self):
+        for value in (decimal.Decimal('NaN'), decimal.Decimal('Infinity'), decimal.Decimal('-Infinity')):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({'rows': [{'score': value}]})
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({'rows': [{'score': value}]})
+
+    def test_float_fields_reject_non_finite_input(self):
+        for value in ('nan', 'inf', '-inf'):
+            serializer = EvaluationCriterionSerializer(data={'name': 'Risk', 'weight': value, 'max_score': value})
+            self.assertFalse(serializer.is_valid())
+            self.assertEqual(set(serializer.errors), {'weight', 'max_score'})
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_fast_encode_is_faster(self):
+        results = benchmark_encoding(count=2000, repeat=3)
+        self.assertTrue(results['identical'])
+        self.assertLess(results['codecs']['fast']['encode_ms'], results['codecs']['stdlib']['encode_ms'])
+
+    def test_parser_matches_drf(self):
+        body = '{"name":"Bridge","budget":125000.5,"tags":["a","\u00e9"],"none":null}'.encode()
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), {
+            'name': 'Bridge', 'budget': 125000.5, 'tags': ['a', '\u00e9'], 'none': None,
+        })
+        latin1 = '{"name":"Caf\u00e9"}'.encode('latin-1')
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(latin1), parser_context={'encoding': 'latin-1'}),
+                         {'name': 'Caf\u00e9'})
+
+    def test_parser_rejects_invalid_json(self):
+        for body in (b'{"score": NaN}', b'{"score": Infinity}', b'{"score": 1', b'\xff'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
+
+
+class TenderProjectionTests(TenderFixturesMixin, TestCase):
+    def test_output_is_byte_identical_to_serializer(self):
+        bare = Tender.objects.create(
+            tender_name='Bare', description='No timeline', reference_number='BTD-TEST-BARE',
+            budget='7', deadline=timezone.now(), created_by=self.manager, company=self.company
+        )
+        Document.objects.create(tender=bare, uploader=self.staff, document_type='other', file='', description='empty')
+        Approval.objects.create(tender=bare, approver=self.staff, status='rejected')
+        queryset = Tender.objects.order_by('-created_at')
+        request = APIRequestFactory().get('/api/tenders/')
+        renderer = FastJSONRenderer()
+
+        expected = renderer.render(TenderSerializer(queryset, many=True, context={'request': request}).data)
+        self.assertEqual(renderer.render(TenderProjection(request).serialize(queryset)), expected)
+        self.assertEqual(renderer.render(list(TenderProjection(request).iter_rows(queryset, chunk_size=2))), expected)
+        self.assertEqual(
+            renderer.render(TenderProjection().serialize(queryset)),
+            renderer.render(TenderSerializer(queryset, many=True).data)
+        )
+
+
+class SparseFieldsetTests(TenderFixturesMixin, TestCase):
+    def test_fields_limit_payload_and_queries(self):
+        client = self.client_for(self.manager)
+        params = {'fields': 'tender_id,tender_name,status,deadline'}
+        with inspect_queries() as inspector:
+            response = client.get(reverse('tender-list'), params)
+        self.assertEqual(set(response.data[0]), {'tender_id', 'tender_name', 'status', 'deadline'})
+        # JWT user lookup, change version and the tender query; no prefetches
+        self.assertEqual(inspector.total, 3)
+        self.assertNotIn('description', next(s.shape for s in inspector.shapes.values() if 'tenders' in s.shape))
+
+        with inspect_queries() as inspector:
+            response = client.get(reverse('tender-detail', args=[self.tenders[0].pk]), params)
+        self.assertEqual(set(response.data), {'tender_id', 'tender_name', 'status', 'deadline'})
+        self.assertEqual(inspector.total, 3)
+
+    def test_expand_embeds_only_requested_relations(self):
+        client = self.client_for(self.manager)
+        params = {'fields': 'tender_id,status', 'expand': 'documents'}
+        response = client.get(reverse('tender-detail', args=[self.tenders[0].pk]), params)
+        self.assertEqual(list(response.data), ['tender_id', 'status', 'documents'])
+        self.assertEqual(len(response.data['documents']), 1)
+
+        response = client.get(reverse('tender-list'), {'expand': ''})
+        self.assertFalse({'timeline', 'documents', 'approvals'} & set(response.data[0]))
+        self.assertIn('description', response.data[0])
+
+        response = client.get(reverse('tender-list'), {'fields': 'tender_id,secret'})
+        self.assertEqual(response.status_code, 400)
+        response = client.get(reverse('tender-detail', args=[self.tenders[0].pk]), {'fields': 'status', 'expand': 'timeline'})
+        self.assertEqual(list(response.data), ['status', 'timeline'])
+        self.assertEqual(response.data['timeline']['tender'], self.tenders[0].pk)
+
+
+class ConditionalGetTests(TenderFixturesMixin, TestCase):
+    def test_unchanged_resources_return_304_from_version_lookup(self):
+        client = self.client_for(self.manager)
+        tender = self.tenders[0]
+        for url in [reverse('tender-list'), reverse('tender-detail', args=[tender.pk])]:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+
+            with inspect_queries() as inspector:
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            # JWT user lookup plus the change_versions row, no tender tables
+            self.assertEqual(inspector.total, 2)
+            self.assertFalse(any('tenders' in shape for shape in inspector.shapes))
+
+            Document.objects.create(tender=tender, uploader=self.manager, document_type='bid', file='x.pdf')
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_moving_a_tender_invalidates_old_department(self):
+        client = self.client_for(self.manager)
+        etag = client.get(reverse('tender-list'))['ETag']
+        tender = Tender.objects.get(pk=self.tenders[0].pk)
+        tender.required_department = Department.objects.create(department_name='Other', description='x')
+        tender.save()
+        self.assertEqual(client.get(reverse('tender-list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_admin_list_version_derives_from_company_counters(self):
+        client = self.client_for(self.admin)
+        etag = client.get(reverse('tender-list'))['ETag']
+        self.assertEqual(client.get(reverse('tender-list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Document.objects.create(tender=self.tenders[0], uploader=self.manager, document_type='bid', file='x.pdf')
+        self.assertEqual(client.get(reverse('tender-list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # No single row that every tender write would lock
+        self.assertFalse(ChangeVersion.objects.filter(scope='global').exists())
+
+
+class RealtimeFeedTests(TenderFixturesMixin, TestCase):
+    def setUp(self):
+        self.broker = InProcessBroker()
+        self._previous_broker, realtime_broker._broker = realtime_broker._broker, self.broker
+        self.addCleanup(setattr, realtime_broker, '_broker', self._previous_broker)
+
+    def test_transition_is_published_after_commit(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        async def subscribe():
+            return self.broker.subscribe()
+
+        subscription = loop.run_until_complete(subscribe())
+        with self.captureOnCommitCallbacks(execute=True):
+            TenderProcessManager.submit_for_review(self.tenders[0], self.manager)
+            self.assertEqual(subscription.queue.qsize(), 0)
+        event = loop.run_until_complete(subscription.get(timeout=1))
+        subscription.close()
+        self.assertEqual(event['type'], 'tender.transitioned')
+        self.assertEqual(event['tender_id'], self.tenders[0].pk)
+        self.assertEqual((event['previous_status'], event['status']), ('draft', 'in_review'))
+        self.assertEqual(event['actor_id'], self.manager.pk)
+
+    def test_event_stream_filters_by_visibility(self):
+        hidden = {'id': 1, 'type': 'tender.transitioned', 'tender_id': 99, 'required_department_id': -1,
+                  'created_by_id': self.manager.pk, 'status': 'draft'}
+        visible = dict(hidden, id=2, tender_id=self.tenders[0].pk, required_department_id=self.department.pk)
+
+        async def scenario():
+            stream = event_stream(self.manager)
+            self.assertTrue((await anext(stream)).startswith('retry: '))
+            pending = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0)
+            self.broker.publish(hidden)
+            self.broker.publish(visible)
+            chunk = await asyncio.wait_for(pending, 1)
+            await stream.aclose()
+            return chunk
+
+        chunk = asyncio.run(scenario())
+        self.assertTrue(chunk.startswith('id: 2\nevent: tender.transitioned\n'))
+        self.assertEqual(len(self.broker), 0)
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        async def scenario():
+            subscription = self.broker.subscribe(max_queue=2)
+            for i in range(3):
+                self.broker.publish({'id': i})
+            await asyncio.sleep(0)
+            events = [await subscription.get(timeout=1) for _ in range(2)]
+            subscription.close()
+            return events
+
+        self.assertEqual([event['id'] for event in asyncio.run(scenario())], [1, 2])
+
+
+
+class AsyncReadEndpointTests(TenderFixturesMixin, TestCase):
+    """The async read endpoints answer exactly like their DRF twins"""
+
+    def async_get(self, user, view_name, args=(), query='', **headers):
+        if user is not None:
+            headers['Authorization'] = f'Bearer {AccessToken.for_user(user)}'
+        with inspect_queries() as inspector:
+            response = async_to_sync(self.async_client.get)(
+                reverse(view_name, args=args) + query, headers=headers
+            )
+        self.assertLessEqual(inspector.total, get_query_budget(view_name, 'GET'), inspector.report(view_name))
+        return response
+
+    def assertSameAsSync(self, user, sync_name, async_name, args=(), query=''):
+        expected = self.client_for(user).get(reverse(sync_name, args=args) + query)
+        response = self.async_get(user, async_name, args, query)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        return response
+
+    def test_reference_data(self):
+        self.assertSameAsSync(self.staff, 'company-list', 'async-company-list')
+        self.assertSameAsSync(self.staff, 'company-detail', 'async-company-detail', [self.company.pk])
+        self.assertSameAsSync(self.staff, 'department-list', 'async-department-list')
+        self.assertSameAsSync(self.staff, 'department-detail', 'async-department-detail', [self.department.pk])
+        self.assertEqual(self.async_get(self.staff, 'async-company-detail', [0]).status_code, 404)
+
+    def test_tenders(self):
+        for user in (self.admin, self.manager, self.other_manager, self.staff):
+            self.assertSameAsSync(user, 'tender-list', 'async-tender-list')
+        self.assertSameAsSync(self.manager, 'tender-list', 'async-tender-list', query='?status=submitted&fields=name,status')
+        self.assertSameAsSync(self.manager, 'tender-detail', 'async-tender-detail', [self.tenders[2].pk])
+        self.assertSameAsSync(self.manager, 'tender-detail', 'async-tender-detail', [self.tenders[2].pk],
+                              query='?fields=status&expand=timeline')
+        self.assertEqual(self.async_get(self.manager, 'async-tender-detail', [0]).status_code, 404)
+        self.assertEqual(self.async_get(self.manager, 'async-tender-list', query='?fields=nope').status_code, 400)
+
+    def test_authentication_and_conditional_get(self):
+        self.assertEqual(self.async_get(None, 'async-tender-list').status_code, 401)
+        response = self.async_get(self.manager, 'async-tender-list')
+        cached = self.async_get(self.manager, 'async-tender-list', If_None_Match=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_query_string_token_only_on_event_feed(self):
+        token = AccessToken.for_user(self.manager)
+        self.assertEqual(self.async_get(None, 'async-tender-list', query=f'?token={token}').status_code, 401)
+        request = AsyncRequestFactory().get('/api/events/', {'token': str(token)})
+        response = async_to_sync(tender_events)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+
+class ReferenceNumberTests(TransactionTestCase):
+    """Runs outside a test transaction so blocks are cached as in production"""
+
+    def test_blocks_are_reserved_once_per_block_size(self):
+        allocator = ReferenceNumberAllocator(block_size=10)
+        today = timezone.localdate()
+        numbers = [allocator.next()]
+        with inspect_queries() as inspector:
+            numbers += [allocator.next() for _ in range(9)]
+        self.assertEqual(inspector.total, 0)
+        self.assertEqual(numbers[0], f"BTD-{today:%Y%m%d}-000001")
+        self.assertEqual(numbers, sorted(numbers))
+
+        other_process = ReferenceNumberAllocator(block_size=10)
+        self.assertEqual(other_process.next(), f"BTD-{today:%Y%m%d}-000011")
+        bulk = allocator.allocate(25)
+        self.assertEqual(len(set(bulk)), 25)
+        self.assertEqual(bulk[0], f"BTD-{today:%Y%m%d}-000021")
+        self.assertEqual(ReferenceSequence.objects.get().next_value, 46)
+
+    def test_inside_transaction_only_needed_numbers_are_reserved(self):
+        allocator = ReferenceNumberAllocator(block_size=10)
+        with transaction.atomic():
+            allocator.allocate(3)
+            transaction.set_rollback(True)
+        # The rolled back numbers were never cached, so they are issued again
+        self.assertEqual(allocator.next()[-6:], '000001')
+
+    def test_inside_transaction_blocks_are_reserved_apart(self):
+        allocator = ReferenceNumberAllocator(block_size=10)
+        # Stand in for a row-locking database; the caller has not written
+        # yet, so SQLite lets the separate connection commit
+        with mock.patch.object(type(connections['default']), 'vendor', 'postgresql'):
+            with transaction.atomic():
+                self.assertEqual(allocator.allocate(3)[-1][-6:], '000003')
+                transaction.set_rollback(True)
+        # The block was committed apart: the rollback leaves a gap, not a reuse
+        self.assertEqual(ReferenceSequence.objects.get().next_value, 11)
+        self.assertEqual(allocator.next()[-6:], '000004')
+
+    def test_existing_numeric_suffixes_are_skipped(self):
+        today = timezone.localdate()
+        company = Company.objects.create(company_name='Acme', address='x', phone_number='1', email='a@acme.test')
+        manager = User.objects.create_user(
+            email='ref@acme.test', password='x', first_name='R', last_name='U', role='manager',
+            phone_number='1', address='x', company=company,
+            department=Department.objects.create(department_name='Works', description='x')
+        )
+        Tender.objects.create(
+            tender_name='Old', description='x', reference_number=f"BTD-{today:%Y%m%d}-120000",
+            budget='1', deadline=timezone.now(), created_by=manager, company=company,
+            required_department=manager.department
+        )
+        self.assertEqual(ReferenceNumberAllocator().next()[-6:], '120001')
+
+
+class AuditArchiveTests(TestCase):
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root, ignore_errors=True)
+        settings_override = override_settings(AUDIT_LOG={'ARCHIVE_DIR': self.archive_root, 'CODEC': 'gz'})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        now = timezone.now()
+        self.logs = []
+        for index in range(30):
+            log = AuditLog.objects.create(
+                action='update', target_model='Tender', target_id=index % 3, details=f'change {index}'
+            )
+            # 30 rows spread one every 20 days, the oldest ~20 months ago
+            log.timestamp = now - timedelta(days=20 * (30 - index))
+            log.save(update_fields=['timestamp'])
+            self.logs.append(log)
+
+    def page_through(self, **filters):
+        seen, cursor = [], None
+        while True:
+            entries, cursor = audit_entries(cursor=cursor, limit=4, **filters)
+            seen += [entry['log_id'] for entry in entries]
+            if cursor is None:
+                return seen
+
+    def test_archive_then_page_across_hot_and_archived_rows(self):
+        expected = [log.log_id for log in sorted(self.logs, key=lambda log: log.timestamp, reverse=True)]
+        self.assertEqual(self.page_through(), expected)
+
+        archives = archive_audit_logs(retention_days=180, batch_size=3)
+        self.assertTrue(archives)
+        archived = sum(archive.row_count for archive in archives)
+        self.assertEqual(AuditLog.objects.count(), 30 - archived)
+        self.assertGreater(archived, 15)
+
+        self.assertEqual(self.page_through(), expected)
+        targets = {log.log_id: log.target_id for log in self.logs}
+        self.assertEqual(
+            self.page_through(target_model='Tender', target_id=1),
+            [log_id for log_id in expected if targets[log_id] == 1]
+        )
+        # Re-running is a no-op once everything old is archived
+        self.assertEqual(archive_audit_logs(retention_days=180), [])
+        self.assertEqual(AuditArchive.objects.count(), len(archives))
+
+    def test_target_reads_only_open_archives_holding_the_target(self):
+        archive_audit_logs(retention_days=180)
+        AuditLog.objects.create(action='update', target_model='Tender', target_id=99)
+        with mock.patch('services.audit.archive.read_archive') as read_archive:
+            self.assertEqual(len(self.page_through(target_model='Tender', target_id=99)), 1)
+        read_archive.assert_not_called()
+
+        # Archives written before targets were recorded are read until indexed
+        AuditArchiveTarget.objects.all().delete()
+        AuditArchive.objects.update(targets_indexed=False)
+        expected = self.page_through(target_model='Tender', target_id=2)
+        archive_audit_logs(retention_days=180)
+        self.assertFalse(AuditArchive.objects.filter(targets_indexed=False).exists())
+        self.assertEqual(self.page_through(target_model='Tender', target_id=2), expected)
+        with mock.patch('services.audit.archive.read_archive') as read_archive:
+            self.page_through(target_model='Tender', target_id=99)
+        read_archive.assert_not_called()
+
+
+class TenderHistoryTests(TenderFixturesMixin, TestCase):
+    def setUp(self):
+        self.tender = self.tenders[0]
+        TenderProcessManager.submit_for_review(self.tender, self.manager)
+        TenderProcessManager.approve_tender(self.tender, self.manager, comments='fine')
+        # Same timestamp across sources to exercise the tie-break
+        moment = timezone.now() - timedelta(days=1)
+        AuditLog.objects.filter(target_id=self.tender.pk).update(timestamp=moment)
+        Approval.objects.filter(tender=self.tender).update(created_at=moment)
+
+    def test_cursor_pages_match_single_page(self):
+        url = reverse('tender-history', args=[self.tender.pk])
+        client = self.client_for(self.manager)
+        everything = client.get(url, {'limit': 200}).json()['results']
+        self.assertGreaterEqual(len(everything), 6)
+        self.assertEqual(
+            {event['source'] for event in everything}, {'audit', 'approval', 'document', 'timeline'}
+        )
+        keys = [(event['timestamp'], event['source'], event['id']) for event in everything]
+        self.assertEqual(len(set(keys)), len(keys))
+
+        paged, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            body = client.get(url, params).json()
+            paged += body['results']
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(paged, everything)
+
+    def test_invalid_parameters(self):
+        client = self.client_for(self.manager)
+        url = reverse('tender-history', args=[self.tender.pk])
+        self.assertEqual(client.get(url, {'cursor': 'bogus'}).status_code, 400)
+        self.assertEqual(client.get(url, {'limit': 0}).status_code, 400)
+
+
+class InboxTests(TenderFixturesMixin, TestCase):
+    def inbox(self, user, **params):
+        response = self.client_for(user).get(reverse('inbox'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assertCountersMatchItems(self):
+        for counter in InboxCounter.objects.all():
+            items = InboxItem.objects.filter(user_id=counter.user_id)
+            self.assertEqual(counter.in_review, items.filter(status='in_review').count())
+            self.assertEqual(counter.submitted, items.filter(status='submitted').count())
+
+    def test_inbox_follows_transitions_and_assignments(self):
+        body = self.inbox(self.manager)
+        self.assertEqual(body['counts'], {'in_review': 1, 'submitted': 2, 'total': 3})
+        self.assertEqual({entry['tender_id'] for entry in body['results']},
+                         {tender.pk for tender in self.tenders if tender.status in ('in_review', 'submitted')})
+
+        draft = self.tenders[0]
+        TenderProcessManager.submit_for_review(draft, self.staff)
+        self.assertEqual(self.inbox(self.manager)['results'][0]['tender_id'], draft.pk)
+        TenderProcessManager.approve_tender(draft, self.manager)
+        self.assertEqual(self.inbox(self.manager)['counts']['total'], 3)
+
+        submitted = self.tenders[3]
+        submitted.assigned_to.remove(self.manager)
+        self.assertEqual(self.inbox(self.manager)['counts'], {'in_review': 1, 'submitted': 1, 'total': 2})
+        self.assertEqual(self.inbox(self.other_manager)['counts']['submitted'], 2)
+        self.assertEqual(self.inbox(self.staff)['counts']['total'], 0)
+
+        self.manager.assigned_tenders.add(submitted)
+        self.tenders[2].delete()
+        self.assertEqual(self.inbox(self.manager)['counts'], {'in_review': 0, 'submitted': 2, 'total': 2})
+        self.assertCountersMatchItems()
+
+        expected = list(InboxItem.objects.values_list('user_id', 'tender_id', 'status').order_by('pk'))
+        rebuild_inboxes()
+        self.assertEqual(
+            sorted(InboxItem.objects.values_list('user_id', 'tender_id', 'status')), sorted(expected)
+        )
+        self.assertCountersMatchItems()
+
+    def test_paging_and_filters(self):
+        first = self.inbox(self.manager, limit=2)
+        self.assertEqual(len(first['results']), 2)
+        rest = self.inbox(self.manager, limit=2, cursor=first['next_cursor'])
+        self.assertIsNone(rest['next_cursor'])
+        ids = [entry['tender_id'] for entry in first['results'] + rest['results']]
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(len(self.inbox(self.manager, status='in_review')['results']), 1)
+        client = self.client_for(self.manager)
+        self.assertEqual(client.get(reverse('inbox'), {'status': 'draft'}).status_code, 400)
+        self.assertEqual(client.get(reverse('inbox'), {'cursor': '!!'}).status_code, 400)
+
+    def test_transitions_assign_managers_who_joined_later(self):
+        newcomer = self.make_user('newcomer@acme.test', 'manager')
+        draft = self.tenders[0]
+        self.assertNotIn(newcomer, draft.assigned_to.all())
+        TenderProcessManager.submit_for_review(draft, self.staff)
+        self.assertIn(newcomer, draft.assigned_to.all())
+        self.assertEqual([entry['tender_id'] for entry in self.inbox(newcomer)['results']], [draft.pk])
+        self.assertCountersMatchItems()
+
+
+class NotificationTests(TenderFixturesMixin, TestCase):
+    def test_fan_out_coalesces_and_emails_digests(self):
+        draft = self.tenders[0]
+        TenderProcessManager.submit_for_review(draft, self.staff)
+        TenderProcessManager.approve_tender(draft, self.manager)
+        self.assertEqual(NotificationEvent.objects.count(), 2)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(fan_out_events(), 2)
+        self.assertFalse(NotificationEvent.objects.exists())
+        mine = Notification.objects.get(user=self.manager)
+        theirs = Notification.objects.get(user=self.other_manager)
+        self.assertEqual((mine.event_count, mine.status), (1, 'in_review'))
+        self.assertEqual((theirs.event_count, theirs.status), (2, 'approved'))
+        self.assertFalse(Notification.objects.filter(user=self.staff).exists())
+
+        # A later event within the window folds into the unread notification
+        TenderProcessManager.submit_for_review(self.tenders[1], self.staff)
+        TenderProcessManager.close_tender(self.tenders[3], self.other_manager)
+        fan_out_events()
+        self.assertEqual(Notification.objects.filter(user=self.manager).count(), 3)
+        self.assertEqual(Notification.objects.filter(user=self.other_manager).count(), 2)
+
+        NotificationPreference.objects.create(user=self.other_manager, digest='off')
+        self.assertEqual(send_digests(), 0)  # the burst has not settled yet
+        self.assertEqual(send_digests(timezone.now() + timedelta(minutes=10)), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.manager.email])
+        self.assertIn(draft.reference_number, mail.outbox[0].body)
+        self.assertFalse(Notification.objects.filter(email_state='pending').exists())
+        self.assertEqual(
+            set(Notification.objects.filter(user=self.other_manager).values_list('email_state', flat=True)),
+            {'skipped'}
+        )
+
+    def test_notification_endpoints(self):
+        TenderProcessManager.submit_for_review(self.tenders[0], self.staff)
+        TenderProcessManager.submit_for_review(self.tenders[1], self.staff)
+        fan_out_events()
+        client = self.client_for(self.manager)
+
+        body = client.get(reverse('notifications'), {'limit': 1}).json()
+        self.assertEqual(body['unread'], 2)
+        rest = client.get(reverse('notifications'), {'limit': 1, 'cursor': body['next_cursor']}).json()
+        self.assertIsNone(rest['next_cursor'])
+        first_id = body['results'][0]['notification_id']
+        self.assertNotEqual(first_id, rest['results'][0]['notification_id'])
+
+        response = client.post(reverse('notifications-read'), {'ids': [first_id]}, format='json')
+        self.assertEqual(response.json()['marked'], 1)
+        self.assertEqual(len(client.get(reverse('notifications'), {'unread': 'true'}).json()['results']), 1)
+        self.assertEqual(client.post(reverse('notifications-read'), {}, format='json').json()['marked'], 1)
+        self.assertEqual(client.post(reverse('notifications-read'), {'ids': 'x'}, format='json').status_code, 400)
+
+        self.assertEqual(client.get(reverse('notification-preferences')).json()['digest'], 'immediate')
+        client.put(reverse('notification-preferences'), {'digest': 'daily'}, format='json')
+        self.assertEqual(NotificationPreference.objects.get(user=self.manager).digest, 'daily')
+        self.assertEqual(
+            client.put(reverse('notification-preferences'), {'digest': 'weekly'}, format='json').status_code, 400
+        )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DocumentSearchTests(TenderFixturesMixin, TestCase):
+    @staticmethod
+    def docx(*paragraphs):
+        body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('word/document.xml', (
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f'<w:body>{body}</w:body></w:document>'
+            ))
+        return buffer.getvalue()
+
+    def upload(self, tender, name, content):
+        return Document.objects.create(
+            tender=tender, uploader=self.manager, document_type='spec', file=SimpleUploadedFile(name, content)
+        )
+
+    def search(self, user, query):
+        response = self.client_for(user).get(reverse('tender-search-documents'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [result['document_id'] for result in response.json()['results']]
+
+    def test_extracts_incrementally_and_searches_visible_documents(self):
+        spec = self.upload(self.tenders[0], 'spec.docx', self.docx('Asphalt resurfacing', 'Drainage works'))
+        notes = self.upload(self.tenders[1], 'notes.txt', b'Asphalt asphalt and kerbs')
+        other = Department.objects.create(department_name='Parks', description='Parks')
+        hidden_tender = Tender.objects.create(
+            tender_name='Park', description='Paths', reference_number='BTD-TEST-Park', budget='10',
+            deadline=timezone.now() + timedelta(days=30), created_by=self.admin, company=self.company,
+            required_department=other
+        )
+        hidden = self.upload(hidden_tender, 'hidden.txt', b'asphalt paths')
+
+        counts = extract_documents(workers=1)
+        # Fixture documents point at files that do not exist
+        self.assertEqual(counts['indexed'], 3)
+        self.assertEqual(counts['failed'], len(self.tenders))
+        self.assertEqual(DocumentText.objects.get(document=spec).text, 'Asphalt resurfacing\nDrainage works')
+        self.assertEqual(DocumentTerm.objects.get(document=notes, term='asphalt').frequency, 2)
+        self.assertEqual(extract_documents(workers=0), {})
+
+        notes.description = 'Site notes'
+        notes.save()
+        self.assertEqual(extract_documents(workers=0), {'unchanged': 1})
+
+        self.assertEqual(self.search(self.manager, 'ASPHALT'), [notes.pk, spec.pk])
+        self.assertEqual(self.search(self.manager, 'asphalt drainage'), [spec.pk])
+        self.assertEqual(self.search(self.admin, 'asphalt'), [notes.pk, hidden.pk, spec.pk])
+        self.assertEqual(self.search(self.staff, 'asphalt'), [])
+        response = self.client_for(self.manager).get(reverse('tender-search-documents'), {'q': 'drainage'})
+        self.assertIn('Drainage works', response.json()['results'][0]['snippet'])
+        self.assertEqual(
+            self.client_for(self.manager).get(reverse('tender-search-documents'), {'q': '-'}).status_code, 400
+        )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CVMatchingTests(TenderFixturesMixin, TestCase):
+    def add_cv(self, user, text):
+        return CV.objects.create(user=user, file=SimpleUploadedFile(f'cv-{user.pk}.txt', text.encode()))
+
+    def setUp(self):
+        cv_index.clear()
+        self.tender = self.tenders[0]
+        self.tender.description = 'Asphalt paving and drainage for the ring road'
+        self.tender.save()
+        self.paver = self.make_user('paver@acme.test', 'staff')
+        self.plumber = self.make_user('plumber@acme.test', 'staff')
+        self.add_cv(self.paver, 'Asphalt paving crews, road resurfacing, asphalt plant operations')
+        self.plumber_cv = self.add_cv(self.plumber, 'Drainage and sewer pipes; storm drainage design')
+        self.add_cv(self.manager, 'Project management and budgeting')
+        extract_cvs(workers=0)
+
+    def candidates(self, **params):
+        response = self.client_for(self.manager).get(reverse('tender-candidates', args=[self.tender.pk]), params)
+        self.assertEqual(response.status_code, 200)
+        return [(result['user_id'], result['matched_terms']) for result in response.json()['results']]
+
+    def test_term_vectors(self):
+        vector = term_vector('Asphalt asphalt and the road 2024')
+        self.assertEqual(set(vector), {'asphalt', 'road'})
+        self.assertGreater(vector['asphalt'], vector['road'])
+        self.assertAlmostEqual(sum(weight * weight for weight in vector.values()), 1.0)
+        self.assertEqual(CVTerm.objects.filter(cv__user=self.paver, term='asphalt').count(), 1)
+
+    def test_ranks_and_follows_cv_changes(self):
+        ranked = self.candidates()
+        self.assertEqual([user_id for user_id, _ in ranked], [self.paver.pk, self.plumber.pk])
+        self.assertIn('asphalt', ranked[0][1])
+        self.assertEqual(self.candidates(limit=1), ranked[:1])
+
+        # The same process picks up re-extracted and deactivated CVs
+        self.plumber_cv.file = SimpleUploadedFile('cv-new.txt', b'Asphalt asphalt paving road drainage')
+        self.plumber_cv.save()
+        self.assertEqual(extract_cvs(workers=0), {'indexed': 1})
+        self.assertEqual(self.candidates()[0][0], self.plumber.pk)
+        paver_cv = CV.objects.get(user=self.paver)
+        paver_cv.is_active = False
+        paver_cv.save()
+        self.assertEqual([user_id for user_id, _ in self.candidates()], [self.plumber.pk])
+
+        other = Department.objects.create(department_name='Parks', description='Parks')
+        User.objects.filter(pk=self.plumber.pk).update(department=other)
+        self.assertEqual(self.candidates(), [])
+        self.assertEqual([user_id for user_id, _ in self.candidates(department='any')], [self.plumber.pk])
+        self.assertEqual(CVIndex().rank(term_vector('sewer')), [])  # only the old plumber CV mentioned sewers
+
+    def test_staff_cannot_list_candidates(self):
+        response = self.client_for(self.staff).get(reverse('tender-candidates', args=[self.tender.pk]))
+        self.assertEqual(response.status_code, 403)
+
+
+class BidEvaluationTests(TenderFixturesMixin, TestCase):
+    def setUp(self):
+        evaluations.clear()
+        self.tender = self.tenders[3]
+        self.price = EvaluationCriterion.objects.create(tender=self.tender, name='Price', weight=3, max_score=10)
+        self.quality = EvaluationCriterion.objects.create(tender=self.tender, name='Quality', weight=1, max_score=5)
+        self.bids = [
+            Document.objects.create(
+                tender=self.tender, uploader=self.staff, document_type='bid', file=f'uploads/documents/bid/{i}.pdf'
+            )
+            for i in range(2)
+        ]
+
+    def score(self, user, bid, price, quality):
+        return self.client_for(user).post(reverse('tender-scores', args=[self.tender.pk]), {
+            'bid_id': bid.pk,
+            'scores': [
+                {'criterion_id': self.price.pk, 'score': price},
+                {'criterion_id': self.quality.pk, 'score': quality},
+            ]
+        }, format='json')
+
+    def ranking(self):
+        response = self.client_for(self.manager).get(reverse('tender-ranking', args=[self.tender.pk]))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_trimmed_mean(self):
+        self.assertEqual(trimmed_mean([1, 2]), 1.5)
+        self.assertEqual(trimmed_mean([0, 5, 5, 5, 10]), 5)
+
+    def test_weighted_ranking_follows_score_changes(self):
+        self.assertEqual(self.score(self.manager, self.bids[0], 10, 0).status_code, 200)
+        self.assertEqual(self.score(self.manager, self.bids[1], 5, 5).status_code, 200)
+        ranking = self.ranking()
+        self.assertEqual([row['bid_id'] for row in ranking], [self.bids[0].pk, self.bids[1].pk])
+        self.assertEqual(ranking[0]['score'], 75.0)
+        self.assertEqual(ranking[1]['criteria'], {'Price': 50.0, 'Quality': 100.0})
+
+        # A second evaluator and a changed score are applied incrementally
+        self.score(self.other_manager, self.bids[1], 10, 5)
+        self.score(self.manager, self.bids[0], 4, 0)
+        ranking = self.ranking()
+        self.assertEqual([row['bid_id'] for row in ranking], [self.bids[1].pk, self.bids[0].pk])
+        self.assertEqual((ranking[0]['score'], ranking[0]['evaluators']), (81.25, 2))
+        fresh = TenderEvaluation(self.tender.pk)
+        fresh.load()
+        self.assertEqual(fresh.ranking(), ranking)
+
+        # New criteria rebuild the cached evaluation
+        EvaluationCriterion.objects.create(tender=self.tender, name='Delivery', weight=4)
+        self.assertEqual(self.ranking()[0]['score'], 40.62)
+
+    def test_reload_does_not_hold_the_cache_lock(self):
+        load = TenderEvaluation.load
+
+        def checked_load(entry):
+            # Other tenders' rankings stay readable while this one queries
+            self.assertFalse(evaluations._lock.locked())
+            self.assertTrue(entry.lock.locked())
+            load(entry)
+
+        with mock.patch.object(TenderEvaluation, 'load', checked_load):
+            self.assertEqual(len(self.ranking()), 2)
+
+    def test_validation(self):
+        response = self.score(self.manager, self.bids[0], 11, 0)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.score(self.staff, self.bids[0], 1, 1).status_code, 403)
+        spec = self.tender.documents.exclude(document_type='bid').first()
+        self.assertEqual(self.score(self.manager, spec, 1, 1).status_code, 400)
+        self.tender.status = 'awarded'
+        self.tender.save()
+        self.assertEqual(self.score(self.manager, self.bids[0], 1, 1).status_code, 400)
+
+        client = self.client_for(self.manager)
+        url = reverse('tender-criteria', args=[self.tender.pk])
+        self.assertEqual(client.post(url, {'name': 'Price', 'weight': 1}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'name': 'Risk', 'weight': 0}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'name': 'Risk', 'weight': 2}, format='json').status_code, 201)
+        self.assertEqual([row['name'] for row in client.get(url).json()], ['Price', 'Quality', 'Risk'])
+
+
+class ReferenceDataRegistryTests(TenderFixturesMixin, TestCase):
+    def payload(self, **overrides):
+        return {
+            'tender_name': 'Bridge', 'description': 'New bridge', 'budget': '990000.00',
+            'deadline': (timezone.now() + timedelta(days=60)).isoformat(), 'company': self.company.pk,
+            'category': self.category.pk, 'required_department': self.department.pk, **overrides,
+        }
+
+    def test_serializer_validates_without_reference_queries(self):
+        registry.sync(force=True)
+        serializer = TenderSerializer(data=self.payload())
+        with inspect_queries() as inspector:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(inspector.total, 0)
+        self.assertEqual(serializer.validated_data['company'].company_name, 'Acme')
+        self.assertIsNot(serializer.validated_data['category'], registry.rows[TenderCategory][self.category.pk])
+
+        serializer = TenderSerializer(data=self.payload(company=0, category='x', required_department=None))
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {'company', 'category'})
+
+    def test_changes_reach_other_processes(self):
+        other = ReferenceDataRegistry()
+        self.assertEqual(other.get(Department, self.department.pk).department_name, 'Works')
+
+        # A miss re-reads the version counter, so new rows are found at once
+        department = Department.objects.create(department_name='Roads', description='Roads')
+        department_id = department.pk
+        self.assertEqual(other.get(Department, department_id).department_name, 'Roads')
+
+        # Renames and deletions show up once the copy is older than MAX_STALENESS
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.company_name = 'Acme Ltd'
+            self.company.save()
+            department.delete()
+        other.checked_at -= 60
+        self.assertEqual(other.get(Company, self.company.pk).company_name, 'Acme Ltd')
+        self.assertIsNone(other.get(Department, department_id))
+        self.assertIsNone(registry.version)
+        self.assertEqual(
+            self.client_for(self.manager).post(
+                reverse('tender-list'), self.payload(required_department=department_id), format='json'
+            ).status_code, 400
+        )
+        self.assertGreater(registry.version[0], 0)
+
+    def test_reloads_inside_a_transaction_are_not_kept(self):
+        registry.sync(force=True)
+        version = registry.version
+        with transaction.atomic():
+            department = Department.objects.create(department_name='Roads', description='Roads')
+            self.assertEqual(registry.get(Department, department.pk).department_name, 'Roads')
+            with inspect_queries() as inspector:
+                self.assertEqual(registry.get(Department, department.pk).department_name, 'Roads')
+            self.assertEqual(inspector.total, 0)
+            transaction.set_rollback(True)
+        # The process-wide copy never saw the rolled back row
+        self.assertEqual(registry.version, version)
+        self.assertNotIn(department.pk, registry.rows[Department])
+        self.assertIsNone(registry.get(Department, department.pk))
+
+    def test_lookup_survives_a_concurrent_invalidate(self):
+        other = ReferenceDataRegistry()
+        sync = other.sync
+
+        def sync_then_invalidate(force=False):
+            # Another thread invalidates between the sync and the lookup
+            rows = sync(force)
+            other.invalidate()
+            return rows
+
+        with mock.patch.object(other, 'sync', sync_then_invalidate):
+            self.assertEqual(other.get(Company, self.company.pk).company_name, 'Acme')
+            self.assertEqual([row.pk for row in other.all(Department)], [self.department.pk])
+            self.assertIsNone(other.get(TenderCategory, 0))
+
+
+class PolicyTests(TenderFixturesMixin, TestCase):
+    def test_filters_match_row_checks_without_queries(self):
+        parks = Department.objects.create(department_name='Parks', description='Parks')
+        Tender.objects.filter(pk=self.make_tender('Park path').pk).update(required_department=parks)
+        rows = list(Tender.objects.values('tender_id', 'required_department_id', 'created_by_id'))
+        for user in (self.admin, self.manager, self.staff):
+            with inspect_queries() as inspector:
+                queryset = visible(user, 'tender', Tender.objects.all())
+                self.assertIs(policy_for(user), policy_for(user))
+                self.assertEqual(allows(user, 'tender', 'update', self.manager.pk), user.role == 'manager')
+            self.assertEqual(inspector.total, 0)
+            self.assertEqual(
+                set(queryset.values_list('tender_id', flat=True)),
+                {row['tender_id'] for row in rows if tender_visible_to(
+                    user, row['required_department_id'], row['created_by_id']
+                )}
+            )
+        self.assertEqual(visible(self.admin, 'tender', Tender.objects.all()).count(), len(rows))
+        self.assertEqual(visible(self.manager, 'tender', Tender.objects.all()).count(), len(rows) - 1)
+        self.assertEqual(visible(self.staff, 'tender', Tender.objects.all()).count(), 0)
+
+    def test_reference_data_viewsets_are_scoped(self):
+        other = Company.objects.create(company_name='Beta', address='x', phone_number='1', email='b@b.test')
+        client = self.client_for(self.staff)
+        self.assertEqual([row['company_id'] for row in client.get(reverse('company-list')).json()], [self.company.pk])
+        self.assertEqual(client.get(reverse('company-detail', args=[other.pk])).status_code, 404)
+        self.assertEqual(len(self.client_for(self.admin).get(reverse('company-list')).json()), 2)
+
+        payload = {'department_name': 'Roads', 'description': 'Roads'}
+        self.assertEqual(self.client_for(self.manager).post(reverse('department-list'), payload).status_code, 403)
+        self.assertEqual(client.delete(reverse('company-detail', args=[self.company.pk])).status_code, 403)
+        self.assertEqual(self.client_for(self.admin).post(reverse('department-list'), payload).status_code, 201)
+
+        # Tenders: creators and managers update, creators and admins delete
+        tender = self.tenders[0]
+        url = reverse('tender-detail', args=[tender.pk])
+        self.assertEqual(self.client_for(self.other_manager).delete(url).status_code, 403)
+        self.assertEqual(self.client_for(self.other_manager).patch(url, {'tender_name': 'x'}).status_code, 200)
+        self.assertEqual(self.client_for(self.admin).delete(url).status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DeletionJobTests(TenderFixturesMixin, TestCase):
+    def test_company_is_removed_in_batches(self):
+        beta = Company.objects.create(company_name='Beta', address='x', phone_number='1', email='b@b.test')
+        users = [self.make_user(f'beta{i}@beta.test', 'manager') for i in range(3)]
+        User.objects.filter(pk__in=[user.pk for user in users]).update(company=beta)
+        for user in users:
+            tender = Tender.objects.create(
+                tender_name='Beta works', description='', reference_number=f'BTD-BETA-{user.pk}', budget='1',
+                deadline=timezone.now(), created_by=user, company=beta, required_department=self.department
+            )
+            Document.objects.create(tender=tender, uploader=user, document_type='bid',
+                                    file=SimpleUploadedFile(f'bid{user.pk}.txt', b'bid'))
+        # A bid on a tender of another company goes too, the tender stays
+        Document.objects.create(tender=self.tenders[0], uploader=users[0], document_type='bid',
+                                file=SimpleUploadedFile('foreign.txt', b'bid'))
+        files = list(Document.objects.filter(uploader__company=beta).values_list('file', flat=True))
+        storage = Document._meta.get_field('file').storage
+        self.assertTrue(all(storage.exists(name) for name in files))
+
+        client = self.client_for(self.admin)
+        url = reverse('company-detail', args=[beta.pk])
+        response = client.delete(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(client.delete(url).data['job']['job_id'], response.data['job']['job_id'])
+        self.assertTrue(Company.objects.filter(pk=beta.pk).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(run_deletion_jobs(batch_size=2), 1)
+        job = client.get(reverse('deletion-job', args=[response.data['job']['job_id']])).data
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual((job['deleted']['Tender'], job['deleted']['Document'], job['deleted']['User']), (3, 4, 3))
+        self.assertFalse(Company.objects.filter(pk=beta.pk).exists())
+        self.assertFalse(User.objects.filter(company=beta.pk).exists())
+        self.assertEqual(Tender.objects.count(), len(self.tenders))
+        self.assertFalse(any(storage.exists(name) for name in files))
+
+        # Only admins delete companies, and only they or the requester see the job
+        manager = self.client_for(self.manager)
+        self.assertEqual(manager.delete(reverse('company-detail', args=[self.company.pk])).status_code, 403)
+        self.assertEqual(manager.get(reverse('deletion-job', args=[job['job_id']])).status_code, 404)
+        self.assertEqual(run_deletion_jobs(), 0)
+
+    def test_writes_under_a_pending_deletion_conflict(self):
+        parks = Department.objects.create(department_name='Parks', description='Parks')
+        beta = Company.objects.create(company_name='Beta', address='x', phone_number='1', email='b@b.test')
+        admin = self.client_for(self.admin)
+        for url in (reverse('department-detail', args=[parks.pk]), reverse('company-detail', args=[beta.pk])):
+            self.assertEqual(admin.delete(url).status_code, 202)
+            response = admin.patch(url, {'description': 'Renamed'}, format='json')
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.data['job']['status'], 'pending')
+
+        registration = {
+            'email': 'new@acme.test', 'password': self.password, 'password2': self.password,
+            'first_name': 'New', 'last_name': 'User', 'role': 'staff', 'phone_number': '1',
+            'address': 'x', 'department': parks.pk, 'company': self.company.pk,
+        }
+        self.assertEqual(APIClient().post(reverse('register'), registration).status_code, 409)
+        self.assertEqual(APIClient().post(reverse('register'), {
+            **registration, 'department': self.department.pk, 'company': beta.pk,
+        }).status_code, 409)
+        self.assertFalse(User.objects.filter(email='new@acme.test').exists())
+
+        manager = self.client_for(self.manager)
+        payload = {
+            'tender_name': 'Park', 'description': 'Paths', 'budget': '10.00', 'company': beta.pk,
+            'deadline': (timezone.now() + timedelta(days=30)).isoformat(),
+        }
+        self.assertEqual(manager.post(reverse('tender-list'), payload, format='json').status_code, 409)
+        self.assertEqual(manager.post(reverse('tender-list'), {
+            **payload, 'company': self.company.pk, 'required_department': parks.pk,
+        }, format='json').status_code, 409)
+        draft = reverse('tender-detail', args=[self.tenders[0].pk])
+        self.assertEqual(manager.patch(draft, {'required_department': parks.pk}, format='json').status_code, 409)
+        self.assertEqual(manager.patch(draft, {'tender_name': 'Renamed'}, format='json').status_code, 200)
+        self.assertEqual(manager.post(reverse('tender-list'), {
+            **payload, 'company': self.company.pk,
+        }, format='json').status_code, 201)
+
+
+class SignedTokenTests(TenderFixturesMixin, TestCase):
+    def test_verification_token_is_single_use(self):
+        pending = self.make_user('pending@acme.test', 'staff')
+        User.objects.filter(pk=pending.pk).update(is_active=False)
+        token = make_token(pending, 'verify_email')
+        client = APIClient()
+        self.assertEqual(client.get(reverse('verify-email', args=[token + 'x'])).status_code, 400)
+        wrong_purpose = make_token(pending, 'reset_password')
+        self.assertEqual(client.get(reverse('verify-email', args=[wrong_purpose])).status_code, 400)
+        self.assertEqual(client.get(reverse('verify-email', args=[token])).status_code, 200)
+        self.assertTrue(User.objects.get(pk=pending.pk).is_active)
+
+        # Deactivated again, the spent token cannot reactivate the account
+        User.objects.filter(pk=pending.pk).update(is_active=False)
+        self.assertEqual(client.get(reverse('verify-email', args=[token])).status_code, 400)
+
+    def test_verification_can_be_resent(self):
+        pending = self.make_user('pending@acme.test', 'staff')
+        User.objects.filter(pk=pending.pk).update(is_active=False)
+        client = APIClient()
+        url = reverse('resend-verification')
+        self.assertEqual(client.post(url, {'email': 'nobody@acme.test'}).status_code, 404)
+        self.assertEqual(client.post(url, {'email': self.staff.email}).status_code, 400)
+        self.assertEqual(client.post(url, {'email': pending.email}).status_code, 200)
+        self.assertEqual(client.get(reverse('verify-email', args=[emailed_token('verify-email')])).status_code, 200)
+        self.assertTrue(User.objects.get(pk=pending.pk).is_active)
+
+    def test_reset_tokens_expire_and_die_with_the_password(self):
+        client = APIClient()
+        url = reverse('reset-password', args=[make_token(self.staff, 'reset_password')])
+        stale = reverse('reset-password', args=[make_token(self.staff, 'reset_password')])
+        self.assertEqual(client.post(url, {'new_password': '123'}).status_code, 400)
+        self.assertEqual(client.post(url, {'new_password': 'Res3t-Passw0rd!'}).status_code, 200)
+        self.assertTrue(User.objects.get(pk=self.staff.pk).check_password('Res3t-Passw0rd!'))
+        self.assertEqual(client.post(url, {'new_password': 'An0ther-Passw0rd!'}).status_code, 400)
+        self.assertEqual(client.post(stale, {'new_password': 'An0ther-Passw0rd!'}).status_code, 400)
+
+        with self.assertRaises(ValueError):
+            read_token(make_token(self.staff, 'verify_email'), 'reset_password')
+        token = make_token(self.staff, 'reset_password')
+        with mock.patch.dict(TOKEN_MAX_AGE, reset_password=timedelta(seconds=-1)):
+            self.assertRaises(ValueError, read_token, token, 'reset_password')
+        self.assertEqual(prune_used_tokens(timezone.now() + timedelta(hours=2)), 1)
+
+
+class IdempotencyTests(TenderFixturesMixin, TestCase):
+    def payload(self):
+        return {
+            'tender_name': 'Bridge', 'description': 'New bridge', 'budget': '990000.00',
+            'deadline': (timezone.now() + timedelta(days=60)).replace(microsecond=0).isoformat(),
+            'company': self.company.pk, 'category': self.category.pk, 'required_department': self.department.pk,
+        }
+
+    def test_replays_create_and_transitions(self):
+        client = self.client_for(self.manager)
+        payload = self.payload()
+        first = client.post(reverse('tender-list'), payload, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        self.assertEqual(first.status_code, 201)
+        with inspect_queries() as inspector:
+            replay = client.post(reverse('tender-list'), payload, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        self.assertLessEqual(inspector.total, 6)
+        self.assertEqual((replay.status_code, replay['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(replay.json()['data'], first.json()['data'])
+        self.assertEqual(Tender.objects.filter(tender_name='Bridge').count(), 1)
+
+        # Same key, different request; keys are per user
+        payload['tender_name'] = 'Tunnel'
+        self.assertEqual(client.post(
+            reverse('tender-list'), payload, format='json', HTTP_IDEMPOTENCY_KEY='create-1'
+        ).status_code, 422)
+        self.assertEqual(self.client_for(self.other_manager).post(
+            reverse('tender-list'), payload, format='json', HTTP_IDEMPOTENCY_KEY='create-1'
+        ).status_code, 201)
+
+        url = reverse('tender-submit-for-review', args=[self.tenders[0].pk])
+        self.assertEqual(client.post(url, HTTP_IDEMPOTENCY_KEY='submit-1').status_code, 200)
+        self.assertEqual(client.post(url, HTTP_IDEMPOTENCY_KEY='submit-1').status_code, 200)
+        self.assertEqual(client.post(url, HTTP_IDEMPOTENCY_KEY='submit-2').status_code, 400)
+        self.assertEqual(AuditLog.objects.filter(action='submit', target_id=self.tenders[0].pk).count(), 1)
+
+    def test_concurrent_and_abandoned_claims(self):
+        client = self.client_for(self.manager)
+        url = reverse('tender-submit-for-review', args=[self.tenders[0].pk])
+        fingerprint = request_fingerprint(SimpleNamespace(method='POST', path=url, data={}))
+        now = timezone.now()
+        claim = IdempotencyRecord.objects.create(
+            user=self.manager, key='busy', fingerprint=fingerprint, created_at=now, expires_at=now + timedelta(days=1)
+        )
+        response = client.post(url, HTTP_IDEMPOTENCY_KEY='busy')
+        self.assertEqual((response.status_code, response['Retry-After']), (409, '1'))
+
+        # The holder died: after LOCK_SECONDS a retry does the work
+        IdempotencyRecord.objects.filter(pk=claim.pk).update(created_at=now - timedelta(minutes=5))
+        self.assertEqual(client.post(url, HTTP_IDEMPOTENCY_KEY='busy').status_code, 200)
+        self.assertEqual(IdempotencyRecord.objects.get(pk=claim.pk).response_status, 200)
+        self.assertEqual(Tender.objects.get(pk=self.tenders[0].pk).status, 'in_review')
+        self.assertEqual(prune_idempotency_records(now + timedelta(days=2)), 1)
+
+
+class BatchTests(TenderFixturesMixin, TestCase):
+    page_load = ['tender-list', 'tender-category-list', 'department-list', 'company-list', 'inbox']
+
+    def test_page_load_in_one_round_trip(self):
+        client = self.client_for(self.manager)
+        direct, separate_queries = [], 0
+        # Both runs start from a cold registry, so they read the same rows
+        registry.invalidate()
+        for name in self.page_load:
+            with inspect_queries() as inspector:
+                direct.append(client.get(reverse(name)).json())
+            separate_queries += inspector.total
+        registry.invalidate()
+        with inspect_queries() as inspector:
+            response = client.post(reverse('batch'), {
+                'requests': [{'id': name, 'method': 'GET', 'path': reverse(name)} for name in self.page_load]
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['responses']
+        self.assertEqual([result['id'] for result in results], self.page_load)
+        self.assertEqual([result['status'] for result in results], [200] * len(self.page_load))
+        self.assertEqual([result['body'] for result in results], direct)
+        self.assertIn('ETag', results[0]['headers'])
+        # The user is authenticated once for the whole batch
+        self.assertEqual(inspector.total, separate_queries - len(self.page_load) + 1)
+
+    def test_writes_run_in_order(self):
+        client = self.client_for(self.manager)
+        tender = self.tenders[0]
+        detail = reverse('tender-detail', args=[tender.pk])
+        results = client.post(reverse('batch'), {'parallel': True, 'requests': [
+            {'method': 'PATCH', 'path': detail, 'body': {'tender_name': 'Renamed'}},
+            {'method': 'GET', 'path': detail + '?fields=tender_name'},
+            {'method': 'POST', 'path': reverse('tender-submit-for-review', args=[tender.pk]),
+             'headers': {'Idempotency-Key': 'batch-1'}},
+            {'method': 'GET', 'path': reverse('async-tender-list')},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'GET', 'path': reverse('batch')},
+        ]}, format='json').json()['responses']
+        self.assertEqual([result['status'] for result in results], [200, 200, 200, 400, 404, 400])
+        self.assertEqual(results[1]['body'], {'tender_name': 'Renamed'})
+        self.assertEqual(Tender.objects.get(pk=tender.pk).status, 'in_review')
+        self.assertEqual(client.post(reverse('batch'), {'requests': []}, format='json').status_code, 400)
+
+
+class ParallelBatchTests(TenderFixturesMixin, TransactionTestCase):
+    """Parallel reads use other connections, so the fixtures must be committed"""
+
+    def setUp(self):
+        self.setUpTestData()
+
+    def test_parallel_reads_match_sequential(self):
+        client = self.client_for(self.admin)
+        requests = [{'method': 'GET', 'path': reverse(name)} for name in BatchTests.page_load]
+        sequential = client.post(reverse('batch'), {'requests': requests}, format='json').json()['responses']
+        parallel = client.post(
+            reverse('batch'), {'requests': requests, 'parallel': True}, format='json'
+        ).json()['responses']
+        self.assertEqual(parallel, sequential)
+
+
+class JobQueueTests(TenderFixturesMixin, TestCase):
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.dict(TASKS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        task('tests.record')(lambda **payload: self.calls.append(payload['n']))
+
+        def flaky(**payload):
+            raise ConnectionError('SMTP server unreachable')
+        task('tests.flaky', max_attempts=2)(flaky)
+
+    def test_emails_are_sent_by_the_worker(self):
+        APIClient().post(reverse('request-password-reset'), {'email': self.staff.email})
+        self.assertEqual(mail.outbox, [])
+        job = Job.objects.get(task='auth.send_password_reset_email')
+        self.assertEqual((job.status, job.payload), ('queued', {'user_id': self.staff.pk}))
+        self.assertEqual(work('tests'), 1)
+        self.assertEqual(mail.outbox[0].to, [self.staff.email])
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'done')
+
+    def test_priority_and_schedule(self):
+        enqueue('tests.record', {'n': 1})
+        enqueue('tests.record', {'n': 2}, priority=5)
+        enqueue('tests.record', {'n': 3}, delay=60)
+        self.assertEqual(work('tests'), 2)
+        self.assertEqual(self.calls, [2, 1])
+        self.assertRaises(ValueError, enqueue, 'tests.unknown')
+
+        Job.objects.filter(status='queued').update(run_at=timezone.now())
+        work('tests')
+        self.assertEqual(self.calls, [2, 1, 3])
+
+    def test_retries_back_off_then_fail(self):
+        job = enqueue('tests.flaky')
+        work('tests')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('SMTP server unreachable', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(claim_jobs('tests'), [])
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        work('tests')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_jobs_are_released_and_done_ones_pruned(self):
+        enqueue('tests.record', {'n': 1})
+        enqueue('tests.flaky')
+        claimed = claim_jobs('crashed', limit=5)
+        self.assertEqual(len(claimed), 2)
+        Job.objects.filter(task='tests.flaky').update(attempts=2)
+        self.assertEqual(requeue_stale_jobs(), 0)
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 2)
+        self.assertEqual(Job.objects.get(task='tests.flaky').status, 'failed')
+        self.assertEqual(Job.objects.get(task='tests.record').status, 'queued')
+
+        work('tests')
+        self.assertEqual(prune_jobs(), 0)
+        self.assertEqual(prune_jobs(timezone.now() + timedelta(days=8)), 1)
+        self.assertEqual(list(Job.objects.values_list('task', flat=True)), ['tests.flaky'])
+
+
+class JobWorkerPoolTests(TransactionTestCase):
+    """The worker thread uses its own connection, so jobs must be committed"""
+
+    def test_workers_claim_disjoint_jobs(self):
+        calls = []
+        with mock.patch.dict(TASKS):
+            task('tests.record')(lambda **payload: calls.append(payload['n']))
+            for n in range(6):
+                enqueue('tests.record', {'n': n})
+            first, second = claim_jobs('first', limit=4), claim_jobs('second', limit=4)
+            self.assertEqual((len(first), len(second)), (4, 2))
+            self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+            self.assertEqual({job.attempts for job in first + second}, {1})
+
+            Job.objects.update(status='queued', locked_by='', locked_at=None)
+            serve(threads=1, batch_size=2, interval=0.01, once=True, stop=threading.Event())
+        self.assertEqual(sorted(calls), list(range(6)))
+        self.assertEqual(Job.objects.filter(status='done').count(), 6)
+
+    def test_concurrent_claims_are_disjoint(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Shared-cache memory databases lock whole tables across connections
+            self.skipTest('Concurrent claims need a file-backed SQLite test database (TENDER_TEST_DB_NAME)')
+        with mock.patch.dict(TASKS):
+            task('tests.record')(lambda **payload: None)
+            for n in range(40):
+                enqueue('tests.record', {'n': n})
+            start = threading.Barrier(4)
+            claimed = {}
+
+            def claim(worker):
+                start.wait()
+                try:
+                    claimed[worker] = [job.pk for batch in iter(lambda: claim_jobs(worker, 3), []) for job in batch]
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=claim, args=(f'worker-{n}',)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        pks = [pk for worker_pks in claimed.values() for pk in worker_pks]
+        self.assertEqual(len(claimed), 4)
+        self.assertEqual(sorted(pks), sorted(Job.objects.values_list('pk', flat=True)))
+        for worker, worker_pks in claimed.items():
+            self.assertEqual(Job.objects.filter(pk__in=worker_pks, locked_by=worker).count(), len(worker_pks))
+
+
+class CalendarTests(TenderFixturesMixin, TestCase):
+    def setUp(self):
+        feeds.clear()
+
+    def test_range_query_returns_visible_milestones_in_order(self):
+        tender = self.tenders[0]
+        deadline = timezone.localtime(tender.deadline).date()
+        url = reverse('calendar')
+        response = self.client_for(self.manager).get(url, {'start': deadline.isoformat(), 'end': (
+            deadline + timedelta(days=15)).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        ours = [event for event in response.data['events'] if event['tender_id'] == tender.pk]
+        self.assertEqual([event['milestone'] for event in ours], ['submission_end', 'evaluation_start',
+                                                                    'evaluation_end'])
+        self.assertEqual(ours[0]['label'], 'Submission deadline')
+        moments = [event['at'] for event in response.data['events']]
+        self.assertEqual(moments, sorted(moments))
+
+        elsewhere = Department.objects.create(department_name='Parks', description='Parks')
+        outsider = self.make_user('outsider@acme.test', 'manager')
+        User.objects.filter(pk=outsider.pk).update(department=elsewhere)
+        outsider.refresh_from_db()
+        self.assertEqual(self.client_for(outsider).get(url, {'start': deadline.isoformat()}).data['events'], [])
+
+        client = self.client_for(self.manager)
+        self.assertEqual(client.get(url, {'start': 'soon'}).status_code, 400)
+        self.assertEqual(client.get(url, {'start': '2026-02-30'}).status_code, 400)
+        self.assertEqual(client.get(url, {'start': '2026-01-01', 'end': '2028-01-01'}).status_code, 400)
+
+    def test_default_range_is_part_of_the_etag(self):
+        client = self.client_for(self.manager)
+        url = reverse('calendar')
+        response = client.get(url)
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with mock.patch('django.utils.timezone.localdate', return_value=tomorrow):
+            moved = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((moved.status_code, moved.data['start']), (200, tomorrow.isoformat()))
+
+    def test_feed_streams_then_serves_from_cache_until_tenders_change(self):
+        tender = self.tenders[0]
+        feed_url = self.client_for(self.manager).get(reverse('calendar-feed-url')).data['url']
+        client = APIClient()
+        response = client.get(feed_url)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = b''.join(response.streaming_content)
+        self.assertTrue(body.startswith(b'BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith(b'END:VCALENDAR\r\n'))
+        self.assertIn(f'UID:tender-{tender.pk}-submission_end@'.encode(), body)
+        self.assertTrue(all(len(line) <= 75 for line in body.split(b'\r\n')))
+
+        with inspect_queries() as inspector:
+            cached = client.get(feed_url)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached.content, body)
+        self.assertEqual(inspector.total, 2)
+        self.assertEqual(client.get(feed_url, HTTP_IF_NONE_MATCH=cached['ETag']).status_code, 304)
+
+        tender.timeline.award_date = timezone.now() + timedelta(days=3)
+        tender.timeline.save()
+        self.assertTrue(client.get(feed_url).streaming)
+
+    def test_feed_url_is_revoked_by_a_password_change(self):
+        feed_url = self.client_for(self.staff).get(reverse('calendar-feed-url')).data['url']
+        self.assertEqual(APIClient().get(feed_url).status_code, 200)
+        self.assertEqual(APIClient().get(feed_url + 'x').status_code, 404)
+        self.staff.set_password('An0ther-Passw0rd!')
+        self.staff.save()
+        self.assertEqual(APIClient().get(feed_url).status_code, 404)
+
+    def test_long_lines_are_folded_on_character_boundaries(self):
+        folded = fold('SUMMARY:' + 'é' * 60)
+        lines = folded.rstrip(b'\r\n').split(b'\r\n ')
+        self.assertTrue(all(len(line) <= 74 for line in lines[1:]) and len(lines[0]) <= 75)
+        self.assertEqual(b''.join(lines).decode(), 'SUMMARY:' + 'é' * 60)
+
+
+class CompressionTests(TenderFixturesMixin, TestCase):
+    def setUp(self):
+        compressed_bodies.clear()
+        self.encoded = 0
+        gzip_encoder = ENCODERS['gzip']
+
+        def counting(level):
+            self.encoded += 1
+            return gzip_encoder(level)
+        patcher = mock.patch.dict(ENCODERS, {'gzip': counting})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_json_is_compressed_once_per_version(self):
+        client = self.client_for(self.manager)
+        url = reverse('tender-list')
+        plain = client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        self.assertEqual(client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                         304)
+
+        self.assertEqual(client.get(url, HTTP_ACCEPT_ENCODING='gzip').content, response.content)
+        self.assertEqual(self.encoded, 1)
+        Document.objects.create(tender=self.tenders[0], uploader=self.manager, document_type='bid', file='x.pdf')
+        changed = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(self.encoded, 2)
+        self.assertEqual(gzip.decompress(changed.content), client.get(url).content)
+
+    def test_export_streams_compressed_then_comes_from_cache(self):
+        client = self.client_for(self.manager)
+        url = reverse('tender-export')
+        plain = b''.join(client.get(url).streaming_content)
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertTrue(response.streaming)
+        self.assertNotIn('Content-Length', response)
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+        with inspect_queries() as inspector:
+            cached = b''.join(client.get(url, HTTP_ACCEPT_ENCODING='gzip').streaming_content)
+        self.assertEqual(gzip.decompress(cached), plain)
+        # JWT user lookup and the version check; the export itself never runs
+        self.assertEqual(inspector.total, 2)
+        self.assertEqual(self.encoded, 1)
+
+    def test_reference_data_reads_get_validators(self):
+        client = self.client_for(self.admin)
+        url = reverse('company-list')
+        etag = client.get(url)['ETag']
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.create(company_name='Beta', address='x', phone_number='1', email='b@b.test')
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_reference_data_etags_follow_role_and_membership(self):
+        beta = Company.objects.create(company_name='Beta', address='x', phone_number='1', email='b@b.test')
+        url = reverse('company-list')
+        client = self.client_for(self.staff)
+        etag = client.get(url)['ETag']
+        # Moved to another company: no row changed, but the visible ones did
+        User.objects.filter(pk=self.staff.pk).update(company=beta)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['company_name'] for row in response.json()], ['Beta'])
+
+        admin = self.client_for(self.admin)
+        etag = admin.get(url)['ETag']
+        User.objects.filter(pk=self.admin.pk).update(role='staff')
+        response = admin.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['company_name'] for row in response.json()], ['Acme'])
+
+    def test_small_streamed_event_and_refused_bodies_are_untouched(self):
+        request = APIRequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        cases = [
+            HttpResponse(b'{"ok": true}', content_type='application/json'),
+            HttpResponse(b'x' * 4096, content_type='image/png'),
+            StreamingHttpResponse(iter([b'data: 1\n\n']), content_type='text/event-stream'),
+        ]
+        for case in cases:
+            response = CompressionMiddleware(lambda request: case)(request)
+            self.assertNotIn('Content-Encoding', response)
+
+        refused = APIRequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        big = HttpResponse(b'x' * 4096, content_type='text/plain')
+        self.assertNotIn('Content-Encoding', CompressionMiddleware(lambda request: big)(refused))
+        self.assertIsNone(choose_encoding('gzip;q=0, identity'))
+        self.assertEqual(choose_encoding('deflate, gzip;q=0.5'), 'gzip')
+        self.assertIn(choose_encoding('*'), ENCODERS)